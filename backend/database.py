@@ -0,0 +1,24 @@
+"""
+Database access for the backend package.
+
+The backend models and routers share the application's SQLite database, so
+this module simply re-exports the engine, session factories and FastAPI
+dependencies defined in ``models.database``.
+"""
+from models.database import (
+    Base,
+    engine,
+    writer_engine,
+    read_engine,
+    async_engine,
+    async_read_engine,
+    SessionLocal,
+    WriterSessionLocal,
+    ReadSessionLocal,
+    AsyncSessionLocal,
+    AsyncReadSessionLocal,
+    get_db,
+    get_read_db,
+    get_async_db,
+    get_async_read_db,
+)
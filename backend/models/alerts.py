@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from ..database import Base
 from datetime import datetime
@@ -19,7 +19,7 @@ class Alert(Base):
     acknowledged_at = Column(DateTime)
     resolved = Column(Boolean, default=False)
     resolved_at = Column(DateTime)
-    metadata = Column(JSON)  # Additional alert data
+    extra_data = Column("metadata", JSON)  # Additional alert data
 
     # Relationship with alert history
     history = relationship("AlertHistory", back_populates="alert", cascade="all, delete-orphan")
@@ -33,7 +33,37 @@ class AlertHistory(Base):
     performed_by = Column(String)  # Username of who performed the action
     performed_at = Column(DateTime, default=datetime.utcnow)
     notes = Column(String)  # Additional notes about the action
-    metadata = Column(JSON)  # Additional history data
+    extra_data = Column("metadata", JSON)  # Additional history data
 
     # Relationship with alert
-    alert = relationship("Alert", back_populates="history") 
\ No newline at end of file
+    alert = relationship("Alert", back_populates="history") 
+
+class AlertRule(Base):
+    __tablename__ = "alert_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    metric_type = Column(String, nullable=False, index=True)  # cpu, memory, disk, bandwidth, etc.
+    source = Column(String, index=True)  # IP address or hostname; NULL applies to every source
+    operator = Column(String, nullable=False, default=">")  # >, >=, < or <=
+    threshold = Column(Float, nullable=False)
+    clear_threshold = Column(Float)  # Value the metric must get back past to resolve; defaults to threshold
+    for_seconds = Column(Float, default=0)  # How long the threshold must be breached before alerting
+    severity = Column(String, nullable=False, default="warning")  # critical, warning, info
+    enabled = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Incident(Base):
+    __tablename__ = "incidents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False, index=True)  # What the grouped alerts share, e.g. the source
+    title = Column(String, nullable=False)
+    severity = Column(String, nullable=False)  # Highest severity among its alerts
+    status = Column(String, nullable=False, default="open", index=True)  # open or resolved
+    opened_at = Column(DateTime, default=datetime.utcnow)
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
+    resolved_at = Column(DateTime)
+    alert_count = Column(Integer, default=0)  # Distinct alerts grouped into the incident
+    event_count = Column(Integer, default=0)  # Raw alert events folded into those alerts
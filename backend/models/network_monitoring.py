@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 from datetime import datetime
@@ -12,7 +12,7 @@ class NetworkMonitoringHistory(Base):
     metric_type = Column(String, nullable=False)  # cpu, memory, disk, bandwidth, etc.
     value = Column(Float, nullable=False)
     unit = Column(String)  # %, MB, GB, Mbps, etc.
-    metadata = Column(JSON)  # Additional monitoring data
+    extra_data = Column("metadata", JSON)  # Additional monitoring data
 
     # Indexes for faster querying
     __table_args__ = (
@@ -33,7 +33,7 @@ class InterfaceStatsHistory(Base):
     out_bytes = Column(Integer)
     in_errors = Column(Integer)
     out_errors = Column(Integer)
-    metadata = Column(JSON)  # Additional interface data
+    extra_data = Column("metadata", JSON)  # Additional interface data
 
     # Indexes for faster querying
     __table_args__ = (
@@ -53,11 +53,19 @@ class NetFlowHistory(Base):
     bytes = Column(Integer)
     packets = Column(Integer)
     duration = Column(Integer)  # in seconds
-    metadata = Column(JSON)  # Additional NetFlow data
+    extra_data = Column("metadata", JSON)  # Additional NetFlow data
 
     # Indexes for faster querying
     __table_args__ = (
         Index('idx_netflow_timestamp', timestamp),
         Index('idx_netflow_source_ip', source_ip),
         Index('idx_netflow_destination_ip', destination_ip)
-    ) 
\ No newline at end of file
+    ) 
+
+class HistoryArchiveProgress(Base):
+    __tablename__ = "history_archive_progress"
+
+    table_name = Column(String, primary_key=True)
+    # Last archive batch whose rows have been deleted from this table; parts
+    # of later batches may still have their rows in SQLite
+    batch = Column(Integer, nullable=False, default=0)
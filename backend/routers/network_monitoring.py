@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from fastapi import APIRouter, HTTPException, Query, Depends
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, desc
 from datetime import datetime, timedelta
 from typing import List, Optional
 from ..models.network_monitoring import NetworkMonitoringHistory, InterfaceStatsHistory, NetFlowHistory
-from ..database import get_db
+from ..database import get_async_read_db
+from ..services.archive_service import history_archiver
+from ..services.ingest_service import ingest_service
+from ..services.metrics_buffer import metrics_buffer
+from services.auth_service import User, get_current_active_user
 from ..schemas.network_monitoring import (
+    NetworkMonitoringHistoryCreate,
     NetworkMonitoringHistoryResponse,
     InterfaceStatsHistoryResponse,
     NetFlowHistoryResponse,
@@ -14,74 +20,110 @@ from ..schemas.network_monitoring import (
 
 router = APIRouter()
 
+def _get_start_time(time_range: TimeRange) -> datetime:
+    """Translate a time range into the earliest timestamp to include"""
+    now = datetime.utcnow()
+    if time_range == TimeRange.last_hour:
+        return now - timedelta(hours=1)
+    elif time_range == TimeRange.last_6h:
+        return now - timedelta(hours=6)
+    elif time_range == TimeRange.last_24h:
+        return now - timedelta(hours=24)
+    elif time_range == TimeRange.last_7d:
+        return now - timedelta(days=7)
+    elif time_range == TimeRange.last_30d:
+        return now - timedelta(days=30)
+    elif time_range == TimeRange.last_90d:
+        return now - timedelta(days=90)
+    else:  # last_13mo
+        return now - timedelta(days=395)
+
+def _with_archived_batch(query, model):
+    """
+    Select the archiver's committed batch alongside ``query``'s rows. Both
+    are read in one snapshot, so the archive is then read only up to that
+    batch and rows moving between the tiers are returned exactly once.
+    """
+    return query.add_columns(history_archiver.committed_batch_query(model).label("archived_batch"))
+
+async def _query_tiers(db: AsyncSession, model, query, start_time: datetime, filters: dict) -> list:
+    """Run ``query`` on the hot tier, adding archived rows when the range reaches the archive"""
+    if not history_archiver.covers(start_time):
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    result = await db.execute(_with_archived_batch(query, model))
+    rows = result.all()
+    # Without hot rows there is nothing to double-count; the archive reads its current batch
+    max_batch = rows[0].archived_batch if rows else None
+    archived = await run_in_threadpool(history_archiver.query_rows, model, start_time, filters, max_batch)
+    return [row[0] for row in rows] + archived
+
 @router.get("/history/metrics", response_model=List[NetworkMonitoringHistoryResponse])
 async def get_metrics_history(
     source: Optional[str] = None,
     metric_type: Optional[str] = None,
     time_range: TimeRange = TimeRange.last_24h,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get historical metrics data with optional filtering"""
-    query = db.query(NetworkMonitoringHistory)
-    
+    # Recent windows are served from the in-memory ring buffer
+    start_time = _get_start_time(time_range)
+    if metrics_buffer.covers(start_time, source, metric_type):
+        return metrics_buffer.history(start_time, source, metric_type)
+
+    query = select(NetworkMonitoringHistory)
+
     # Apply time range filter
-    now = datetime.utcnow()
-    if time_range == TimeRange.last_hour:
-        start_time = now - timedelta(hours=1)
-    elif time_range == TimeRange.last_6h:
-        start_time = now - timedelta(hours=6)
-    elif time_range == TimeRange.last_24h:
-        start_time = now - timedelta(hours=24)
-    elif time_range == TimeRange.last_7d:
-        start_time = now - timedelta(days=7)
-    else:  # last_30d
-        start_time = now - timedelta(days=30)
-    
-    query = query.filter(NetworkMonitoringHistory.timestamp >= start_time)
-    
+    query = query.where(NetworkMonitoringHistory.timestamp >= start_time)
+
     # Apply optional filters
     if source:
-        query = query.filter(NetworkMonitoringHistory.source == source)
+        query = query.where(NetworkMonitoringHistory.source == source)
     if metric_type:
-        query = query.filter(NetworkMonitoringHistory.metric_type == metric_type)
-    
+        query = query.where(NetworkMonitoringHistory.metric_type == metric_type)
+
     # Order by timestamp descending
     query = query.order_by(desc(NetworkMonitoringHistory.timestamp))
-    
-    return query.all()
+
+    return await _query_tiers(
+        db, NetworkMonitoringHistory, query, start_time, {"source": source, "metric_type": metric_type}
+    )
+
+@router.post("/history/metrics")
+async def ingest_metrics(
+    records: List[NetworkMonitoringHistoryCreate],
+    current_user: User = Depends(get_current_active_user)
+):
+    """Store a batch of metric datapoints"""
+    count = await run_in_threadpool(
+        ingest_service.ingest_metrics, [record.model_dump() for record in records]
+    )
+    return {"status": "success", "ingested": count}
 
 @router.get("/history/interface-stats", response_model=List[InterfaceStatsHistoryResponse])
 async def get_interface_stats_history(
     interface_name: Optional[str] = None,
     time_range: TimeRange = TimeRange.last_24h,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get historical interface statistics"""
-    query = db.query(InterfaceStatsHistory)
-    
+    query = select(InterfaceStatsHistory)
+
     # Apply time range filter
-    now = datetime.utcnow()
-    if time_range == TimeRange.last_hour:
-        start_time = now - timedelta(hours=1)
-    elif time_range == TimeRange.last_6h:
-        start_time = now - timedelta(hours=6)
-    elif time_range == TimeRange.last_24h:
-        start_time = now - timedelta(hours=24)
-    elif time_range == TimeRange.last_7d:
-        start_time = now - timedelta(days=7)
-    else:  # last_30d
-        start_time = now - timedelta(days=30)
-    
-    query = query.filter(InterfaceStatsHistory.timestamp >= start_time)
-    
+    start_time = _get_start_time(time_range)
+    query = query.where(InterfaceStatsHistory.timestamp >= start_time)
+
     # Apply optional interface filter
     if interface_name:
-        query = query.filter(InterfaceStatsHistory.interface_name == interface_name)
-    
+        query = query.where(InterfaceStatsHistory.interface_name == interface_name)
+
     # Order by timestamp descending
     query = query.order_by(desc(InterfaceStatsHistory.timestamp))
-    
-    return query.all()
+
+    return await _query_tiers(
+        db, InterfaceStatsHistory, query, start_time, {"interface_name": interface_name}
+    )
 
 @router.get("/history/netflow", response_model=List[NetFlowHistoryResponse])
 async def get_netflow_history(
@@ -89,112 +131,151 @@ async def get_netflow_history(
     destination_ip: Optional[str] = None,
     protocol: Optional[str] = None,
     time_range: TimeRange = TimeRange.last_24h,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get historical NetFlow data"""
-    query = db.query(NetFlowHistory)
-    
+    query = select(NetFlowHistory)
+
     # Apply time range filter
-    now = datetime.utcnow()
-    if time_range == TimeRange.last_hour:
-        start_time = now - timedelta(hours=1)
-    elif time_range == TimeRange.last_6h:
-        start_time = now - timedelta(hours=6)
-    elif time_range == TimeRange.last_24h:
-        start_time = now - timedelta(hours=24)
-    elif time_range == TimeRange.last_7d:
-        start_time = now - timedelta(days=7)
-    else:  # last_30d
-        start_time = now - timedelta(days=30)
-    
-    query = query.filter(NetFlowHistory.timestamp >= start_time)
-    
+    start_time = _get_start_time(time_range)
+    query = query.where(NetFlowHistory.timestamp >= start_time)
+
     # Apply optional filters
     if source_ip:
-        query = query.filter(NetFlowHistory.source_ip == source_ip)
+        query = query.where(NetFlowHistory.source_ip == source_ip)
     if destination_ip:
-        query = query.filter(NetFlowHistory.destination_ip == destination_ip)
+        query = query.where(NetFlowHistory.destination_ip == destination_ip)
     if protocol:
-        query = query.filter(NetFlowHistory.protocol == protocol)
-    
+        query = query.where(NetFlowHistory.protocol == protocol)
+
     # Order by timestamp descending
     query = query.order_by(desc(NetFlowHistory.timestamp))
-    
-    return query.all()
+
+    return await _query_tiers(
+        db,
+        NetFlowHistory,
+        query,
+        start_time,
+        {"source_ip": source_ip, "destination_ip": destination_ip, "protocol": protocol}
+    )
 
 @router.get("/history/metrics/summary")
 async def get_metrics_summary(
     source: Optional[str] = None,
     metric_type: Optional[str] = None,
     time_range: TimeRange = TimeRange.last_24h,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get summary statistics for metrics"""
-    query = db.query(
+    # Recent windows are served from the in-memory ring buffer
+    start_time = _get_start_time(time_range)
+    if metrics_buffer.covers(start_time, source, metric_type):
+        return metrics_buffer.summary(start_time, source, metric_type)
+
+    query = select(
         NetworkMonitoringHistory.metric_type,
         func.avg(NetworkMonitoringHistory.value).label('average'),
         func.max(NetworkMonitoringHistory.value).label('maximum'),
         func.min(NetworkMonitoringHistory.value).label('minimum'),
         func.count(NetworkMonitoringHistory.id).label('count')
     )
-    
+
     # Apply time range filter
-    now = datetime.utcnow()
-    if time_range == TimeRange.last_hour:
-        start_time = now - timedelta(hours=1)
-    elif time_range == TimeRange.last_6h:
-        start_time = now - timedelta(hours=6)
-    elif time_range == TimeRange.last_24h:
-        start_time = now - timedelta(hours=24)
-    elif time_range == TimeRange.last_7d:
-        start_time = now - timedelta(days=7)
-    else:  # last_30d
-        start_time = now - timedelta(days=30)
-    
-    query = query.filter(NetworkMonitoringHistory.timestamp >= start_time)
-    
+    query = query.where(NetworkMonitoringHistory.timestamp >= start_time)
+
     # Apply optional filters
     if source:
-        query = query.filter(NetworkMonitoringHistory.source == source)
+        query = query.where(NetworkMonitoringHistory.source == source)
     if metric_type:
-        query = query.filter(NetworkMonitoringHistory.metric_type == metric_type)
-    
+        query = query.where(NetworkMonitoringHistory.metric_type == metric_type)
+
     # Group by metric type
     query = query.group_by(NetworkMonitoringHistory.metric_type)
-    
-    return query.all()
+
+    if not history_archiver.covers(start_time):
+        result = await db.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    result = await db.execute(_with_archived_batch(query, NetworkMonitoringHistory))
+    summaries = [dict(row) for row in result.mappings()]
+    max_batch = None
+    for summary in summaries:
+        max_batch = summary.pop("archived_batch")
+
+    # Fold archived aggregates into the hot-tier ones
+    archived = await run_in_threadpool(
+        history_archiver.aggregate,
+        NetworkMonitoringHistory,
+        start_time,
+        "metric_type",
+        [("value", "sum"), ("value", "max"), ("value", "min"), ("value", "count")],
+        {"source": source, "metric_type": metric_type},
+        max_batch
+    )
+    merged = {summary["metric_type"]: summary for summary in summaries}
+    for group in archived:
+        summary = merged.get(group["metric_type"])
+        if summary is None:
+            merged[group["metric_type"]] = {
+                "metric_type": group["metric_type"],
+                "average": group["value_sum"] / group["value_count"],
+                "maximum": group["value_max"],
+                "minimum": group["value_min"],
+                "count": group["value_count"]
+            }
+            continue
+        count = summary["count"] + group["value_count"]
+        summary["average"] = (summary["average"] * summary["count"] + group["value_sum"]) / count
+        summary["maximum"] = max(summary["maximum"], group["value_max"])
+        summary["minimum"] = min(summary["minimum"], group["value_min"])
+        summary["count"] = count
+    return list(merged.values())
 
 @router.get("/history/netflow/top-talkers")
 async def get_top_talkers(
     time_range: TimeRange = TimeRange.last_24h,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get top talkers based on NetFlow data"""
-    query = db.query(
+    query = select(
         NetFlowHistory.source_ip,
         func.sum(NetFlowHistory.bytes).label('total_bytes'),
         func.sum(NetFlowHistory.packets).label('total_packets')
     )
-    
+
     # Apply time range filter
-    now = datetime.utcnow()
-    if time_range == TimeRange.last_hour:
-        start_time = now - timedelta(hours=1)
-    elif time_range == TimeRange.last_6h:
-        start_time = now - timedelta(hours=6)
-    elif time_range == TimeRange.last_24h:
-        start_time = now - timedelta(hours=24)
-    elif time_range == TimeRange.last_7d:
-        start_time = now - timedelta(days=7)
-    else:  # last_30d
-        start_time = now - timedelta(days=30)
-    
-    query = query.filter(NetFlowHistory.timestamp >= start_time)
-    
+    start_time = _get_start_time(time_range)
+    query = query.where(NetFlowHistory.timestamp >= start_time)
+
     # Group by source IP and order by total bytes
     query = query.group_by(NetFlowHistory.source_ip)
     query = query.order_by(desc('total_bytes'))
-    query = query.limit(limit)
-    
-    return query.all() 
\ No newline at end of file
+    if not history_archiver.covers(start_time):
+        query = query.limit(limit)
+        result = await db.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    # Totals span both tiers, so rank only after adding the archived sums
+    result = await db.execute(_with_archived_batch(query, NetFlowHistory))
+    talkers = {row["source_ip"]: dict(row) for row in result.mappings()}
+    max_batch = None
+    for talker in talkers.values():
+        max_batch = talker.pop("archived_batch")
+    archived = await run_in_threadpool(
+        history_archiver.aggregate,
+        NetFlowHistory,
+        start_time,
+        "source_ip",
+        [("bytes", "sum"), ("packets", "sum")],
+        None,
+        max_batch
+    )
+    for group in archived:
+        talker = talkers.setdefault(
+            group["source_ip"],
+            {"source_ip": group["source_ip"], "total_bytes": 0, "total_packets": 0}
+        )
+        talker["total_bytes"] = (talker["total_bytes"] or 0) + (group["bytes_sum"] or 0)
+        talker["total_packets"] = (talker["total_packets"] or 0) + (group["packets_sum"] or 0)
+    return sorted(talkers.values(), key=lambda talker: talker["total_bytes"] or 0, reverse=True)[:limit]
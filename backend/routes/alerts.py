@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Dict, Any, Optional, Literal
 from ..services.email_service import email_service
-from ..models.database import get_db
-from sqlalchemy.orm import Session
+from ..services.alert_engine import alert_engine
+from ..services.notification_dispatcher import notification_dispatcher, InvalidNotification
+from ..models.alerts import AlertRule, Incident
+from ..schemas.alerts import AlertRuleCreate, AlertRuleUpdate, AlertRuleResponse, IncidentResponse
+from ..database import get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.concurrency import run_in_threadpool
+from services.auth_service import User, get_current_active_user, get_current_admin_user
 from datetime import datetime
 import subprocess
 import logging
@@ -13,10 +20,11 @@ logger = logging.getLogger(__name__)
 @router.post("/api/send-alert-email")
 async def send_alert_email(
     data: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
 ):
     """
-    Send email notifications for alerts.
+    Queue email notifications for alerts; they are sent in the background.
     
     Expected payload:
     {
@@ -38,9 +46,9 @@ async def send_alert_email(
         )
         
         if not success:
-            raise HTTPException(status_code=500, detail="Failed to send email")
+            raise HTTPException(status_code=500, detail="Failed to queue email")
             
-        return {"status": "success", "message": "Email sent successfully"}
+        return {"status": "success", "message": "Email queued for delivery"}
         
     except Exception as e:
         logger.error(f"Error sending alert email: {str(e)}")
@@ -49,7 +57,8 @@ async def send_alert_email(
 @router.post("/api/restart-service")
 async def restart_service(
     data: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
     """
     Restart a service based on alert type.
@@ -101,7 +110,8 @@ async def restart_service(
 @router.post("/api/block-traffic")
 async def block_traffic(
     data: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
     """
     Block traffic from a specific source.
@@ -142,7 +152,8 @@ async def block_traffic(
 @router.post("/api/notify-admin")
 async def notify_admin(
     data: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
 ):
     """
     Send a notification to the admin about a specific alert.
@@ -167,4 +178,127 @@ async def notify_admin(
         
     except Exception as e:
         logger.error(f"Error notifying admin: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@router.get("/api/alert-rules", response_model=List[AlertRuleResponse])
+async def list_alert_rules(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Threshold rules evaluated against ingested metrics"""
+    result = await db.execute(select(AlertRule).order_by(AlertRule.id))
+    return result.scalars().all()
+
+@router.post("/api/alert-rules", response_model=AlertRuleResponse)
+async def create_alert_rule(
+    rule: AlertRuleCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    db_rule = AlertRule(**rule.model_dump())
+    db.add(db_rule)
+    await db.commit()
+    await db.refresh(db_rule)
+    alert_engine.invalidate()
+    return db_rule
+
+@router.put("/api/alert-rules/{rule_id}", response_model=AlertRuleResponse)
+async def update_alert_rule(
+    rule_id: int,
+    rule_update: AlertRuleUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    db_rule = await db.get(AlertRule, rule_id)
+    if db_rule is None:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    for key, value in rule_update.model_dump(exclude_unset=True).items():
+        # Only source and clear_threshold can be cleared
+        if value is not None or key in ("source", "clear_threshold"):
+            setattr(db_rule, key, value)
+    await db.commit()
+    await db.refresh(db_rule)
+    alert_engine.invalidate()
+    return db_rule
+
+@router.delete("/api/alert-rules/{rule_id}")
+async def delete_alert_rule(
+    rule_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    db_rule = await db.get(AlertRule, rule_id)
+    if db_rule is None:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    await db.delete(db_rule)
+    await db.commit()
+    alert_engine.invalidate()
+    return {"status": "success", "message": "Alert rule deleted"}
+
+@router.get("/api/incidents", response_model=List[IncidentResponse])
+async def list_incidents(
+    status: Optional[Literal["open", "resolved"]] = None,
+    limit: int = Query(100, gt=0, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Groups of correlated alerts, most recently active first"""
+    query = select(Incident).order_by(Incident.last_seen_at.desc()).limit(limit)
+    if status:
+        query = query.where(Incident.status == status)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+async def _queue_notification(channel: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        notification_id = await run_in_threadpool(notification_dispatcher.enqueue, channel, data)
+    except InvalidNotification as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "message": "Notification queued for delivery", "id": notification_id}
+
+@router.post("/api/send-slack-notification")
+async def send_slack_notification(
+    data: Dict[str, Any],
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Queue a Slack notification for an alert.
+
+    Expected payload:
+    {
+        "alert": {"type": "cpu", "severity": "critical", "message": "CPU usage is 95%", ...},
+        "device": {...},
+        "group": {...},
+        "config": {"webhook": "https://hooks.slack.com/services/...", "channel": "", "username": ""}
+    }
+    """
+    return await _queue_notification("slack", data)
+
+@router.post("/api/send-webhook-notification")
+async def send_webhook_notification(
+    data: Dict[str, Any],
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Queue a webhook call for an alert. The alert, device and group are
+    added to config["body"] and sent to config["url"] with config["method"]
+    (POST or PUT) and config["headers"]. The URL must resolve to a public
+    address unless its host is in NOTIFICATION_ALLOWED_HOSTS.
+    """
+    return await _queue_notification("webhook", data)
+
+@router.post("/api/send-teams-notification")
+async def send_teams_notification(
+    data: Dict[str, Any],
+    current_user: User = Depends(get_current_active_user)
+):
+    """Queue a Microsoft Teams notification for an alert; config["webhook"] is the incoming webhook URL"""
+    return await _queue_notification("teams", data)
+
+@router.post("/api/send-pagerduty-notification")
+async def send_pagerduty_notification(
+    data: Dict[str, Any],
+    current_user: User = Depends(get_current_active_user)
+):
+    """Queue a PagerDuty event for an alert; config["apiKey"] is the integration (routing) key"""
+    return await _queue_notification("pagerduty", data)
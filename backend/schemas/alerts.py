@@ -0,0 +1,50 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, Literal
+
+class AlertRuleBase(BaseModel):
+    name: str
+    metric_type: str
+    source: Optional[str] = None  # None applies the rule to every source
+    operator: Literal[">", ">=", "<", "<="] = ">"
+    threshold: float
+    # Value the metric must get back past before the alert resolves; defaults to threshold
+    clear_threshold: Optional[float] = None
+    for_seconds: float = Field(0, ge=0)  # How long the threshold must be breached before alerting
+    severity: Literal["critical", "warning", "info"] = "warning"
+    enabled: bool = True
+
+class AlertRuleCreate(AlertRuleBase):
+    pass
+
+class AlertRuleUpdate(AlertRuleBase):
+    name: Optional[str] = None
+    metric_type: Optional[str] = None
+    operator: Optional[Literal[">", ">=", "<", "<="]] = None
+    threshold: Optional[float] = None
+    for_seconds: Optional[float] = Field(None, ge=0)
+    severity: Optional[Literal["critical", "warning", "info"]] = None
+    enabled: Optional[bool] = None
+
+class AlertRuleResponse(AlertRuleBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class IncidentResponse(BaseModel):
+    id: int
+    key: str
+    title: str
+    severity: str
+    status: str
+    opened_at: datetime
+    last_seen_at: datetime
+    resolved_at: Optional[datetime] = None
+    alert_count: int
+    event_count: int
+
+    class Config:
+        from_attributes = True
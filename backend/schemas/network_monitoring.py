@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, AliasChoices
 from datetime import datetime
 from typing import Optional, Dict, Any
 from enum import Enum
@@ -9,16 +9,21 @@ class TimeRange(str, Enum):
     last_24h = "24h"
     last_7d = "7d"
     last_30d = "30d"
+    last_90d = "90d"
+    last_13mo = "13mo"
 
 class NetworkMonitoringHistoryBase(BaseModel):
     source: str
     metric_type: str
     value: float
     unit: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
+    # Stored on the ORM models as ``extra_data`` (``metadata`` is reserved by SQLAlchemy)
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("extra_data", "metadata")
+    )
 
 class NetworkMonitoringHistoryCreate(NetworkMonitoringHistoryBase):
-    pass
+    timestamp: Optional[datetime] = None  # naive UTC, defaults to ingestion time
 
 class NetworkMonitoringHistoryResponse(NetworkMonitoringHistoryBase):
     id: int
@@ -35,7 +40,9 @@ class InterfaceStatsHistoryBase(BaseModel):
     out_bytes: Optional[int] = None
     in_errors: Optional[int] = None
     out_errors: Optional[int] = None
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("extra_data", "metadata")
+    )
 
 class InterfaceStatsHistoryCreate(InterfaceStatsHistoryBase):
     pass
@@ -55,7 +62,9 @@ class NetFlowHistoryBase(BaseModel):
     bytes: Optional[int] = None
     packets: Optional[int] = None
     duration: Optional[int] = None
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("extra_data", "metadata")
+    )
 
 class NetFlowHistoryCreate(NetFlowHistoryBase):
     pass
@@ -0,0 +1,275 @@
+import operator
+import threading
+import time
+import logging
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from ..database import ReadSessionLocal
+from ..models.alerts import Alert, AlertRule
+from .alert_grouping import AlertGrouper, alert_grouper
+from .metrics_buffer import _to_epoch
+from services.metrics import registry
+from config.alerting import alerting_settings
+
+logger = logging.getLogger(__name__)
+
+evaluation_seconds = registry.histogram("fms_alert_evaluation_seconds", "Alert rule evaluation time per ingest batch")
+alert_transitions = registry.counter(
+    "fms_alert_transitions_total", "Alerts raised and resolved by the rule engine", ["severity", "action"]
+)
+
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+SCALAR_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+# Series with at most this many points in a batch are walked point by point,
+# which is cheaper than setting up the array operations
+SCALAR_POINTS = 16
+
+FIRE = "created"
+RESOLVE = "resolved"
+
+class _Rule:
+    __slots__ = ("id", "name", "metric_type", "source", "operator", "threshold", "clear_threshold",
+                 "for_seconds", "severity")
+
+    def __init__(self, rule: AlertRule):
+        self.id = rule.id
+        self.name = rule.name
+        self.metric_type = rule.metric_type
+        self.source = rule.source
+        self.operator = rule.operator
+        self.threshold = rule.threshold
+        clear_threshold = rule.threshold if rule.clear_threshold is None else rule.clear_threshold
+        # Clearing must be at least as strict as not breaching
+        if rule.operator in (">", ">="):
+            self.clear_threshold = min(clear_threshold, rule.threshold)
+        else:
+            self.clear_threshold = max(clear_threshold, rule.threshold)
+        self.for_seconds = rule.for_seconds or 0.0
+        self.severity = rule.severity
+
+class _SeriesState:
+    """Where one rule stands for one source"""
+    __slots__ = ("pending_since", "firing", "alert")
+
+    def __init__(self, alert=None):
+        self.pending_since: Optional[float] = None  # Start of the current breach, if not yet firing
+        self.firing = alert is not None
+        self.alert = alert  # The grouper's alert while firing
+
+def evaluate_series(
+    rule: _Rule, state: _SeriesState, timestamps: np.ndarray, values: np.ndarray
+) -> List[Tuple[str, int]]:
+    """
+    Advance one rule over one series' points in time order.
+
+    A breach must last ``for_seconds`` before the rule fires, and a firing
+    rule only resolves once the value gets back past ``clear_threshold``,
+    so a value hovering at the threshold does not flap. Breaching runs, the
+    point at which each would fire and the clearing points are computed
+    for the whole series at once; the loop below runs once per transition.
+
+    Returns:
+        (FIRE or RESOLVE, point index) transitions; ``state`` is advanced to
+        the end of the batch
+    """
+    compare = OPERATORS[rule.operator]
+    breach = compare(values, rule.threshold)
+    clearing = np.flatnonzero(~compare(values, rule.clear_threshold))
+
+    # Runs of consecutive breaching points, [starts[k], ends[k])
+    edges = np.diff(np.concatenate(([0], breach.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    run_since = timestamps[starts]
+    if state.pending_since is not None and len(starts) and starts[0] == 0:
+        # The breach began in an earlier batch
+        run_since[0] = state.pending_since
+    # First point of each run at which the breach has lasted for_seconds
+    due = np.maximum(np.searchsorted(timestamps, run_since + rule.for_seconds), starts)
+    firing_runs = np.flatnonzero(due < ends)
+    firing_starts = starts[firing_runs]
+
+    transitions = []
+    index = 0
+    while True:
+        if state.firing:
+            position = np.searchsorted(clearing, index)
+            if position == len(clearing):
+                break
+            index = int(clearing[position])
+            transitions.append((RESOLVE, index))
+            state.firing = False
+        else:
+            # A clearing point never breaches, so runs after it start later
+            position = np.searchsorted(firing_starts, index)
+            if position == len(firing_starts):
+                break
+            index = int(due[firing_runs[position]])
+            transitions.append((FIRE, index))
+            state.firing = True
+        index += 1
+
+    # A run still breaching at the end of the batch without firing is pending
+    state.pending_since = float(run_since[-1]) if not state.firing and len(values) and breach[-1] else None
+    return transitions
+
+def evaluate_points(
+    rule: _Rule, state: _SeriesState, timestamps: List[float], values: List[float]
+) -> List[Tuple[str, int]]:
+    """evaluate_series for a few points, one at a time"""
+    compare = SCALAR_OPERATORS[rule.operator]
+    transitions = []
+    for index, (timestamp, value) in enumerate(zip(timestamps, values)):
+        if state.firing:
+            if not compare(value, rule.clear_threshold):
+                transitions.append((RESOLVE, index))
+                state.firing = False
+        elif compare(value, rule.threshold):
+            if state.pending_since is None:
+                state.pending_since = timestamp
+            if timestamp >= state.pending_since + rule.for_seconds:
+                transitions.append((FIRE, index))
+                state.firing = True
+                state.pending_since = None
+        else:
+            state.pending_since = None
+    return transitions
+
+class AlertEngine:
+    """
+    Evaluates threshold rules against each ingested metrics batch and hands
+    the alerts raised and resolved to the AlertGrouper, which writes them.
+
+    Rules are indexed by (source, metric_type), with rules for every source
+    under (None, metric_type), so a datapoint is only checked against the
+    rules that apply to its series. Per-series state lives in memory; open
+    alerts are reloaded from the database on startup so a restart does not
+    raise them again.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, grouper: AlertGrouper = None):
+        self.config = config or alerting_settings.ALERT_RULES
+        self.grouper = grouper or alert_grouper
+        self._rules: Dict[Tuple[Optional[str], str], List[_Rule]] = {}
+        self._series_rules: Dict[Tuple[str, str], List[_Rule]] = {}
+        self._states: Dict[Tuple[int, str], _SeriesState] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Reload the rules before the next evaluation"""
+        self._loaded_at = None
+
+    def _load_rules(self):
+        with ReadSessionLocal() as db:
+            rules = db.execute(select(AlertRule).where(AlertRule.enabled.is_(True))).scalars().all()
+            index: Dict[Tuple[Optional[str], str], List[_Rule]] = defaultdict(list)
+            for rule in rules:
+                index[(rule.source, rule.metric_type)].append(_Rule(rule))
+            states = {}
+            if self._loaded_at is None and not self._states:
+                # Resume the alerts left open by the previous process
+                open_alerts = db.execute(
+                    select(Alert.id, Alert.type, Alert.source, Alert.severity, Alert.created_at, Alert.extra_data)
+                    .where(Alert.resolved.is_(False))
+                ).all()
+                open_alerts = [row for row in open_alerts if (row.extra_data or {}).get("rule_id") is not None]
+                for row, group in zip(open_alerts, self.grouper.resume(db, open_alerts)):
+                    states[(row.extra_data["rule_id"], row.source)] = _SeriesState(group)
+
+        rule_ids = {rule.id for rules in index.values() for rule in rules}
+        self._rules = dict(index)
+        self._series_rules = {}
+        self._states.update(states)
+        for key, state in self._states.items():
+            if key[0] not in rule_ids and state.alert is not None:
+                # The rule was deleted or disabled while firing
+                self.grouper.resolve(state.alert, time.time())
+        self._states = {key: state for key, state in self._states.items() if key[0] in rule_ids}
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(rule_ids)} alert rules")
+
+    def _rules_for(self, source: str, metric_type: str) -> List[_Rule]:
+        rules = self._series_rules.get((source, metric_type))
+        if rules is None:
+            rules = self._rules.get((source, metric_type), []) + self._rules.get((None, metric_type), [])
+            self._series_rules[(source, metric_type)] = rules
+        return rules
+
+    def evaluate(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Check a batch of metric rows against the rules and record the alerts
+        raised and resolved.
+
+        Args:
+            rows: Ingested rows with source, metric_type, timestamp and value
+
+        Returns:
+            Number of alert transitions recorded
+        """
+        if not self.config["enabled"] or not rows:
+            return 0
+        with self._lock, evaluation_seconds.time():
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.config["refresh_interval"]:
+                self._load_rules()
+            if not self._rules:
+                self.grouper.flush()
+                return 0
+
+            series: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+            for position, row in enumerate(rows):
+                if self._rules_for(row["source"], row["metric_type"]):
+                    series[(row["source"], row["metric_type"])].append(position)
+
+            transitions = 0
+            for (source, metric_type), positions in series.items():
+                points = sorted((_to_epoch(rows[position]["timestamp"]), rows[position]["value"])
+                                for position in positions)
+                if len(points) <= SCALAR_POINTS:
+                    timestamps = [timestamp for timestamp, _ in points]
+                    values = [float(value) for _, value in points]
+                    evaluate = evaluate_points
+                else:
+                    timestamps = np.fromiter((timestamp for timestamp, _ in points), float, len(points))
+                    values = np.fromiter((value for _, value in points), float, len(points))
+                    evaluate = evaluate_series
+                for rule in self._rules_for(source, metric_type):
+                    state = self._states.setdefault((rule.id, source), _SeriesState())
+                    for action, index in evaluate(rule, state, timestamps, values):
+                        epoch, value = float(timestamps[index]), float(values[index])
+                        if action == FIRE:
+                            state.alert = self.grouper.fire(
+                                rule.metric_type, source, rule.severity, epoch,
+                                message=f"{rule.metric_type} on {source} is {value:g} ({rule.operator} {rule.threshold:g})",
+                                value=value,
+                                threshold=rule.threshold,
+                                details={"rule_id": rule.id, "rule": rule.name, "metric_type": rule.metric_type,
+                                         "operator": rule.operator, "value": value, "threshold": rule.threshold}
+                            )
+                        else:
+                            self.grouper.resolve(state.alert, epoch)
+                            state.alert = None
+                        alert_transitions.labels(rule.severity, action).inc()
+                        transitions += 1
+
+            self.grouper.flush()
+            return transitions
+
+# Create a singleton instance
+alert_engine = AlertEngine()
@@ -0,0 +1,373 @@
+import hashlib
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+
+from ..database import WriterSessionLocal
+from ..models.alerts import Alert, AlertHistory, Incident
+from .metrics_buffer import _to_epoch, _from_epoch
+from services.metrics import registry
+from config.alerting import alerting_settings
+
+logger = logging.getLogger(__name__)
+
+alert_events = registry.counter(
+    "fms_alert_events_total", "Alert events raised, by whether they opened an alert or folded into one", ["outcome"]
+)
+alert_writes = registry.counter("fms_alert_writes_total", "Alert rows inserted and updated by the grouper", ["kind"])
+
+SEVERITY_RANK = {"info": 0, "warning": 1, "critical": 2}
+
+def fingerprint(alert_type: str, source: Optional[str], severity: str) -> str:
+    """Identity of an alert: repeats with the same fingerprint fold into one"""
+    return hashlib.sha1(f"{alert_type}\0{source or ''}\0{severity}".encode()).hexdigest()[:16]
+
+def _iso(epoch: float) -> str:
+    return _from_epoch(epoch).isoformat()
+
+class _Incident:
+    """Alerts raised close together for the same key"""
+    __slots__ = ("id", "key", "title", "severity", "opened_at", "last_seen", "resolved_at",
+                 "open_alerts", "alert_count", "event_count")
+
+    def __init__(self, key: str, title: str, severity: str, opened_at: float):
+        self.id: Optional[int] = None
+        self.key = key
+        self.title = title
+        self.severity = severity
+        self.opened_at = opened_at
+        self.last_seen = opened_at
+        self.resolved_at: Optional[float] = None
+        self.open_alerts: Set["_Group"] = set()
+        self.alert_count = 0
+        self.event_count = 0
+
+class _Group:
+    """One open (or recently resolved) alert and the repeats folded into it"""
+    __slots__ = ("fingerprint", "type", "source", "severity", "message", "value", "threshold", "details",
+                 "alert_id", "incident", "count", "active", "first_seen", "last_seen", "resolved_at",
+                 "stored_resolved")
+
+    def __init__(self, alert_type: str, source: Optional[str], severity: str, first_seen: float):
+        self.fingerprint = fingerprint(alert_type, source, severity)
+        self.type = alert_type
+        self.source = source
+        self.severity = severity
+        self.message = ""
+        self.value = 0.0
+        self.threshold = 0.0
+        self.details: Dict[str, Any] = {}
+        self.alert_id: Optional[int] = None  # Set once the Alert row is written
+        self.incident: Optional[_Incident] = None
+        self.count = 1  # Events folded into the alert
+        self.active = 1  # Raisers (rule and source) still firing
+        self.first_seen = first_seen
+        self.last_seen = first_seen
+        self.resolved_at: Optional[float] = None
+        self.stored_resolved = False  # Whether the Alert row says resolved
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.alert_id,
+            "incident_id": self.incident.id if self.incident else None,
+            "fingerprint": self.fingerprint,
+            "type": self.type,
+            "severity": self.severity,
+            "message": self.message,
+            "source": self.source,
+            "value": self.value,
+            "threshold": self.threshold,
+            "count": self.count,
+            "timestamp": _iso(self.first_seen),
+            "last_seen": _iso(self.last_seen),
+            "resolved": self.resolved_at is not None,
+        }
+
+class AlertGrouper:
+    """
+    Folds repeated alerts into one Alert row and groups alerts into incidents.
+
+    Alerts are fingerprinted by (type, source, severity). The first event
+    for a fingerprint writes an Alert row; repeats while it is open, or
+    within ``dedup_window`` of it resolving, only bump its count and
+    last-seen time (kept in the alert's metadata) and reopen it, and those
+    updates are written at most every ``flush_interval``. A flapping link
+    therefore costs one row and a couple of updates per flush rather than a
+    row per event.
+
+    New alerts join the incident for their key (source by default) while
+    it is open or was last seen within ``incident_window``. Listeners are
+    told when an alert is created and when it has stayed resolved for the
+    dedup window, so notifications follow distinct problems too.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or alerting_settings.ALERT_GROUPING
+        self._groups: Dict[str, _Group] = {}
+        self._incidents: Dict[str, _Incident] = {}
+        self._dirty: Set[_Group] = set()
+        self._dirty_incidents: Set[_Incident] = set()
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._flushed_at = time.monotonic()
+        self._lock = threading.RLock()
+
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        """
+        Call ``callback(event, alert)`` after each flush for every alert
+        created ("created") and every alert that stayed resolved for the
+        dedup window ("resolved").
+        """
+        self._listeners.append(callback)
+
+    def _incident_key(self, group: _Group) -> str:
+        return group.type if self.config["group_by"] == "type" else (group.source or "")
+
+    def _join_incident(self, group: _Group, epoch: float):
+        key = self._incident_key(group)
+        incident = self._incidents.get(key)
+        if incident is None or (incident.resolved_at is not None
+                                and epoch - incident.last_seen > self.config["incident_window"]):
+            incident = _Incident(key, group.message, group.severity, epoch)
+            self._incidents[key] = incident
+        if SEVERITY_RANK.get(group.severity, 0) > SEVERITY_RANK.get(incident.severity, 0):
+            incident.severity = group.severity
+        incident.alert_count += 1
+        group.incident = incident
+        self._touch_incident(group, epoch)
+
+    def _touch_incident(self, group: _Group, epoch: float):
+        incident = group.incident
+        incident.open_alerts.add(group)
+        incident.resolved_at = None
+        incident.last_seen = max(incident.last_seen, epoch)
+        incident.event_count += 1
+        self._dirty_incidents.add(incident)
+
+    def fire(
+        self,
+        alert_type: str,
+        source: Optional[str],
+        severity: str,
+        epoch: float,
+        message: str,
+        value: float,
+        threshold: float,
+        details: Dict[str, Any] = None
+    ) -> _Group:
+        """
+        Record an alert event; nothing is written until the next flush.
+
+        Returns:
+            The alert the event was folded into, to pass to resolve() once
+            the condition clears
+        """
+        with self._lock:
+            group = self._groups.get(fingerprint(alert_type, source, severity))
+            if group is not None and (group.resolved_at is None
+                                      or epoch - group.resolved_at <= self.config["dedup_window"]):
+                group.count += 1
+                group.active += 1
+                group.last_seen = max(group.last_seen, epoch)
+                group.resolved_at = None
+                group.value = value
+                self._touch_incident(group, epoch)
+                self._dirty.add(group)
+                alert_events.labels("deduplicated").inc()
+                return group
+
+            group = _Group(alert_type, source, severity, epoch)
+            group.message = message
+            group.value = value
+            group.threshold = threshold
+            group.details = details or {}
+            self._groups[group.fingerprint] = group
+            self._join_incident(group, epoch)
+            self._dirty.add(group)
+            alert_events.labels("created").inc()
+            return group
+
+    def resolve(self, group: _Group, epoch: float):
+        """Record that one raiser of the alert has cleared"""
+        with self._lock:
+            group.active = max(group.active - 1, 0)
+            if group.active or group.resolved_at is not None:
+                return
+            group.resolved_at = max(epoch, group.last_seen)
+            self._dirty.add(group)
+            incident = group.incident
+            incident.open_alerts.discard(group)
+            if not incident.open_alerts:
+                incident.resolved_at = group.resolved_at
+                self._dirty_incidents.add(incident)
+
+    def resume(self, db, open_alerts: List[Tuple]) -> List[_Group]:
+        """
+        Rebuild the groups for alerts left open by a previous process.
+
+        Args:
+            db: Session to read the alerts' incidents with
+            open_alerts: (id, type, source, severity, created_at, metadata) rows
+
+        Returns:
+            The group for each row, in order
+        """
+        with self._lock:
+            incident_ids = {(extra_data or {}).get("incident_id") for *_, extra_data in open_alerts}
+            incidents = {}
+            if incident_ids - {None}:
+                rows = db.execute(
+                    select(Incident).where(Incident.id.in_(incident_ids - {None}), Incident.status == "open")
+                ).scalars().all()
+                for row in rows:
+                    incident = _Incident(row.key, row.title, row.severity, _to_epoch(row.opened_at))
+                    incident.id = row.id
+                    incident.last_seen = _to_epoch(row.last_seen_at)
+                    incident.alert_count = row.alert_count or 0
+                    incident.event_count = row.event_count or 0
+                    incidents[row.id] = incident
+                    self._incidents[row.key] = incident
+
+            groups = []
+            for alert_id, alert_type, source, severity, created_at, extra_data in open_alerts:
+                extra_data = extra_data or {}
+                group = _Group(alert_type, source, severity, _to_epoch(created_at))
+                group.alert_id = alert_id
+                group.details = {key: value for key, value in extra_data.items()
+                                 if key not in ("fingerprint", "count", "last_seen", "incident_id")}
+                group.count = extra_data.get("count", 1)
+                if extra_data.get("last_seen"):
+                    group.last_seen = _to_epoch(datetime.fromisoformat(extra_data["last_seen"]))
+                group.incident = incidents.get(extra_data.get("incident_id"))
+                if group.incident is None:
+                    self._join_incident(group, group.first_seen)
+                else:
+                    group.incident.open_alerts.add(group)
+                self._groups.setdefault(group.fingerprint, group)
+                groups.append(group)
+            return groups
+
+    def flush(self, force: bool = False):
+        """
+        Write new alerts now and, every flush_interval (or when forced),
+        the counts, resolutions and incidents changed since the last flush,
+        all in one transaction. Listeners are called after it commits.
+        """
+        with self._lock:
+            now = time.monotonic()
+            due = force or now - self._flushed_at >= self.config["flush_interval"]
+            groups = [group for group in self._dirty if due or group.alert_id is None]
+            events = []
+            if groups or (due and self._dirty_incidents):
+                events.extend(("created", group.as_dict()) for group in self._write(groups, due))
+            if due:
+                self._flushed_at = now
+                events.extend(("resolved", group.as_dict()) for group in self._expire())
+
+        for event, alert in events:
+            for callback in self._listeners:
+                try:
+                    callback(event, alert)
+                except Exception as e:
+                    logger.error(f"Alert listener failed for {event} alert {alert['id']}: {str(e)}")
+
+    def _write(self, groups: List[_Group], due: bool) -> List[_Group]:
+        """Write the given groups and their incidents; returns the groups whose alert was created"""
+        incidents = {group.incident for group in groups if group.incident.id is None}
+        if due:
+            incidents |= self._dirty_incidents
+        incident_ids = {}
+        alert_ids = {}
+        with WriterSessionLocal() as db:
+            for incident in incidents:
+                values = dict(
+                    key=incident.key,
+                    title=incident.title,
+                    severity=incident.severity,
+                    status="resolved" if incident.resolved_at is not None else "open",
+                    opened_at=_from_epoch(incident.opened_at),
+                    last_seen_at=_from_epoch(incident.last_seen),
+                    resolved_at=_from_epoch(incident.resolved_at) if incident.resolved_at is not None else None,
+                    alert_count=incident.alert_count,
+                    event_count=incident.event_count,
+                )
+                if incident.id is None:
+                    row = Incident(**values)
+                    db.add(row)
+                    db.flush()
+                    incident_ids[incident] = row.id
+                else:
+                    db.execute(update(Incident).where(Incident.id == incident.id).values(**values))
+
+            for group in groups:
+                resolved = group.resolved_at is not None
+                resolved_at = _from_epoch(group.resolved_at) if resolved else None
+                extra_data = dict(group.details, fingerprint=group.fingerprint, count=group.count,
+                                  last_seen=_iso(group.last_seen),
+                                  incident_id=group.incident.id or incident_ids.get(group.incident))
+                if group.alert_id is None:
+                    alert = Alert(
+                        type=group.type,
+                        severity=group.severity,
+                        message=group.message,
+                        source=group.source,
+                        value=round(group.value),
+                        threshold=round(group.threshold),
+                        created_at=_from_epoch(group.first_seen),
+                        resolved=resolved,
+                        resolved_at=resolved_at,
+                        extra_data=extra_data
+                    )
+                    db.add(alert)
+                    db.flush()
+                    alert_ids[group] = alert_id = alert.id
+                    actions = [("created", group.first_seen)]
+                    if resolved:
+                        actions.append(("resolved", group.resolved_at))
+                    alert_writes.labels("insert").inc()
+                else:
+                    alert_id = group.alert_id
+                    db.execute(update(Alert).where(Alert.id == alert_id).values(
+                        value=round(group.value), resolved=resolved, resolved_at=resolved_at, extra_data=extra_data
+                    ))
+                    actions = []
+                    if resolved != group.stored_resolved:
+                        actions.append(("resolved", group.resolved_at) if resolved else ("reopened", group.last_seen))
+                    alert_writes.labels("update").inc()
+                for action, epoch in actions:
+                    db.add(AlertHistory(alert_id=alert_id, action=action, performed_by="alert-engine",
+                                        performed_at=_from_epoch(epoch), extra_data={"count": group.count}))
+            db.commit()
+
+        # Ids are only kept once committed, so a failed write is redone in full
+        for incident, incident_id in incident_ids.items():
+            incident.id = incident_id
+        for group in groups:
+            group.alert_id = alert_ids.get(group, group.alert_id)
+            group.stored_resolved = group.resolved_at is not None
+        self._dirty.difference_update(groups)
+        if due:
+            self._dirty_incidents.clear()
+        return list(alert_ids)
+
+    def _expire(self) -> List[_Group]:
+        """Forget the alerts and incidents past their windows; returns the alerts dropped"""
+        now = time.time()
+        expired = [
+            group for group in self._groups.values()
+            if group.resolved_at is not None and group not in self._dirty
+            and now - group.resolved_at > self.config["dedup_window"]
+        ]
+        for group in expired:
+            del self._groups[group.fingerprint]
+        for key, incident in list(self._incidents.items()):
+            if (incident.resolved_at is not None and incident not in self._dirty_incidents
+                    and now - incident.last_seen > self.config["incident_window"]):
+                del self._incidents[key]
+        return expired
+
+# Create a singleton instance
+alert_grouper = AlertGrouper()
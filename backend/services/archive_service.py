@@ -0,0 +1,308 @@
+import glob
+import json
+import os
+import shutil
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import select, delete, func, DateTime, Float, Integer
+
+from ..database import ReadSessionLocal, WriterSessionLocal
+from ..models.network_monitoring import (
+    NetworkMonitoringHistory, InterfaceStatsHistory, NetFlowHistory, HistoryArchiveProgress
+)
+from config.storage import storage_settings
+
+logger = logging.getLogger(__name__)
+
+# Day partitions are stored as hive-style directories: <table>/day=YYYY-MM-DD/
+DAY_PARTITIONING = ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+
+# Column recording which archive batch wrote a row
+BATCH_COLUMN = "archive_batch"
+
+def _arrow_type(column) -> pa.DataType:
+    """Map a SQLAlchemy column to the Arrow type used in the archive"""
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    # Strings and JSON (serialized) are stored as UTF-8
+    return pa.string()
+
+class HistoryArchiver:
+    """
+    Moves history rows older than the hot window out of SQLite into
+    day-partitioned, compressed Parquet files, and reads them back for
+    history queries whose range extends past the hot tier.
+    """
+
+    MODELS = (NetworkMonitoringHistory, InterfaceStatsHistory, NetFlowHistory)
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the archiver.
+
+        Args:
+            config: Archive settings, defaults to ``storage_settings.ARCHIVE``
+        """
+        self.config = config or storage_settings.ARCHIVE
+        self.path = self.config["path"]
+        self.interval = self.config["interval"]
+        self.running = True
+
+    def hot_cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """Timestamp before which rows live in the archive rather than SQLite"""
+        return (now or datetime.utcnow()) - timedelta(days=self.config["hot_days"])
+
+    def covers(self, start_time: datetime) -> bool:
+        """Whether a query starting at ``start_time`` needs to read the archive"""
+        return self.config["enabled"] and start_time < self.hot_cutoff()
+
+    def run(self):
+        """
+        Archive loop that periodically moves old rows and prunes expired partitions.
+        """
+        logger.info("Starting history archiver")
+
+        while self.running:
+            try:
+                self.archive()
+                self.prune()
+            except Exception as e:
+                logger.error(f"Error during history archiving: {str(e)}")
+
+            time.sleep(self.interval)
+
+    def archive(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Move every history row older than the hot window into the archive.
+
+        Returns:
+            Number of rows archived per table
+        """
+        cutoff = self.hot_cutoff(now)
+        return {
+            model.__tablename__: self._archive_table(model, cutoff)
+            for model in self.MODELS
+        }
+
+    def committed_batch_query(self, model):
+        """
+        Scalar subquery for the last batch of ``model`` whose rows have left
+        SQLite. Selecting it alongside a hot-tier query reads both in one
+        snapshot, so passing it to ``query`` as ``max_batch`` keeps rows the
+        query saw in SQLite out of the archive results.
+        """
+        return func.coalesce(
+            select(HistoryArchiveProgress.batch)
+            .where(HistoryArchiveProgress.table_name == model.__tablename__)
+            .scalar_subquery(),
+            0
+        )
+
+    def committed_batch(self, model) -> int:
+        """Last batch of ``model`` whose rows have been deleted from SQLite"""
+        with ReadSessionLocal() as db:
+            return db.execute(select(self.committed_batch_query(model))).scalar_one()
+
+    def _archive_table(self, model, cutoff: datetime) -> int:
+        table = model.__table__
+        schema = pa.schema(
+            [(column.name, _arrow_type(column)) for column in table.columns] + [(BATCH_COLUMN, pa.int64())]
+        )
+        batch = self.committed_batch(model)
+        archived = 0
+        first_batch = True
+
+        while True:
+            with ReadSessionLocal() as db:
+                rows = db.execute(
+                    select(table)
+                    .where(table.c.timestamp < cutoff)
+                    .order_by(table.c.id)
+                    .limit(self.config["batch_size"])
+                ).mappings().all()
+            if not rows:
+                break
+
+            # A run that stopped between writing a batch and committing its
+            # delete left parts under the number this batch reuses; clear them
+            # so the rewrite replaces them
+            batch += 1
+            if first_batch:
+                self._remove_batch(table.name, batch)
+                first_batch = False
+            self._write_batch(table.name, schema, rows, batch)
+
+            # Readers take archive parts only up to the committed batch, so the
+            # rows appear in exactly one tier at any point
+            with WriterSessionLocal() as db:
+                db.execute(
+                    delete(table)
+                    .where(table.c.id <= rows[-1]["id"])
+                    .where(table.c.timestamp < cutoff)
+                )
+                db.merge(HistoryArchiveProgress(table_name=table.name, batch=batch))
+                db.commit()
+
+            archived += len(rows)
+
+        if archived:
+            logger.info(f"Archived {archived} rows from {table.name}")
+        return archived
+
+    def _write_batch(self, table_name: str, schema: pa.Schema, rows: List[Dict[str, Any]], batch: int):
+        partitions: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            partitions.setdefault(row["timestamp"].strftime("%Y-%m-%d"), []).append(row)
+
+        for day, day_rows in partitions.items():
+            columns = {}
+            for field in schema:
+                if field.name == BATCH_COLUMN:
+                    columns[field.name] = pa.array([batch] * len(day_rows), type=field.type)
+                    continue
+                values = [row[field.name] for row in day_rows]
+                if field.name == "metadata":
+                    values = [json.dumps(value) if value is not None else None for value in values]
+                columns[field.name] = pa.array(values, type=field.type)
+
+            directory = os.path.join(self.path, table_name, f"day={day}")
+            os.makedirs(directory, exist_ok=True)
+            filename = f"part-{batch}.parquet"
+            pq.write_table(
+                pa.table(columns, schema=schema),
+                os.path.join(directory, filename),
+                compression=self.config["compression"]
+            )
+
+    def _remove_batch(self, table_name: str, batch: int):
+        """Delete the parts an earlier attempt at ``batch`` wrote"""
+        for path in glob.glob(os.path.join(self.path, table_name, "day=*", f"part-{batch}.parquet")):
+            os.remove(path)
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete day partitions older than the retention period.
+
+        Returns:
+            Number of partitions removed
+        """
+        oldest = ((now or datetime.utcnow()) - timedelta(days=self.config["retention_days"])).strftime("%Y-%m-%d")
+        removed = 0
+        for model in self.MODELS:
+            table_path = os.path.join(self.path, model.__tablename__)
+            if not os.path.isdir(table_path):
+                continue
+            for partition in os.listdir(table_path):
+                if partition.startswith("day=") and partition[len("day="):] < oldest:
+                    shutil.rmtree(os.path.join(table_path, partition))
+                    removed += 1
+        return removed
+
+    def query(
+        self,
+        model,
+        start_time: datetime,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[List[str]] = None,
+        max_batch: Optional[int] = None
+    ) -> Optional[pa.Table]:
+        """
+        Read archived rows of ``model`` newer than ``start_time``.
+
+        Partitions outside the range are skipped, ``filters`` (column equality)
+        and the time bound are pushed down to the Parquet row groups, only the
+        requested ``columns`` are decoded, and files are memory-mapped.
+
+        Args:
+            max_batch: Newest batch to read, normally the committed batch read
+                with the caller's hot-tier query; defaults to the batch
+                committed now
+
+        Returns:
+            Matching rows as an Arrow table, or None if nothing is archived
+        """
+        table_path = os.path.join(self.path, model.__tablename__)
+        if not os.path.isdir(table_path):
+            return None
+
+        predicates = [
+            ("day", ">=", start_time.strftime("%Y-%m-%d")),
+            ("timestamp", ">=", start_time),
+            (BATCH_COLUMN, "<=", self.committed_batch(model) if max_batch is None else max_batch),
+        ]
+        for name, value in (filters or {}).items():
+            if value is not None:
+                predicates.append((name, "=", value))
+
+        dataset = pq.ParquetDataset(
+            table_path,
+            filters=predicates,
+            memory_map=True,
+            partitioning=DAY_PARTITIONING
+        )
+        return dataset.read(columns=columns)
+
+    def query_rows(
+        self,
+        model,
+        start_time: datetime,
+        filters: Optional[Dict[str, Any]] = None,
+        max_batch: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Read archived rows as dictionaries, newest first, in the same shape
+        as the history response schemas.
+        """
+        columns = [column.name for column in model.__table__.columns]
+        table = self.query(model, start_time, filters, columns, max_batch)
+        if table is None or table.num_rows == 0:
+            return []
+
+        table = table.sort_by([("timestamp", "descending")])
+        rows = table.to_pylist()
+        for row in rows:
+            if row.get("metadata") is not None:
+                row["metadata"] = json.loads(row["metadata"])
+        return rows
+
+    def aggregate(
+        self,
+        model,
+        start_time: datetime,
+        group_by: str,
+        aggregations: List[tuple],
+        filters: Optional[Dict[str, Any]] = None,
+        max_batch: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Group archived rows by ``group_by`` and apply Arrow aggregations such as
+        ``("value", "sum")``. Only the grouped and aggregated columns are read.
+
+        Returns:
+            One dictionary per group, keyed ``<column>_<function>``
+        """
+        columns = list(dict.fromkeys([group_by] + [column for column, _ in aggregations]))
+        table = self.query(model, start_time, filters, columns, max_batch)
+        if table is None or table.num_rows == 0:
+            return []
+        return table.group_by(group_by).aggregate(aggregations).to_pylist()
+
+    def stop(self):
+        """
+        Stop the archiver.
+        """
+        logger.info("Stopping history archiver")
+        self.running = False
+
+# Create a singleton instance
+history_archiver = HistoryArchiver()
@@ -1,76 +1,271 @@
 import smtplib
+import queue
+import random
+import threading
+import time
+import logging
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from services.metrics import registry
+from config.alerting import alerting_settings
+
+logger = logging.getLogger(__name__)
+
+email_messages = registry.counter(
+    "fms_email_messages_total", "Emails by outcome: sent, failed after retries, rejected or dropped", ["result"]
+)
+smtp_connections = registry.counter("fms_smtp_connections_total", "SMTP connections opened, by outcome", ["result"])
+email_delivery_seconds = registry.histogram(
+    "fms_email_delivery_seconds", "Time from queueing an email to the server accepting it"
+)
+
+# Seconds an idle worker waits before checking for a stop request
+STOP_POLL_INTERVAL = 0.5
+
+class _Delivery:
+    __slots__ = ("message", "queued_at", "attempts")
+
+    def __init__(self, message: Message):
+        self.message = message
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+
+class _Digest:
+    """Alerts waiting to go to one recipient in a single email"""
+    __slots__ = ("alerts", "due_at")
 
-class EmailService:
     def __init__(self):
+        self.alerts: List[Dict[str, Any]] = []
+        self.due_at = float("inf")
+
+def _permanent(error: Exception) -> bool:
+    """Whether the server rejected the message itself, so retrying cannot help"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError)):
+        return error.smtp_code >= 500
+    return False
+
+class EmailService:
+    """
+    Sends alert emails from a background queue.
+
+    send_alert_email only builds the message and queues it. A fixed number
+    of worker threads each keep one SMTP connection open, logged in once
+    and reused for every message they send until it goes idle or reaches
+    messages_per_connection, so a burst of alerts goes out over
+    ``connections`` sessions. A failed send drops the connection and is
+    retried on a fresh one with exponential backoff, up to max_attempts.
+
+    Notifications sent with send_alert_digest are held per recipient for
+    the shortest window among their alerts (``critical_window`` for
+    critical ones) and then go out as one email.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, digest_config: Dict[str, Any] = None):
         self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
         self.smtp_port = int(os.getenv('SMTP_PORT', 587))
         self.sender_email = os.getenv('SMTP_USERNAME')
         self.sender_password = os.getenv('SMTP_PASSWORD')
         self.admin_email = os.getenv('ADMIN_EMAIL')
+        self.config = config or alerting_settings.EMAIL_DELIVERY
+        self._queue: "queue.Queue[_Delivery]" = queue.Queue(self.config["queue_size"])
+        # Set by stop(); workers then send what is queued and exit
+        self._stop_event = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._workers_lock = threading.Lock()
+        self.digest_config = digest_config or alerting_settings.ALERT_DIGEST
+        self._digests: Dict[str, _Digest] = {}
+        self._digest_cond = threading.Condition()
+        self._digest_thread: Optional[threading.Thread] = None
+        self._stopping = False
+        registry.register_collector(self._collect)
+
+    def _collect(self):
+        return [{
+            "name": "fms_email_queue_depth",
+            "kind": "gauge",
+            "documentation": "Emails waiting for an SMTP connection",
+            "samples": [({}, float(self._queue.qsize()))]
+        }, {
+            "name": "fms_email_digest_pending_alerts",
+            "kind": "gauge",
+            "documentation": "Alerts held for a notification digest",
+            "samples": [({}, float(sum(len(digest.alerts) for digest in list(self._digests.values()))))]
+        }]
+
+    def _start_workers(self):
+        with self._workers_lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            for _ in range(self.config["connections"] - len(self._workers)):
+                worker = threading.Thread(target=self._run_worker, daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout: float = 10.0):
+        """Send the pending digests and what is already queued, then close the connections"""
+        with self._digest_cond:
+            self._stopping = True
+            self._digest_cond.notify()
+        if self._digest_thread is not None:
+            self._digest_thread.join(timeout)
+        with self._workers_lock:
+            workers = self._workers
+            self._workers = []
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+    def _build_message(self, recipient: str, alerts: List[Dict[str, Any]]) -> Message:
+        # Create message container
+        msg = MIMEMultipart('alternative')
+        count = f' ({len(alerts)})' if len(alerts) > 1 else ''
+        msg['Subject'] = f'Network Monitoring Alerts{count} - {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+        msg['From'] = self.sender_email
+        msg['To'] = recipient
+
+        # Create HTML content
+        html = f"""
+        <html>
+            <head>
+                <style>
+                    body {{ font-family: Arial, sans-serif; }}
+                    .alert {{ 
+                        margin: 10px 0;
+                        padding: 10px;
+                        border-left: 4px solid;
+                        border-radius: 4px;
+                    }}
+                    .critical {{ border-color: #d32f2f; background-color: #ffebee; }}
+                    .warning {{ border-color: #ed6c02; background-color: #fff3e0; }}
+                    .info {{ border-color: #0288d1; background-color: #e3f2fd; }}
+                    .timestamp {{ color: #666; font-size: 0.8em; }}
+                </style>
+            </head>
+            <body>
+                <h2>Network Monitoring Alerts</h2>
+                <p>Generated at: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
+                {self._generate_alert_html(alerts)}
+            </body>
+        </html>
+        """
+
+        # Attach HTML content
+        msg.attach(MIMEText(html, 'html'))
+        return msg
 
     def send_alert_email(self, recipient: str, alerts: List[Dict[str, Any]]) -> bool:
         """
-        Send an email with alert information to the specified recipient.
+        Queue an email with alert information for the specified recipient.
         
         Args:
             recipient: Email address of the recipient
             alerts: List of alert dictionaries containing alert information
             
         Returns:
-            bool: True if email was sent successfully, False otherwise
+            bool: True if the email was queued, False if the queue is full
         """
         try:
-            # Create message container
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = f'Network Monitoring Alerts - {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
-            msg['From'] = self.sender_email
-            msg['To'] = recipient
-
-            # Create HTML content
-            html = f"""
-            <html>
-                <head>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; }}
-                        .alert {{ 
-                            margin: 10px 0;
-                            padding: 10px;
-                            border-left: 4px solid;
-                            border-radius: 4px;
-                        }}
-                        .critical {{ border-color: #d32f2f; background-color: #ffebee; }}
-                        .warning {{ border-color: #ed6c02; background-color: #fff3e0; }}
-                        .info {{ border-color: #0288d1; background-color: #e3f2fd; }}
-                        .timestamp {{ color: #666; font-size: 0.8em; }}
-                    </style>
-                </head>
-                <body>
-                    <h2>Network Monitoring Alerts</h2>
-                    <p>Generated at: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
-                    {self._generate_alert_html(alerts)}
-                </body>
-            </html>
-            """
-
-            # Attach HTML content
-            msg.attach(MIMEText(html, 'html'))
-
-            # Create SMTP connection
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(msg)
-
-            return True
-
+            message = self._build_message(recipient, alerts)
         except Exception as e:
-            print(f"Error sending email: {str(e)}")
+            logger.error(f"Error building email for {recipient}: {str(e)}")
+            return False
+        return self.enqueue(message)
+
+    def enqueue(self, message: Message) -> bool:
+        """Queue a built message for delivery; False if the queue is full"""
+        self._start_workers()
+        try:
+            self._queue.put_nowait(_Delivery(message))
+        except queue.Full:
+            email_messages.labels("dropped").inc()
+            logger.error(f"Email queue full, dropping email to {message['To']}")
             return False
+        return True
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.config["timeout"])
+        try:
+            server.starttls()
+            server.login(self.sender_email, self.sender_password)
+        except Exception:
+            smtp_connections.labels("failed").inc()
+            server.close()
+            raise
+        smtp_connections.labels("opened").inc()
+        return server
+
+    @staticmethod
+    def _disconnect(server: Optional[smtplib.SMTP]):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _run_worker(self):
+        server = None
+        sent = 0
+        last_used = time.monotonic()
+        while True:
+            stopping = self._stop_event.is_set()
+            try:
+                # Wake up regularly so a stop request is noticed even when idle
+                delivery = self._queue.get(timeout=STOP_POLL_INTERVAL) if not stopping else self._queue.get_nowait()
+            except queue.Empty:
+                if stopping:
+                    self._disconnect(server)
+                    return
+                if server is not None and time.monotonic() - last_used >= self.config["idle_timeout"]:
+                    self._disconnect(server)
+                    server = None
+                continue
+
+            while True:
+                delivery.attempts += 1
+                reused = server is not None
+                try:
+                    if server is None:
+                        server = self._connect()
+                        sent = 0
+                    server.send_message(delivery.message)
+                except Exception as e:
+                    if _permanent(e):
+                        email_messages.labels("rejected").inc()
+                        logger.error(f"Email to {delivery.message['To']} rejected: {str(e)}")
+                        break
+                    self._disconnect(server)
+                    server = None
+                    if reused and isinstance(e, smtplib.SMTPServerDisconnected):
+                        # The server closed the kept-alive connection; retry on a new one at once
+                        delivery.attempts -= 1
+                        continue
+                    if delivery.attempts >= self.config["max_attempts"]:
+                        email_messages.labels("failed").inc()
+                        logger.error(f"Giving up on email to {delivery.message['To']} after "
+                                     f"{delivery.attempts} attempts: {str(e)}")
+                        break
+                    backoff = min(self.config["backoff_initial"] * 2 ** (delivery.attempts - 1),
+                                  self.config["backoff_max"])
+                    logger.warning(f"Error sending email to {delivery.message['To']}, retrying in "
+                                   f"{backoff:.1f}s: {str(e)}")
+                    time.sleep(backoff * random.uniform(0.5, 1.0))
+                    continue
+                email_messages.labels("sent").inc()
+                email_delivery_seconds.observe(time.monotonic() - delivery.queued_at)
+                last_used = time.monotonic()
+                sent += 1
+                if sent >= self.config["messages_per_connection"]:
+                    self._disconnect(server)
+                    server = None
+                break
 
     def _generate_alert_html(self, alerts: List[Dict[str, Any]]) -> str:
         """Generate HTML content for alerts."""
@@ -85,21 +280,78 @@ class EmailService:
             """)
         return "\n".join(alert_html)
 
+    def send_alert_digest(self, recipient: str, alerts: List[Dict[str, Any]]) -> bool:
+        """
+        Add alerts to the recipient's next digest email.
+
+        The digest is sent once the window of its most urgent alert has
+        passed, straight away when a critical alert joins it and
+        critical_immediate is set, or when it holds max_alerts.
+
+        Args:
+            recipient: Email address of the recipient
+            alerts: List of alert dictionaries containing alert information
+
+        Returns:
+            bool: True if the alerts were accepted
+        """
+        if not self.digest_config["enabled"]:
+            return self.send_alert_email(recipient, alerts)
+        now = time.monotonic()
+        with self._digest_cond:
+            if self._stopping:
+                return False
+            digest = self._digests.setdefault(recipient, _Digest())
+            digest.alerts.extend(alerts)
+            for alert in alerts:
+                critical = alert.get("severity") == "critical"
+                if critical and self.digest_config["critical_immediate"]:
+                    digest.due_at = now
+                window = self.digest_config["critical_window"] if critical else self.digest_config["window"]
+                digest.due_at = min(digest.due_at, now + window)
+            if len(digest.alerts) >= self.digest_config["max_alerts"]:
+                digest.due_at = now
+            if self._digest_thread is None or not self._digest_thread.is_alive():
+                self._digest_thread = threading.Thread(target=self._run_digests, daemon=True)
+                self._digest_thread.start()
+            self._digest_cond.notify()
+        return True
+
+    def _run_digests(self):
+        while True:
+            with self._digest_cond:
+                now = time.monotonic()
+                due = [recipient for recipient, digest in self._digests.items()
+                       if self._stopping or digest.due_at <= now]
+                batches = [(recipient, self._digests.pop(recipient).alerts) for recipient in due]
+                if not batches:
+                    if self._stopping:
+                        return
+                    next_due = min((digest.due_at for digest in self._digests.values()), default=None)
+                    self._digest_cond.wait(None if next_due is None else next_due - now)
+                    continue
+            size = self.digest_config["max_alerts"]
+            for recipient, alerts in batches:
+                for start in range(0, len(alerts), size):
+                    chunk = alerts[start:start + size]
+                    if not self.send_alert_email(recipient, chunk):
+                        logger.error(f"Dropped a digest of {len(chunk)} alerts for {recipient}")
+
     def send_admin_notification(self, alert: Dict[str, Any]) -> bool:
         """
-        Send a notification to the admin about a specific alert.
+        Notify the admin about a specific alert, in the admin's next digest.
         
         Args:
             alert: Alert dictionary containing alert information
             
         Returns:
-            bool: True if email was sent successfully, False otherwise
+            bool: True if the alert was accepted, False otherwise
         """
         if not self.admin_email:
-            print("Admin email not configured")
+            logger.warning("Admin email not configured")
             return False
 
-        return self.send_alert_email(self.admin_email, [alert])
+        return self.send_alert_digest(self.admin_email, [alert])
 
 # Create a singleton instance
 email_service = EmailService() 
\ No newline at end of file
@@ -0,0 +1,148 @@
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any, List
+
+from sqlalchemy import insert
+
+from ..database import WriterSessionLocal
+from ..models.network_monitoring import NetworkMonitoringHistory, NetFlowHistory
+from .metrics_buffer import metrics_buffer
+from .alert_engine import alert_engine
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+ingested_rows = registry.counter("fms_ingest_rows_total", "Rows written by the ingestion path", ["kind"])
+commit_seconds = registry.histogram("fms_ingest_commit_seconds", "Ingest batch write and commit latency", ["kind"])
+
+class IngestService:
+    """
+    Single entry point for writing monitoring data. Batches go through the
+    dedicated writer connection and are mirrored into the in-memory buffers.
+    """
+
+    def __init__(self, buffer=None, alerts=None):
+        self.metrics_buffer = buffer or metrics_buffer
+        self.alert_engine = alerts or alert_engine
+        # Batches waiting for or holding the writer connection
+        self.inflight = 0
+        self._inflight_lock = threading.Lock()
+        registry.register_collector(self._collect)
+
+    def _collect(self):
+        return [{
+            "name": "fms_ingest_inflight_batches",
+            "kind": "gauge",
+            "documentation": "Ingest batches waiting for or holding the writer connection",
+            "samples": [({}, float(self.inflight))]
+        }]
+
+    def _write(self, kind: str, statement, rows: List[Dict[str, Any]], returning: bool = False):
+        """
+        Execute ``statement`` for ``rows`` on the writer connection and commit.
+
+        Returns:
+            The values the statement returns if ``returning``, else None
+        """
+        with self._inflight_lock:
+            self.inflight += 1
+        started = time.perf_counter()
+        try:
+            with WriterSessionLocal() as db:
+                result = db.execute(statement, rows)
+                ids = result.scalars().all() if returning else None
+                db.commit()
+        finally:
+            commit_seconds.labels(kind).observe(time.perf_counter() - started)
+            with self._inflight_lock:
+                self.inflight -= 1
+        ingested_rows.labels(kind).inc(len(rows))
+        return ids
+
+    def ingest_metrics(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Store a batch of metric datapoints.
+
+        Args:
+            records: Dictionaries with source, metric_type, value and optional
+                unit, metadata and timestamp (naive UTC, defaults to now)
+
+        Returns:
+            Number of datapoints stored
+        """
+        if not records:
+            return 0
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "timestamp": record.get("timestamp") or now,
+                "source": record["source"],
+                "metric_type": record["metric_type"],
+                "value": record["value"],
+                "unit": record.get("unit"),
+                "extra_data": record.get("metadata")
+            }
+            for record in records
+        ]
+
+        ids = self._write(
+            "metrics",
+            insert(NetworkMonitoringHistory).returning(NetworkMonitoringHistory.id, sort_by_parameter_order=True),
+            rows,
+            returning=True
+        )
+
+        for point_id, row in zip(ids, rows):
+            self.metrics_buffer.append(
+                point_id, row["source"], row["metric_type"], row["timestamp"], row["value"], row["unit"]
+            )
+
+        # Alerting must never lose a batch that is already stored
+        try:
+            self.alert_engine.evaluate(rows)
+        except Exception as e:
+            logger.error(f"Error evaluating alert rules: {str(e)}")
+
+        logger.debug(f"Ingested {len(rows)} metric datapoints")
+        return len(rows)
+
+    def ingest_flows(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Store a batch of flow records.
+
+        Args:
+            records: Dictionaries with NetFlowHistory fields and an optional
+                timestamp (naive UTC, defaults to now)
+
+        Returns:
+            Number of flows stored
+        """
+        if not records:
+            return 0
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "timestamp": record.get("timestamp") or now,
+                "source_ip": record.get("source_ip"),
+                "destination_ip": record.get("destination_ip"),
+                "protocol": record.get("protocol"),
+                "port": record.get("port"),
+                "bytes": record.get("bytes"),
+                "packets": record.get("packets"),
+                "duration": record.get("duration"),
+                "extra_data": record.get("metadata")
+            }
+            for record in records
+        ]
+
+        self._write("flows", insert(NetFlowHistory), rows)
+
+        logger.debug(f"Ingested {len(rows)} flow records")
+        return len(rows)
+
+# Create a singleton instance
+ingest_service = IngestService()
@@ -0,0 +1,172 @@
+import threading
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.storage import storage_settings
+from services.metrics import registry
+
+buffer_lookups = registry.counter(
+    "fms_metrics_buffer_lookups_total", "History queries served from (hit) or past (miss) the metrics buffer", ["result"]
+)
+
+def _to_epoch(timestamp: datetime) -> float:
+    # History timestamps are naive UTC
+    return timestamp.replace(tzinfo=timezone.utc).timestamp()
+
+def _from_epoch(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None)
+
+class MetricRingBuffer:
+    """
+    Fixed-size circular buffer of (id, timestamp, value) points for one series.
+    Memory is allocated once: three arrays of ``capacity`` 8-byte slots.
+    """
+
+    __slots__ = ("capacity", "ids", "timestamps", "values", "head", "size", "unit")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ids = array("q", bytes(8 * capacity))
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.head = 0
+        self.size = 0
+        self.unit = None
+
+    def append(self, point_id: int, epoch: float, value: float):
+        self.ids[self.head] = point_id
+        self.timestamps[self.head] = epoch
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def holds_since(self, start: float) -> bool:
+        """False once the buffer has wrapped past points newer than ``start``"""
+        # When full, head points at the oldest slot
+        return self.size < self.capacity or self.timestamps[self.head] <= start
+
+    def points_since(self, start: float) -> List[Tuple[int, float, float]]:
+        """Points at or after ``start``, newest first"""
+        points = []
+        index = self.head
+        for _ in range(self.size):
+            index = (index - 1) % self.capacity
+            if self.timestamps[index] >= start:
+                points.append((self.ids[index], self.timestamps[index], self.values[index]))
+        points.sort(key=lambda point: point[1], reverse=True)
+        return points
+
+class MetricsBuffer:
+    """
+    Per-series ring buffers holding the most recent metrics window, filled by
+    ingestion and read by the history endpoints for recent time ranges.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the buffer.
+
+        Args:
+            config: Buffer settings, defaults to ``storage_settings.METRICS_BUFFER``
+        """
+        self.config = config or storage_settings.METRICS_BUFFER
+        self.capacity = self.config["capacity"]
+        self.window = timedelta(minutes=self.config["window_minutes"])
+        self.series: Dict[Tuple[str, str], MetricRingBuffer] = {}
+        # Set on first ingest; the buffer is only complete for windows after it
+        self.filling_since: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def append(self, point_id: int, source: str, metric_type: str, timestamp: datetime, value: float, unit: Optional[str] = None):
+        if not self.config["enabled"]:
+            return
+        with self._lock:
+            if self.filling_since is None:
+                self.filling_since = datetime.utcnow()
+            series = self.series.get((source, metric_type))
+            if series is None:
+                series = self.series[(source, metric_type)] = MetricRingBuffer(self.capacity)
+            series.append(point_id, _to_epoch(timestamp), value)
+            series.unit = unit
+
+    def covers(self, start_time: datetime, source: Optional[str] = None, metric_type: Optional[str] = None) -> bool:
+        """Whether every matching point newer than ``start_time`` is held in memory"""
+        if not self.config["enabled"] or self.filling_since is None:
+            return False
+        if start_time < self.filling_since or start_time < datetime.utcnow() - self.window:
+            buffer_lookups.labels("miss").inc()
+            return False
+        start = _to_epoch(start_time)
+        with self._lock:
+            matching = self._matching(source, metric_type)
+            # A series this process never ingested may still be in the database
+            hit = bool(matching) and all(series.holds_since(start) for _, series in matching)
+        buffer_lookups.labels("hit" if hit else "miss").inc()
+        return hit
+
+    def _matching(self, source: Optional[str], metric_type: Optional[str]):
+        if source and metric_type:
+            series = self.series.get((source, metric_type))
+            return [((source, metric_type), series)] if series else []
+        return [
+            (key, series) for key, series in self.series.items()
+            if (not source or key[0] == source) and (not metric_type or key[1] == metric_type)
+        ]
+
+    def _collect(self, start_time: datetime, source: Optional[str], metric_type: Optional[str]):
+        """Copy matching series' points newer than ``start_time`` out of the buffers"""
+        start = _to_epoch(start_time)
+        with self._lock:
+            return [
+                (key, series.unit, series.points_since(start))
+                for key, series in self._matching(source, metric_type)
+            ]
+
+    def history(self, start_time: datetime, source: Optional[str] = None, metric_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Buffered points newer than ``start_time`` in the history response shape,
+        newest first. Point metadata is not kept in memory and is returned as None.
+        """
+        rows = []
+        for (series_source, series_metric), unit, points in self._collect(start_time, source, metric_type):
+            for point_id, epoch, value in points:
+                rows.append({
+                    "id": point_id,
+                    "timestamp": _from_epoch(epoch),
+                    "source": series_source,
+                    "metric_type": series_metric,
+                    "value": value,
+                    "unit": unit,
+                    "metadata": None
+                })
+        rows.sort(key=lambda row: row["timestamp"], reverse=True)
+        return rows
+
+    def summary(self, start_time: datetime, source: Optional[str] = None, metric_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Average, maximum, minimum and count per metric type since ``start_time``"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for (_, series_metric), _, points in self._collect(start_time, source, metric_type):
+            values = [value for _, _, value in points]
+            if not values:
+                continue
+            total = totals.setdefault(series_metric, {"sum": 0.0, "maximum": values[0], "minimum": values[0], "count": 0})
+            total["sum"] += sum(values)
+            total["maximum"] = max(total["maximum"], max(values))
+            total["minimum"] = min(total["minimum"], min(values))
+            total["count"] += len(values)
+
+        return [
+            {
+                "metric_type": metric,
+                "average": total["sum"] / total["count"],
+                "maximum": total["maximum"],
+                "minimum": total["minimum"],
+                "count": total["count"]
+            }
+            for metric, total in totals.items()
+        ]
+
+# Create a singleton instance
+metrics_buffer = MetricsBuffer()
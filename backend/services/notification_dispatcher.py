@@ -0,0 +1,414 @@
+import ipaddress
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import closing
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics import registry
+from services.shared_rate_limit import SharedTokenBuckets
+from config.alerting import alerting_settings
+
+logger = logging.getLogger(__name__)
+
+notifications = registry.counter(
+    "fms_notifications_total", "Notifications by channel and outcome: queued, sent, retried or failed",
+    ["channel", "result"]
+)
+notification_request_seconds = registry.histogram(
+    "fms_notification_request_seconds", "Notification delivery request time", ["channel"]
+)
+
+# Same palette as the alert emails
+SEVERITY_COLORS = {"critical": "#d32f2f", "warning": "#ed6c02", "info": "#0288d1"}
+SEVERITY_RANK = {"info": 0, "warning": 1, "critical": 2}
+PAGERDUTY_SEVERITIES = {"critical", "error", "warning", "info"}
+WEBHOOK_METHODS = {"POST", "PUT"}
+
+class InvalidNotification(ValueError):
+    """Raised for a notification whose channel or destination is unusable"""
+
+def check_destination(url: str, allowed_hosts: List[str]):
+    """
+    Refuse URLs the server should not call on a user's behalf.
+
+    Raises:
+        InvalidNotification: Not http(s), unresolvable, or resolving to a
+            loopback, private, link-local or otherwise non-public address,
+            unless the host is in ``allowed_hosts``
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise InvalidNotification("Notification destination must be an http(s) URL")
+    host = parsed.hostname.lower()
+    if host in allowed_hosts:
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise InvalidNotification(f"Cannot resolve notification destination {host}")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise InvalidNotification(f"Notification destination {host} is not a public address")
+
+def _title(alert: Dict[str, Any]) -> str:
+    return f"{str(alert.get('type', 'alert')).upper()} Alert - {str(alert.get('severity', 'info')).upper()}"
+
+def _device_name(item: Dict[str, Any]) -> Optional[str]:
+    device = item.get("device") if isinstance(item.get("device"), dict) else {}
+    return device.get("name") or device.get("hostname") or device.get("ip") or item["alert"].get("source")
+
+def _summary(items: List[Dict[str, Any]]) -> str:
+    return _title(items[0]["alert"]) if len(items) == 1 else f"{len(items)} network monitoring alerts"
+
+def _worst(items: List[Dict[str, Any]]) -> str:
+    return max((item["alert"].get("severity", "info") for item in items),
+               key=lambda severity: SEVERITY_RANK.get(severity, 0))
+
+def _slack_request(items: List[Dict[str, Any]], settings: Dict[str, Any]):
+    config = items[0]["config"]
+    body = {
+        "text": _summary(items),
+        "attachments": [{
+            "color": SEVERITY_COLORS.get(item["alert"].get("severity"), SEVERITY_COLORS["info"]),
+            "title": _title(item["alert"]),
+            "text": item["alert"].get("message", ""),
+            "footer": " | ".join(filter(None, [_device_name(item), item["alert"].get("timestamp")])),
+        } for item in items],
+    }
+    if config.get("channel"):
+        body["channel"] = config["channel"]
+    if config.get("username"):
+        body["username"] = config["username"]
+    return "POST", config["webhook"], {}, body
+
+def _teams_request(items: List[Dict[str, Any]], settings: Dict[str, Any]):
+    config = items[0]["config"]
+    body = {
+        "@type": "MessageCard",
+        "@context": "https://schema.org/extensions",
+        "themeColor": SEVERITY_COLORS.get(_worst(items), SEVERITY_COLORS["info"]).lstrip("#"),
+        "summary": _summary(items),
+        "title": _summary(items),
+        "sections": [{
+            "activityTitle": _title(item["alert"]),
+            "activitySubtitle": " | ".join(filter(None, [_device_name(item), item["alert"].get("timestamp")])),
+            "text": item["alert"].get("message", ""),
+        } for item in items],
+    }
+    return "POST", config["webhook"], {}, body
+
+def _webhook_request(items: List[Dict[str, Any]], settings: Dict[str, Any]):
+    item = items[0]
+    config = item["config"]
+    body = dict(config.get("body") or {})
+    body.update(alert=item["alert"], device=item.get("device"), group=item.get("group"))
+    method = (config.get("method") or "POST").upper()
+    if method not in WEBHOOK_METHODS:
+        raise InvalidNotification(f"Webhook method must be one of {', '.join(sorted(WEBHOOK_METHODS))}")
+    return method, config["url"], dict(config.get("headers") or {}), body
+
+def _pagerduty_request(items: List[Dict[str, Any]], settings: Dict[str, Any]):
+    item = items[0]
+    alert = item["alert"]
+    severity = alert.get("severity") if alert.get("severity") in PAGERDUTY_SEVERITIES else "warning"
+    body = {
+        "routing_key": item["config"]["apiKey"],
+        "event_action": "trigger",
+        # Repeats of an alert update the same PagerDuty incident
+        "dedup_key": f"{alert.get('type')}:{_device_name(item) or ''}:{alert.get('severity')}",
+        "payload": {
+            "summary": alert.get("message") or _title(alert),
+            "source": _device_name(item) or "firewall-management-system",
+            "severity": severity,
+            "custom_details": {"alert": alert, "group": item.get("group"),
+                               "service_id": item["config"].get("serviceId")},
+        },
+    }
+    return "POST", settings["pagerduty_url"], {}, body
+
+# Channel: (config field naming the destination, request builder, other
+# config fields the builder applies to the whole batch)
+CHANNELS = {
+    "slack": ("webhook", _slack_request, ("channel", "username")),
+    "teams": ("webhook", _teams_request, ()),
+    "webhook": ("url", _webhook_request, ()),
+    "pagerduty": ("apiKey", _pagerduty_request, ()),
+}
+
+def batch_key(channel: str, config: Dict[str, Any]) -> str:
+    """Notifications with the same key can share one request"""
+    target_field, _, batch_fields = CHANNELS[channel]
+    return json.dumps([config.get(field) for field in (target_field, *batch_fields)])
+
+class NotificationDispatcher:
+    """
+    Delivers Slack, Teams, webhook and PagerDuty notifications in the
+    background.
+
+    enqueue writes the notification to a local SQLite outbox and returns;
+    nothing is lost if the process stops before it is delivered. Each
+    channel has its own fixed set of workers, which claim due notifications
+    for one destination at a time (several at once for channels that can
+    carry a batch in one request) and send them over a shared, pooled HTTP
+    session, within a token bucket per destination shared by every process
+    on the host. Failures are retried with full-jitter exponential backoff,
+    honouring Retry-After, until max_attempts; a claim left by a crashed
+    worker expires after claim_seconds.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or alerting_settings.NOTIFICATIONS
+        self._session: Optional[requests.Session] = None
+        self._buckets: Optional[SharedTokenBuckets] = None
+        self._workers: List[threading.Thread] = []
+        self._wakeups = {channel: threading.Event() for channel in CHANNELS}
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._outbox_ready = False
+        registry.register_collector(self._collect)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.config["outbox_path"], timeout=30, isolation_level=None)
+
+    def _init_outbox(self):
+        os.makedirs(os.path.dirname(self.config["outbox_path"]) or ".", exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS notification_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    batch_key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    claimed_until REAL NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_error TEXT
+                )
+            """)
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_notification_outbox_due "
+                "ON notification_outbox (channel, status, next_attempt_at)"
+            )
+        self._outbox_ready = True
+
+    def _collect(self):
+        if not self._outbox_ready:
+            return []
+        with closing(self._connect()) as db:
+            counts = db.execute(
+                "SELECT channel, status, COUNT(*) FROM notification_outbox GROUP BY channel, status"
+            ).fetchall()
+        return [{
+            "name": "fms_notification_outbox",
+            "kind": "gauge",
+            "documentation": "Notifications in the outbox by channel and status (pending or failed)",
+            "samples": [({"channel": channel, "status": status}, float(count)) for channel, status, count in counts]
+        }]
+
+    def start(self):
+        """Start the delivery workers, picking up what the outbox already holds"""
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            if self._workers:
+                return
+            if not self._outbox_ready:
+                self._init_outbox()
+            if self._session is None:
+                session = requests.Session()
+                pool_size = sum(channel["concurrency"] for channel in self.config["channels"].values())
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            if self._buckets is None:
+                self._buckets = SharedTokenBuckets(self.config["rate_limit_path"], slots=4096, shards=16)
+            self._stopping.clear()
+            for channel, settings in self.config["channels"].items():
+                for _ in range(settings["concurrency"]):
+                    worker = threading.Thread(target=self._run_worker, args=(channel,), daemon=True)
+                    worker.start()
+                    self._workers.append(worker)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the workers; undelivered notifications stay in the outbox"""
+        self._stopping.set()
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            workers = self._workers
+            self._workers = []
+        for worker in workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+    def enqueue(self, channel: str, data: Dict[str, Any]) -> int:
+        """
+        Add a notification to the outbox.
+
+        Args:
+            channel: slack, teams, webhook or pagerduty
+            data: The alert, and optionally the device and group, with the
+                channel's config (webhook URL, URL or PagerDuty key)
+
+        Returns:
+            The notification's outbox id
+
+        Raises:
+            InvalidNotification: Unknown channel, missing alert or unusable
+                destination
+        """
+        if channel not in CHANNELS:
+            raise InvalidNotification(f"Unknown notification channel {channel}")
+        target_field, _, _ = CHANNELS[channel]
+        config = data.get("config") or {}
+        target = config.get(target_field)
+        if not isinstance(data.get("alert"), dict):
+            raise InvalidNotification("Notification has no alert")
+        if not target or not isinstance(target, str):
+            raise InvalidNotification(f"{channel} notification config has no {target_field}")
+        if target_field != "apiKey":
+            check_destination(target, self.config["allowed_hosts"])
+        if channel == "webhook" and (config.get("method") or "POST").upper() not in WEBHOOK_METHODS:
+            raise InvalidNotification(f"Webhook method must be one of {', '.join(sorted(WEBHOOK_METHODS))}")
+
+        self.start()
+        payload = json.dumps({"alert": data["alert"], "device": data.get("device"),
+                              "group": data.get("group"), "config": config})
+        now = time.time()
+        with closing(self._connect()) as db:
+            cursor = db.execute(
+                "INSERT INTO notification_outbox "
+                "(channel, target, batch_key, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (channel, target, batch_key(channel, config), payload, now, now)
+            )
+        notifications.labels(channel, "queued").inc()
+        self._wakeups[channel].set()
+        return cursor.lastrowid
+
+    def _claim(self, channel: str, batch_size: int) -> List[Tuple[int, str, str, int]]:
+        """Claim up to batch_size due notifications sharing the oldest due one's batch key"""
+        now = time.time()
+        due = ("channel = ? AND status = 'pending' AND next_attempt_at <= ? AND claimed_until <= ?")
+        with closing(self._connect()) as db:
+            # Taken while claiming so two workers, in any process, never claim the same rows
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                first = db.execute(
+                    f"SELECT batch_key FROM notification_outbox WHERE {due} ORDER BY id LIMIT 1", (channel, now, now)
+                ).fetchone()
+                rows = []
+                if first is not None:
+                    rows = db.execute(
+                        f"SELECT id, target, payload, attempts FROM notification_outbox "
+                        f"WHERE {due} AND batch_key = ? ORDER BY id LIMIT ?",
+                        (channel, now, now, first[0], batch_size)
+                    ).fetchall()
+                    db.executemany(
+                        "UPDATE notification_outbox SET claimed_until = ? WHERE id = ?",
+                        [(now + self.config["claim_seconds"], row[0]) for row in rows]
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _release(self, ids: List[int], **values):
+        """Give up the claim on ``ids``, setting the given columns"""
+        assignments = "".join(f"{column} = ?, " for column in values)
+        with closing(self._connect()) as db:
+            db.executemany(
+                f"UPDATE notification_outbox SET {assignments}claimed_until = 0 WHERE id = ?",
+                [(*values.values(), notification_id) for notification_id in ids]
+            )
+
+    def _deliver(self, channel: str, settings: Dict[str, Any], rows: List[Tuple[int, str, str, int]]):
+        ids = [row[0] for row in rows]
+        target = rows[0][1]
+        items = [json.loads(row[2]) for row in rows]
+        attempts = max(row[3] for row in rows) + 1
+        target_field, build, _ = CHANNELS[channel]
+        try:
+            method, url, headers, body = build(items, self.config)
+            # Checked again at send time: the name may resolve differently now
+            if target_field != "apiKey":
+                check_destination(url, self.config["allowed_hosts"])
+        except InvalidNotification as e:
+            self._release(ids, status="failed", attempts=attempts, last_error=str(e))
+            notifications.labels(channel, "failed").inc(len(ids))
+            logger.error(f"Dropping {len(ids)} {channel} notifications: {str(e)}")
+            return
+
+        while True:
+            allowed, wait = self._buckets.acquire(f"{channel}:{target}", settings["rate"], settings["burst"])
+            if allowed:
+                break
+            if self._stopping.wait(wait):
+                self._release(ids)
+                return
+
+        retry_after = 0.0
+        permanent = False
+        try:
+            with notification_request_seconds.labels(channel).time():
+                # Redirects are not followed, so a destination cannot bounce the request elsewhere
+                response = self._session.request(method, url, json=body, headers=headers,
+                                                 timeout=self.config["timeout"], allow_redirects=False)
+        except requests.RequestException as e:
+            error = str(e)
+        else:
+            if response.status_code < 300:
+                with closing(self._connect()) as db:
+                    db.executemany("DELETE FROM notification_outbox WHERE id = ?", [(i,) for i in ids])
+                notifications.labels(channel, "sent").inc(len(ids))
+                return
+            error = f"HTTP {response.status_code}: {response.text[:200]}"
+            if response.status_code != 429 and response.status_code < 500:
+                # The destination rejected the request itself; retrying cannot help
+                permanent = True
+            try:
+                retry_after = float(response.headers.get("Retry-After", 0))
+            except ValueError:
+                pass
+
+        if permanent or attempts >= self.config["max_attempts"]:
+            self._release(ids, status="failed", attempts=attempts, last_error=error)
+            notifications.labels(channel, "failed").inc(len(ids))
+            logger.error(f"Giving up on {len(ids)} {channel} notifications after {attempts} attempts: {error}")
+            return
+        backoff = min(self.config["backoff_initial"] * 2 ** (attempts - 1), self.config["backoff_max"])
+        delay = max(random.uniform(0, backoff), retry_after)
+        self._release(ids, attempts=attempts, next_attempt_at=time.time() + delay, last_error=error)
+        notifications.labels(channel, "retried").inc(len(ids))
+        logger.warning(f"Error sending {len(ids)} {channel} notifications, retrying in {delay:.1f}s: {error}")
+
+    def _run_worker(self, channel: str):
+        settings = self.config["channels"][channel]
+        wakeup = self._wakeups[channel]
+        while not self._stopping.is_set():
+            try:
+                rows = self._claim(channel, settings["batch_size"])
+                if rows:
+                    self._deliver(channel, settings, rows)
+                    continue
+            except Exception as e:
+                logger.error(f"Error delivering {channel} notifications: {str(e)}")
+            wakeup.wait(self.config["poll_interval"])
+            wakeup.clear()
+
+# Create a singleton instance
+notification_dispatcher = NotificationDispatcher()
@@ -0,0 +1,233 @@
+"""
+Local stand-ins for firewall management APIs, for benchmarking the poller.
+
+One HTTPS server answers as every simulated device: PAN-OS XML API (system
+info and traffic log jobs), FortiOS REST (system status and traffic) and
+UniFi (login, stat/device and stat/event). Devices are told apart by the
+loopback address they connect to, so thousands of devices can share one
+port; on Linux all of 127.0.0.0/8 reaches the loopback interface.
+
+Usage:
+    python benchmarks/fake_vendors.py --port 8443 --latency-ms 50 --entries 100
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import ssl
+import tempfile
+from typing import Dict, Any, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+PROTOCOLS = ("tcp", "udp", "icmp")
+
+def device_address(index: int) -> str:
+    """Loopback address of simulated device ``index`` (0-based)"""
+    index += 2  # Skip 127.0.0.0 and 127.0.0.1
+    return f"127.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+def create_certificate(directory: str) -> Tuple[str, str]:
+    """Write a self-signed certificate and key for the fake servers"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-firewall")])
+    now = datetime.datetime.utcnow()
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=7))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "fake-vendor.crt")
+    key_path = os.path.join(directory, "fake-vendor.key")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ))
+    return cert_path, key_path
+
+class FakeVendorServer:
+    """
+    HTTP/1.1 server implementing the vendor endpoints the poller uses.
+
+    Args:
+        latency: Mean added response latency in seconds (exponentially distributed)
+        entries: Traffic log entries per response
+        error_rate: Fraction of requests answered with HTTP 500
+    """
+
+    def __init__(self, latency: float = 0.05, entries: int = 100, error_rate: float = 0.0):
+        self.latency = latency
+        self.entries = entries
+        self.error_rate = error_rate
+        self.next_job = 1
+        self.requests = 0
+
+    # Traffic log entries in each vendor's field names
+
+    def _flow(self) -> Dict[str, Any]:
+        return {
+            "src": f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}",
+            "dst": f"192.168.{random.randint(0, 255)}.{random.randint(1, 254)}",
+            "proto": random.choice(PROTOCOLS),
+            "dport": random.choice((53, 80, 443, 22, 3389, random.randint(1024, 65535))),
+            "bytes": random.randint(64, 10_000_000),
+            "packets": random.randint(1, 10_000),
+            "elapsed": random.randint(0, 3600),
+        }
+
+    def panos_log_xml(self) -> str:
+        entries = "".join(
+            "<entry>" + "".join(f"<{field}>{value}</{field}>" for field, value in self._flow().items()) + "</entry>"
+            for _ in range(self.entries)
+        )
+        return (
+            '<response status="success"><result><job><status>FIN</status></job>'
+            f'<log><logs count="{self.entries}" progress="100">{entries}</logs></log></result></response>'
+        )
+
+    def fortios_traffic(self) -> Dict[str, Any]:
+        results = []
+        for _ in range(self.entries):
+            flow = self._flow()
+            results.append({
+                "srcip": flow["src"], "dstip": flow["dst"], "proto": flow["proto"], "dstport": flow["dport"],
+                "sentbyte": flow["bytes"], "sentpkt": flow["packets"], "duration": flow["elapsed"]
+            })
+        return {"http_method": "GET", "status": "success", "results": results}
+
+    def unifi_events(self) -> Dict[str, Any]:
+        data = []
+        for _ in range(self.entries):
+            flow = self._flow()
+            data.append({
+                "key": "EVT_TRAFFIC", "src_ip": flow["src"], "dst_ip": flow["dst"], "proto": flow["proto"],
+                "dst_port": flow["dport"], "bytes": flow["bytes"], "packets": flow["packets"],
+                "duration": flow["elapsed"]
+            })
+        return {"meta": {"rc": "ok"}, "data": data}
+
+    def route(self, method: str, target: str) -> Tuple[int, str, bytes, Dict[str, str]]:
+        """Return (status, content type, body, extra headers) for a request"""
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/api/" and query.get("type") == "op":
+            body = (
+                '<response status="success"><result><system><hostname>fake-pa</hostname>'
+                '<model>PA-VM</model><sw-version>11.0.0</sw-version><uptime>10 days</uptime>'
+                '</system></result></response>'
+            )
+            return 200, "application/xml", body.encode(), {}
+        if url.path == "/api/" and query.get("type") == "log":
+            # Jobs finish immediately; any job id returns a page of logs so
+            # server processes sharing the port need no common state
+            if query.get("action") == "get":
+                return 200, "application/xml", self.panos_log_xml().encode(), {}
+            job_id = str(self.next_job)
+            self.next_job += 1
+            body = f'<response status="success"><result><job>{job_id}</job></result></response>'
+            return 200, "application/xml", body.encode(), {}
+
+        if url.path == "/api/v2/monitor/system/status":
+            body = {"status": "success", "results": {"hostname": "fake-fgt", "model": "FGVM", "version": "v7.4.0"}}
+            return 200, "application/json", json.dumps(body).encode(), {}
+        if url.path == "/api/v2/monitor/firewall/traffic":
+            return 200, "application/json", json.dumps(self.fortios_traffic()).encode(), {}
+
+        if url.path == "/api/login" and method == "POST":
+            body = json.dumps({"meta": {"rc": "ok"}, "data": []}).encode()
+            return 200, "application/json", body, {"Set-Cookie": "unifises=fake-session; Path=/"}
+        if url.path == "/api/s/default/stat/device":
+            body = {"meta": {"rc": "ok"}, "data": [{"name": "fake-udm", "model": "UDM", "state": 1}]}
+            return 200, "application/json", json.dumps(body).encode(), {}
+        if url.path == "/api/s/default/stat/event":
+            return 200, "application/json", json.dumps(self.unifi_events()).encode(), {}
+
+        return 404, "application/json", b'{"error": "not found"}', {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0)):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(random.expovariate(1 / self.latency))
+                if random.random() < self.error_rate:
+                    status, content_type, body, extra = 500, "text/plain", b"simulated failure", {}
+                else:
+                    status, content_type, body, extra = self.route(method, target)
+
+                response_headers = {
+                    "Content-Type": content_type,
+                    "Content-Length": str(len(body)),
+                    **extra
+                }
+                head = f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n" + "".join(
+                    f"{name}: {value}\r\n" for name, value in response_headers.items()
+                ) + "\r\n"
+                writer.write(head.encode() + body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(host: str, port: int, server: FakeVendorServer, cert_path: str, key_path: str):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    listener = await asyncio.start_server(
+        server.handle, host, port, ssl=context, reuse_port=True, backlog=4096
+    )
+    async with listener:
+        await listener.serve_forever()
+
+def run_server(host: str, port: int, latency: float, entries: int, error_rate: float, cert_path: str, key_path: str):
+    """Process entry point: serve until killed"""
+    server = FakeVendorServer(latency=latency, entries=entries, error_rate=error_rate)
+    asyncio.run(serve(host, port, server, cert_path, key_path))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fake PAN-OS, FortiOS and UniFi API servers")
+    parser.add_argument("--host", default="0.0.0.0", help="0.0.0.0 lets every 127.x.y.z address reach it")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mean added latency")
+    parser.add_argument("--entries", type=int, default=100, help="traffic log entries per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500 responses")
+    args = parser.parse_args()
+
+    cert_path, key_path = create_certificate(tempfile.mkdtemp(prefix="fake-vendor-"))
+    print(f"Serving fake vendor APIs on https://{args.host}:{args.port}")
+    run_server(args.host, args.port, args.latency_ms / 1000, args.entries, args.error_rate, cert_path, key_path)
+
+if __name__ == "__main__":
+    main()
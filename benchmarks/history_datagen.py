@@ -0,0 +1,228 @@
+"""
+Synthetic history data generator.
+
+Bulk-loads realistic NetworkMonitoringHistory, InterfaceStatsHistory and
+NetFlowHistory rows into the application's SQLite database, for load testing
+the history API at production-like volumes (100M+ rows).
+
+- Metrics: one series per (device, metric) sampled every --interval seconds,
+  with a daily cycle plus noise.
+- Interface stats: monotonically increasing byte counters per interface.
+- Flows: timestamps spread over the period; source and destination hosts
+  drawn from a Zipf distribution so a few top talkers dominate, and bytes
+  from a log-normal distribution.
+
+Rows are written with sqlite3 in large transactions. With --defer-indexes the
+history indexes are dropped during the load and rebuilt afterwards.
+
+Usage:
+    python benchmarks/history_datagen.py --devices 100 --metrics 8 --days 30 --flows 10000000
+    DATABASE_PATH=/tmp/load.db python benchmarks/history_datagen.py --days 395 --defer-indexes
+"""
+import argparse
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Metric types with their unit and typical (baseline, daily swing, noise)
+METRICS = [
+    ("cpu", "%", (35.0, 20.0, 5.0)),
+    ("memory", "%", (60.0, 10.0, 2.0)),
+    ("disk", "%", (45.0, 1.0, 0.5)),
+    ("bandwidth_in", "Mbps", (400.0, 300.0, 50.0)),
+    ("bandwidth_out", "Mbps", (250.0, 200.0, 40.0)),
+    ("sessions", "count", (20000.0, 15000.0, 2000.0)),
+    ("latency", "ms", (12.0, 4.0, 3.0)),
+    ("packet_loss", "%", (0.2, 0.1, 0.2)),
+]
+
+PROTOCOLS = (("tcp", 0.80), ("udp", 0.18), ("icmp", 0.02))
+PORTS = ((443, 0.45), (80, 0.15), (53, 0.12), (22, 0.05), (3389, 0.03), (123, 0.05), (0, 0.15))
+
+def sqlite_timestamp(value: datetime) -> str:
+    """Timestamp in the format SQLAlchemy stores DateTime columns in on SQLite"""
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+def device_name(index: int) -> str:
+    return f"fw-{index:04d}"
+
+def host_ip(index: int, network: int) -> str:
+    index += 1  # Skip the network address
+    return f"{network}.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+def zipf_cumulative_weights(population: int, exponent: float) -> List[float]:
+    """Cumulative Zipf weights: rank k has weight 1 / k**exponent"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, population + 1)))
+
+def metric_names(metrics: int) -> List[Tuple[str, str, Tuple[float, float, float]]]:
+    """The first ``metrics`` metric types; past len(METRICS) they repeat as cpu_1, memory_1, ..."""
+    types = []
+    for index in range(metrics):
+        name, unit, shape = METRICS[index % len(METRICS)]
+        if index >= len(METRICS):
+            name = f"{name}_{index // len(METRICS)}"
+        types.append((name, unit, shape))
+    return types
+
+def metric_metadata(devices: int, metrics: int) -> List[Tuple[str, str, str, Tuple[float, float, float]]]:
+    types = metric_names(metrics)
+    return [(device_name(device), name, unit, shape) for device in range(devices) for name, unit, shape in types]
+
+def metric_rows(args, start: datetime) -> Iterator[tuple]:
+    series = metric_metadata(args.devices, args.metrics)
+    steps = int(args.days * 86400 // args.interval)
+    for step in range(steps):
+        moment = start + timedelta(seconds=step * args.interval)
+        timestamp = sqlite_timestamp(moment)
+        # Daily cycle peaking mid-afternoon
+        phase = math.sin((moment.hour * 3600 + moment.minute * 60 - 9 * 3600) / 86400 * 2 * math.pi)
+        for source, metric_type, unit, (baseline, swing, noise) in series:
+            value = max(0.0, baseline + swing * phase + random.gauss(0, noise))
+            yield (timestamp, source, metric_type, round(value, 3), unit, None)
+
+def interface_rows(args, start: datetime) -> Iterator[tuple]:
+    interfaces = [
+        (f"{device_name(device)}:eth{port}", random.choice((1000, 10000, 40000)))
+        for device in range(args.devices)
+        for port in range(args.interfaces)
+    ]
+    counters = {name: [0, 0, 0, 0] for name, _ in interfaces}
+    steps = int(args.days * 86400 // args.interval)
+    for step in range(steps):
+        timestamp = sqlite_timestamp(start + timedelta(seconds=step * args.interval))
+        for name, speed in interfaces:
+            counter = counters[name]
+            # Bytes per interval at a few percent of line rate
+            counter[0] += int(random.expovariate(1 / (speed * 125_000 * args.interval * 0.05)))
+            counter[1] += int(random.expovariate(1 / (speed * 125_000 * args.interval * 0.03)))
+            if random.random() < 0.01:
+                counter[2] += random.randint(1, 20)
+            if random.random() < 0.01:
+                counter[3] += random.randint(1, 20)
+            status = "down" if random.random() < 0.001 else "up"
+            yield (timestamp, name, status, speed, counter[0], counter[1], counter[2], counter[3], None)
+
+def flow_rows(args, start: datetime) -> Iterator[tuple]:
+    source_weights = zipf_cumulative_weights(args.hosts, args.zipf)
+    destination_weights = zipf_cumulative_weights(args.destinations, args.zipf)
+    protocols, protocol_weights = zip(*PROTOCOLS)
+    ports, port_weights = zip(*PORTS)
+    protocol_cumulative = list(itertools.accumulate(protocol_weights))
+    port_cumulative = list(itertools.accumulate(port_weights))
+    metadata = [json.dumps({"hostname": device_name(device)}) for device in range(args.devices)]
+    period = args.days * 86400
+    batch = 10_000
+
+    # Flows are generated in time order so inserts append to the timestamp index
+    for offset in range(0, args.flows, batch):
+        count = min(batch, args.flows - offset)
+        seconds = sorted(random.uniform(offset / args.flows * period, (offset + count) / args.flows * period)
+                         for _ in range(count))
+        sources = random.choices(range(args.hosts), cum_weights=source_weights, k=count)
+        destinations = random.choices(range(args.destinations), cum_weights=destination_weights, k=count)
+        for second, source, destination in zip(seconds, sources, destinations):
+            packets = max(1, int(random.lognormvariate(2.5, 1.5)))
+            port = ports[bisect.bisect(port_cumulative, random.random() * port_cumulative[-1])]
+            yield (
+                sqlite_timestamp(start + timedelta(seconds=second)),
+                host_ip(source, 10),
+                host_ip(destination, 172),
+                protocols[bisect.bisect(protocol_cumulative, random.random() * protocol_cumulative[-1])],
+                port or random.randint(1024, 65535),
+                packets * random.randint(60, 1500),
+                packets,
+                int(random.expovariate(1 / 30)),
+                random.choice(metadata)
+            )
+
+def load(connection: sqlite3.Connection, table, columns: List[str], rows: Iterator[tuple], batch_size: int) -> int:
+    statement = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    total = 0
+    started = time.perf_counter()
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        with connection:
+            connection.executemany(statement, batch)
+        total += len(batch)
+        elapsed = time.perf_counter() - started
+        print(f"\r{table.name}: {total:,} rows ({total / elapsed:,.0f} rows/s)", end="", flush=True)
+    print()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic monitoring history")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--metrics", type=int, default=8, help="metric types per device")
+    parser.add_argument("--interfaces", type=int, default=8, help="interfaces per device")
+    parser.add_argument("--days", type=float, default=30, help="history length, ending now")
+    parser.add_argument("--interval", type=int, default=60, help="seconds between metric samples")
+    parser.add_argument("--flows", type=int, default=1_000_000)
+    parser.add_argument("--hosts", type=int, default=50_000, help="distinct flow source addresses")
+    parser.add_argument("--destinations", type=int, default=20_000, help="distinct flow destination addresses")
+    parser.add_argument("--zipf", type=float, default=1.1, help="top-talker skew exponent")
+    parser.add_argument("--tables", nargs="+", default=["metrics", "interfaces", "flows"],
+                        choices=["metrics", "interfaces", "flows"])
+    parser.add_argument("--batch-size", type=int, default=100_000, help="rows per transaction")
+    parser.add_argument("--defer-indexes", action="store_true", help="drop indexes during the load")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # The naming helpers above are shared with history_loadtest.py, which
+    # runs without the application installed
+    from models import init_db
+    from models.database import engine, DATABASE_PATH
+    from backend.models.network_monitoring import NetworkMonitoringHistory, InterfaceStatsHistory, NetFlowHistory
+
+    random.seed(args.seed)
+    init_db()
+    start = datetime.utcnow() - timedelta(days=args.days)
+
+    tables = {
+        "metrics": (NetworkMonitoringHistory.__table__,
+                    ["timestamp", "source", "metric_type", "value", "unit", "metadata"], metric_rows),
+        "interfaces": (InterfaceStatsHistory.__table__,
+                       ["timestamp", "interface_name", "status", "speed", "in_bytes", "out_bytes",
+                        "in_errors", "out_errors", "metadata"], interface_rows),
+        "flows": (NetFlowHistory.__table__,
+                  ["timestamp", "source_ip", "destination_ip", "protocol", "port", "bytes", "packets",
+                   "duration", "metadata"], flow_rows),
+    }
+
+    connection = sqlite3.connect(DATABASE_PATH, isolation_level="DEFERRED")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute("PRAGMA cache_size=-262144")
+    connection.execute("PRAGMA temp_store=MEMORY")
+
+    summary = {}
+    started = time.perf_counter()
+    for name in args.tables:
+        table, columns, generator = tables[name]
+        if args.defer_indexes:
+            for index in table.indexes:
+                connection.execute(f"DROP INDEX IF EXISTS {index.name}")
+        summary[name] = load(connection, table, columns, generator(args, start), args.batch_size)
+        if args.defer_indexes:
+            print(f"Rebuilding indexes on {table.name}")
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+    connection.execute("ANALYZE")
+    connection.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(summary.values())
+    print(json.dumps({"rows": summary, "seconds": elapsed, "rows_per_second": total / elapsed}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+History API load test.
+
+Drives every read endpoint in backend/routers/network_monitoring.py across
+every time range at a fixed concurrency and reports latency percentiles,
+throughput, status codes and response size per (endpoint, time range).
+Filter values are drawn from the same naming scheme history_datagen.py uses,
+so half of the requests (by default) hit a single device, interface or top
+talker and the rest scan the whole range.
+
+Run the API against a database loaded by history_datagen.py with the
+per-client rate limit switched off, e.g.:
+
+    DATABASE_PATH=/tmp/load.db RATE_LIMIT_ENABLED=false uvicorn main:app --workers 4
+
+Usage:
+    python benchmarks/history_loadtest.py --base-url http://localhost:8000 --concurrency 16 --duration 20
+    python benchmarks/history_loadtest.py --endpoints netflow top-talkers --time-ranges 1h 24h --output results.json
+    python benchmarks/history_loadtest.py --baseline results.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from history_datagen import device_name, host_ip, metric_names, zipf_cumulative_weights
+from reporting import environment, compare
+
+TIME_RANGES = ("1h", "6h", "24h", "7d", "30d", "90d", "13mo")
+
+def endpoint_params(args) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Query parameter factories per endpoint; each call returns one request's filters"""
+    metric_types = [name for name, _, _ in metric_names(args.metrics)]
+    source_weights = zipf_cumulative_weights(args.hosts, args.zipf)
+
+    def filtered() -> bool:
+        return random.random() < args.filter_fraction
+
+    def device() -> str:
+        return device_name(random.randrange(args.devices))
+
+    def metrics() -> Dict[str, Any]:
+        if not filtered():
+            return {}
+        return {"source": device(), "metric_type": random.choice(metric_types)}
+
+    def interface_stats() -> Dict[str, Any]:
+        if not filtered():
+            return {}
+        return {"interface_name": f"{device()}:eth{random.randrange(args.interfaces)}"}
+
+    def netflow() -> Dict[str, Any]:
+        if not filtered():
+            return {}
+        # Filter by talkers in proportion to how often they appear
+        source = random.choices(range(args.hosts), cum_weights=source_weights)[0]
+        return {"source_ip": host_ip(source, 10)}
+
+    return {
+        "metrics": lambda: {"path": "/api/history/metrics", **metrics()},
+        "metrics-summary": lambda: {"path": "/api/history/metrics/summary", **metrics()},
+        "interface-stats": lambda: {"path": "/api/history/interface-stats", **interface_stats()},
+        "netflow": lambda: {"path": "/api/history/netflow", **netflow()},
+        "top-talkers": lambda: {"path": "/api/history/netflow/top-talkers", "limit": 10},
+    }
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted ``values``"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+def run_case(base_url: str, headers: Dict[str, str], make_params: Callable[[], Dict[str, Any]],
+             time_range: str, args) -> Dict[str, Any]:
+    """Closed-loop load: ``concurrency`` clients issue requests back to back for ``duration`` seconds"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    response_bytes = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def client():
+        nonlocal response_bytes
+        session = requests.Session()
+        session.headers.update(headers)
+        while time.monotonic() < deadline:
+            params = make_params()
+            path = params.pop("path")
+            params["time_range"] = time_range
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + path, params=params, timeout=args.timeout)
+                status, size = str(response.status_code), len(response.content)
+            except requests.RequestException as exc:
+                status, size = type(exc).__name__, 0
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[status] += 1
+                if status == "200":
+                    latencies.append(elapsed)
+                    response_bytes += size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for future in [executor.submit(client) for _ in range(args.concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "time_range": time_range,
+        "requests": sum(statuses.values()),
+        "ok": len(latencies),
+        "statuses": dict(statuses),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "mean_response_kb": response_bytes / len(latencies) / 1024 if latencies else 0.0,
+    }
+
+def login(base_url: str, username: str, password: str) -> str:
+    response = requests.post(f"{base_url}/token", data={"username": username, "password": password}, timeout=30)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the monitoring history API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--endpoints", nargs="+", default=["metrics", "metrics-summary", "interface-stats",
+                                                           "netflow", "top-talkers"])
+    parser.add_argument("--time-ranges", nargs="+", default=list(TIME_RANGES), choices=TIME_RANGES)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint and time range")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--filter-fraction", type=float, default=0.5,
+                        help="fraction of requests filtered to one device, interface or talker")
+    parser.add_argument("--token", help="bearer token; otherwise log in with --username/--password if given")
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    # Must match the history_datagen.py run that loaded the database
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--metrics", type=int, default=8)
+    parser.add_argument("--interfaces", type=int, default=8)
+    parser.add_argument("--hosts", type=int, default=50_000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression vs baseline")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    base_url = args.base_url.rstrip("/")
+    token = args.token
+    if not token and args.username:
+        token = login(base_url, args.username, args.password)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    factories = endpoint_params(args)
+    unknown = set(args.endpoints) - set(factories)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    results = {
+        "benchmark": "history_api",
+        "environment": environment(),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "baseline", "token", "password")},
+        "cases": [],
+    }
+    for endpoint in args.endpoints:
+        for time_range in args.time_ranges:
+            case = {"endpoint": endpoint, **run_case(base_url, headers, factories[endpoint], time_range, args)}
+            results["cases"].append(case)
+            errors = case["requests"] - case["ok"]
+            print(f"{endpoint:<16} {time_range:>4}: p50 {case['p50_ms']:8.1f}ms  p95 {case['p95_ms']:8.1f}ms  "
+                  f"p99 {case['p99_ms']:8.1f}ms  {case['throughput_rps']:8.1f} req/s  "
+                  f"{case['mean_response_kb']:9.1f} KB/resp  {errors} errors")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline and not compare(
+        results, args.baseline, args.tolerance, "cases",
+        key=lambda case: (case["endpoint"], case["time_range"]),
+        label=lambda case: f"{case['endpoint']:<16} {case['time_range']:>4}",
+        metrics=("p50_ms", "p99_ms")
+    ):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Login throughput benchmark.
+
+Drives password verification at a fixed arrival rate while a probe coroutine
+stands in for other API requests and measures how late the event loop wakes
+it up. Compares the thread-pool login path with the old inline bcrypt call.
+
+Usage:
+    python benchmarks/login_throughput.py --rate 100 --duration 10
+    python benchmarks/login_throughput.py --mode blocking --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.auth_service import users_db, get_password_hash, authenticate_user, authenticate_user_async
+
+PROBE_INTERVAL = 0.01  # seconds between probe wake-ups
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def probe(stop: asyncio.Event, lags: List[float]):
+    """Sleep for PROBE_INTERVAL repeatedly and record how late each wake-up is"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+def seed_users(count: int, password: str) -> List[str]:
+    """
+    Add benchmark accounts to the in-memory user database. Each login goes to
+    a different account so per-username single-flight does not coalesce them.
+    """
+    hashed_password = get_password_hash(password)
+    usernames = []
+    for index in range(count):
+        username = f"bench-user-{index}"
+        users_db[username] = {
+            "username": username,
+            "full_name": f"Benchmark User {index}",
+            "email": f"{username}@example.com",
+            "hashed_password": hashed_password,
+            "disabled": False,
+        }
+        usernames.append(username)
+    return usernames
+
+async def login(mode: str, username: str, password: str, latencies: List[float]):
+    started = time.perf_counter()
+    if mode == "pool":
+        user = await authenticate_user_async(username, password)
+    else:
+        user = authenticate_user(username, password)
+    latencies.append(time.perf_counter() - started)
+    if user is None:
+        raise RuntimeError(f"Login failed for {username}")
+
+async def run(mode: str, rate: float, duration: float, usernames: List[str], password: str) -> Dict[str, Any]:
+    stop = asyncio.Event()
+    lags: List[float] = []
+    latencies: List[float] = []
+    probe_task = asyncio.create_task(probe(stop, lags))
+
+    tasks = []
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < duration:
+        due = started + sent / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        username = usernames[sent % len(usernames)]
+        tasks.append(asyncio.create_task(login(mode, username, password, latencies)))
+        sent += 1
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    return {
+        "mode": mode,
+        "offered_rate": rate,
+        "duration": elapsed,
+        "logins": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "login_latency_p50_ms": percentile(latencies, 0.50) * 1000,
+        "login_latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        "loop_lag_p50_ms": percentile(lags, 0.50) * 1000,
+        "loop_lag_p99_ms": percentile(lags, 0.99) * 1000,
+        "loop_lag_max_ms": max(lags, default=0.0) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput and event loop latency")
+    parser.add_argument("--mode", choices=["pool", "blocking"], default="pool")
+    parser.add_argument("--rate", type=float, default=100.0, help="logins per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--users", type=int, default=500, help="benchmark accounts to rotate through")
+    parser.add_argument("--password", default="benchmark-password")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    usernames = seed_users(args.users, args.password)
+    results = asyncio.run(run(args.mode, args.rate, args.duration, usernames, args.password))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
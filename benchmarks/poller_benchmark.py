@@ -0,0 +1,206 @@
+"""
+Fleet-scale poller benchmark.
+
+Starts the fake vendor servers from fake_vendors.py, then for each fleet size
+polls every simulated device through MonitoringService's real path (rate
+limiter, circuit breaker, vendor client, flow normalization and ingest into
+a scratch SQLite database) and reports sweep time, CPU per device, peak
+memory and ingest rate. Each scenario runs in a fresh process so memory and
+CPU figures do not leak between them.
+
+Usage:
+    python benchmarks/poller_benchmark.py --devices 10 1000 10000 --output results.json
+    python benchmarks/poller_benchmark.py --devices 1000 --baseline results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from queue import Empty
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_vendors import create_certificate, device_address, run_server
+from reporting import environment, compare
+
+FIREWALL_TYPES = ("palo_alto", "fortigate", "unifi")
+
+def wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Fake vendor server did not start on port {port}")
+
+def _metric_total(families: Dict[str, Any], name: str, **labels) -> float:
+    """Sum a counter, or a histogram's observation count, over matching labels"""
+    family = families.get(name)
+    if family is None:
+        return 0.0
+    total = 0.0
+    for key, value in family["samples"].items():
+        sample_labels = dict(zip(family["labelnames"], key.split("\x1f")))
+        if all(sample_labels.get(label) == wanted for label, wanted in labels.items()):
+            total += value[-1] if isinstance(value, list) else value
+    return total
+
+def run_scenario(devices: int, args: Dict[str, Any], scratch: str, results) -> None:
+    """Scenario process: poll ``devices`` fake devices ``sweeps`` times"""
+    # Point every piece of shared state at scratch files before the app loads
+    os.environ["DATABASE_PATH"] = os.path.join(scratch, f"bench-{devices}.db")
+    os.environ["DEVICE_RATE_LIMIT_STORAGE_PATH"] = os.path.join(scratch, f"device-ratelimit-{devices}.shm")
+    os.environ["POLL_WORKERS"] = str(args["workers"])
+
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    import urllib3
+    urllib3.disable_warnings()
+
+    from models import init_db
+    from services.monitoring_service import MonitoringService
+    from services.metrics import registry
+
+    init_db()
+    service = MonitoringService()
+    for index in range(devices):
+        service.add_firewall(
+            FIREWALL_TYPES[index % len(FIREWALL_TYPES)],
+            f"{device_address(index)}:{args['port']}",
+            "bench-token",
+            {"limit": args["entries"], "log_job_interval": 0}
+        )
+    jobs = [
+        (firewall_type, firewall)
+        for firewall_type, firewalls in service.firewalls.items()
+        for firewall in firewalls.values()
+    ]
+
+    sweep_times: List[float] = []
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    rows_before = _metric_total(registry.collect(), "fms_ingest_rows_total")
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args["workers"]) as executor:
+        for _ in range(args["sweeps"]):
+            sweep_started = time.perf_counter()
+            list(executor.map(lambda job: service._poll_device("traffic_logs", *job), jobs))
+            sweep_times.append(time.perf_counter() - sweep_started)
+
+    elapsed = time.perf_counter() - started
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    families = registry.collect()
+    cpu_seconds = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    polls = devices * args["sweeps"]
+    rows = _metric_total(families, "fms_ingest_rows_total") - rows_before
+    if not rows:
+        # Polls can succeed while every ingest fails; that is not a result
+        raise RuntimeError(f"No rows were ingested polling {devices} devices")
+
+    results.put({
+        "devices": devices,
+        "sweeps": args["sweeps"],
+        "sweep_seconds": sweep_times,
+        "sweep_seconds_median": statistics.median(sweep_times),
+        "polls_per_second": polls / elapsed,
+        "cpu_seconds": cpu_seconds,
+        "cpu_ms_per_device_poll": cpu_seconds / polls * 1000,
+        "peak_rss_mb": usage_after.ru_maxrss / 1024,
+        "rss_growth_mb": (usage_after.ru_maxrss - baseline_rss) / 1024,
+        "ingest_rows": rows,
+        "ingest_rows_per_second": rows / elapsed,
+        "ingest_commits": _metric_total(families, "fms_ingest_commit_seconds"),
+        "polls_ok": _metric_total(families, "fms_device_polls_total", outcome="success"),
+        "polls_failed": _metric_total(families, "fms_device_polls_total", outcome="error"),
+        "polls_skipped_open_circuit": _metric_total(families, "fms_device_polls_total", outcome="skipped"),
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MonitoringService against fake vendor servers")
+    parser.add_argument("--devices", type=int, nargs="+", default=[10, 1000, 10000], help="fleet sizes")
+    parser.add_argument("--sweeps", type=int, default=3, help="sweeps per scenario")
+    parser.add_argument("--workers", type=int, default=64, help="poller threads")
+    parser.add_argument("--port", type=int, default=18443)
+    parser.add_argument("--server-processes", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mean vendor response latency")
+    parser.add_argument("--entries", type=int, default=100, help="traffic log entries per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500 responses")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression vs baseline")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    scratch = tempfile.mkdtemp(prefix="poller-bench-")
+    cert_path, key_path = create_certificate(scratch)
+    servers = [
+        context.Process(
+            target=run_server,
+            args=("0.0.0.0", args.port, args.latency_ms / 1000, args.entries, args.error_rate, cert_path, key_path),
+            daemon=True
+        )
+        for _ in range(args.server_processes)
+    ]
+    for server in servers:
+        server.start()
+    wait_for_port(args.port)
+
+    scenario_args = {"port": args.port, "sweeps": args.sweeps, "workers": args.workers, "entries": args.entries}
+    results = {
+        "benchmark": "poller",
+        "environment": environment(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "scenarios": [],
+    }
+    try:
+        for devices in args.devices:
+            queue = context.Queue()
+            process = context.Process(target=run_scenario, args=(devices, scenario_args, scratch, queue))
+            process.start()
+            while True:
+                try:
+                    scenario = queue.get(timeout=5)
+                    break
+                except Empty:
+                    if not process.is_alive():
+                        raise RuntimeError(f"Scenario with {devices} devices exited with {process.exitcode}")
+            process.join()
+            results["scenarios"].append(scenario)
+            print(f"{devices:>6} devices: sweep {scenario['sweep_seconds_median']:.2f}s, "
+                  f"{scenario['cpu_ms_per_device_poll']:.2f} ms CPU/poll, "
+                  f"peak RSS {scenario['peak_rss_mb']:.0f} MB, "
+                  f"{scenario['ingest_rows_per_second']:.0f} rows/s ingested, "
+                  f"{scenario['polls_failed']:.0f} failed polls")
+    finally:
+        for server in servers:
+            server.terminate()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline and not compare(
+        results, args.baseline, args.tolerance, "scenarios",
+        key=lambda scenario: scenario["devices"],
+        label=lambda scenario: f"{scenario['devices']:>6} devices",
+        metrics=("sweep_seconds_median", "cpu_ms_per_device_poll", "peak_rss_mb")
+    ):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
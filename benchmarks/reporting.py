@@ -0,0 +1,66 @@
+"""
+Result reporting shared by the benchmark scripts: the environment block
+recorded with each run and the comparison against a previous run's JSON.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Callable, Dict, Hashable, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+def compare(
+    results: Dict[str, Any],
+    baseline_path: str,
+    tolerance: float,
+    entries: str,
+    key: Callable[[Dict[str, Any]], Hashable],
+    label: Callable[[Dict[str, Any]], str],
+    metrics: Sequence[str]
+) -> bool:
+    """
+    Print changes against a previous run; False if any entry regressed.
+
+    Args:
+        results: This run's results
+        baseline_path: JSON file written by an earlier run of the same benchmark
+        tolerance: Allowed relative increase of each metric
+        entries: Key of the result list to compare, e.g. "scenarios"
+        key: Identifies the same entry in both runs
+        label: Text printed in front of each entry's lines
+        metrics: Entry fields to compare, where higher is worse
+
+    Returns:
+        True if no metric increased by more than ``tolerance``
+    """
+    with open(baseline_path) as f:
+        baseline = {key(entry): entry for entry in json.load(f)[entries]}
+    ok = True
+    for entry in results[entries]:
+        previous = baseline.get(key(entry))
+        if previous is None:
+            continue
+        for metric in metrics:
+            change = entry[metric] / previous[metric] - 1 if previous[metric] else 0.0
+            regressed = change > tolerance
+            ok = ok and not regressed
+            print(f"{label(entry)} {metric:<24} {previous[metric]:>10.3f} -> "
+                  f"{entry[metric]:>10.3f} ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+    return ok
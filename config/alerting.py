@@ -0,0 +1,108 @@
+import os
+from typing import Dict, Any
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class AlertingSettings:
+    def __init__(self):
+        # Threshold rules evaluated against every ingested metrics batch
+        self.ALERT_RULES: Dict[str, Any] = {
+            "enabled": os.getenv("ALERT_RULES_ENABLED", "true").lower() == "true",
+            # Rules changed through another process are picked up this often
+            "refresh_interval": float(os.getenv("ALERT_RULES_REFRESH_INTERVAL", "30")),  # in seconds
+        }
+
+        # Repeats of an alert (same type, source and severity) fold into the
+        # open alert, and alerts raised close together for the same key are
+        # grouped into one incident
+        self.ALERT_GROUPING: Dict[str, Any] = {
+            # A repeat this soon after the alert resolved reopens it
+            "dedup_window": float(os.getenv("ALERT_DEDUP_WINDOW", "600")),  # in seconds
+            # Counts, last-seen times and resolutions are written this often
+            "flush_interval": float(os.getenv("ALERT_FLUSH_INTERVAL", "10")),  # in seconds
+            "incident_window": float(os.getenv("ALERT_INCIDENT_WINDOW", "300")),  # in seconds
+            "group_by": os.getenv("ALERT_INCIDENT_GROUP_BY", "source"),  # source or type
+        }
+
+        # Email delivery: messages are queued and sent by a few workers, each
+        # keeping one authenticated SMTP connection open between messages
+        self.EMAIL_DELIVERY: Dict[str, Any] = {
+            "connections": int(os.getenv("SMTP_CONNECTIONS", "4")),
+            "queue_size": int(os.getenv("SMTP_QUEUE_SIZE", "10000")),
+            "timeout": float(os.getenv("SMTP_TIMEOUT", "30")),  # in seconds
+            # Idle connections are closed before the server drops them
+            "idle_timeout": float(os.getenv("SMTP_IDLE_TIMEOUT", "60")),  # in seconds
+            # Many servers cap the messages sent over one session
+            "messages_per_connection": int(os.getenv("SMTP_MESSAGES_PER_CONNECTION", "100")),
+            "max_attempts": int(os.getenv("SMTP_MAX_ATTEMPTS", "5")),
+            "backoff_initial": float(os.getenv("SMTP_BACKOFF", "2")),  # in seconds
+            "backoff_max": float(os.getenv("SMTP_BACKOFF_MAX", "60")),  # in seconds
+        }
+
+        # Admin notifications are collected per recipient and sent as one
+        # digest when the first alert's window closes
+        self.ALERT_DIGEST: Dict[str, Any] = {
+            "enabled": os.getenv("ALERT_DIGEST_ENABLED", "true").lower() == "true",
+            "window": float(os.getenv("ALERT_DIGEST_WINDOW", "300")),  # in seconds
+            "critical_window": float(os.getenv("ALERT_DIGEST_CRITICAL_WINDOW", "30")),  # in seconds
+            # Send the digest as soon as a critical alert joins it
+            "critical_immediate": os.getenv("ALERT_DIGEST_CRITICAL_IMMEDIATE", "false").lower() == "true",
+            "max_alerts": int(os.getenv("ALERT_DIGEST_MAX_ALERTS", "500")),  # sent early once this full
+        }
+
+        # Chat, webhook and paging notifications: written to a local outbox,
+        # then delivered by a few workers per channel
+        self.NOTIFICATIONS: Dict[str, Any] = {
+            "outbox_path": os.getenv("NOTIFICATION_OUTBOX_PATH", "data/notification-outbox.db"),
+            "timeout": float(os.getenv("NOTIFICATION_TIMEOUT", "10")),  # in seconds
+            "max_attempts": int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "8")),
+            "backoff_initial": float(os.getenv("NOTIFICATION_BACKOFF", "1")),  # in seconds
+            "backoff_max": float(os.getenv("NOTIFICATION_BACKOFF_MAX", "300")),  # in seconds
+            # A claimed notification is retried by any worker once this passes
+            "claim_seconds": float(os.getenv("NOTIFICATION_CLAIM_SECONDS", "60")),
+            "poll_interval": float(os.getenv("NOTIFICATION_POLL_INTERVAL", "1")),  # in seconds
+            "pagerduty_url": os.getenv("PAGERDUTY_EVENTS_URL", "https://events.pagerduty.com/v2/enqueue"),
+            # Destinations on loopback, private or link-local addresses are
+            # refused unless their host name is listed here
+            "allowed_hosts": [
+                host.strip().lower()
+                for host in os.getenv("NOTIFICATION_ALLOWED_HOSTS", "").split(",") if host.strip()
+            ],
+            # Per channel: delivery workers, requests per second and burst
+            # per destination, and notifications sent in one request
+            "channels": {
+                "slack": {
+                    "concurrency": int(os.getenv("SLACK_NOTIFICATION_CONCURRENCY", "2")),
+                    "rate": float(os.getenv("SLACK_NOTIFICATION_RATE", "1")),
+                    "burst": float(os.getenv("SLACK_NOTIFICATION_BURST", "3")),
+                    "batch_size": int(os.getenv("SLACK_NOTIFICATION_BATCH_SIZE", "20")),
+                },
+                "teams": {
+                    "concurrency": int(os.getenv("TEAMS_NOTIFICATION_CONCURRENCY", "2")),
+                    "rate": float(os.getenv("TEAMS_NOTIFICATION_RATE", "1")),
+                    "burst": float(os.getenv("TEAMS_NOTIFICATION_BURST", "3")),
+                    "batch_size": int(os.getenv("TEAMS_NOTIFICATION_BATCH_SIZE", "10")),
+                },
+                "webhook": {
+                    "concurrency": int(os.getenv("WEBHOOK_NOTIFICATION_CONCURRENCY", "4")),
+                    "rate": float(os.getenv("WEBHOOK_NOTIFICATION_RATE", "10")),
+                    "burst": float(os.getenv("WEBHOOK_NOTIFICATION_BURST", "20")),
+                    "batch_size": 1,  # The receiver's format is unknown
+                },
+                "pagerduty": {
+                    "concurrency": int(os.getenv("PAGERDUTY_NOTIFICATION_CONCURRENCY", "4")),
+                    "rate": float(os.getenv("PAGERDUTY_NOTIFICATION_RATE", "2")),
+                    "burst": float(os.getenv("PAGERDUTY_NOTIFICATION_BURST", "10")),
+                    "batch_size": 1,  # The Events API takes one event per request
+                },
+            },
+            "rate_limit_path": os.getenv(
+                "NOTIFICATION_RATE_LIMIT_STORAGE_PATH",
+                "/dev/shm/fms-notification-ratelimit" if os.path.isdir("/dev/shm") else "data/notification-ratelimit.shm"
+            ),
+        }
+
+# Create a singleton instance
+alerting_settings = AlertingSettings()
@@ -0,0 +1,34 @@
+import os
+from typing import Dict, Any
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class ObservabilitySettings:
+    def __init__(self):
+        # Prometheus exposition
+        self.METRICS: Dict[str, Any] = {
+            "enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+            # Bearer token scrapers must send; /metrics is not served without one
+            "token": os.getenv("METRICS_TOKEN", ""),
+            # Directory where each process publishes its metrics so that any
+            # worker can serve the host-wide totals; empty = this process only
+            "multiprocess_dir": os.getenv("METRICS_MULTIPROCESS_DIR", ""),
+            "snapshot_interval": int(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5")),  # in seconds
+        }
+
+        # Per-request phase timings, reported in a Server-Timing header
+        self.REQUEST_TIMING: Dict[str, Any] = {
+            "enabled": os.getenv("REQUEST_TIMING_ENABLED", "true").lower() == "true",
+            "slow_request_ms": float(os.getenv("SLOW_REQUEST_MS", "1000")),
+        }
+
+        # On-demand sampling profiler
+        self.PROFILER: Dict[str, Any] = {
+            "interval_ms": float(os.getenv("PROFILER_INTERVAL_MS", "10")),
+            "max_seconds": int(os.getenv("PROFILER_MAX_SECONDS", "60")),
+        }
+
+# Create a singleton instance
+observability_settings = ObservabilitySettings()
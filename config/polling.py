@@ -0,0 +1,118 @@
+import os
+from typing import Dict, Any
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class PollingSettings:
+    def __init__(self):
+        # Leader election: exactly one process per host runs the poller
+        self.LEADER_ELECTION: Dict[str, Any] = {
+            "enabled": os.getenv("LEADER_ELECTION_ENABLED", "true").lower() == "true",
+            "lease_seconds": int(os.getenv("LEADER_LEASE_SECONDS", "15")),
+            "heartbeat_interval": int(os.getenv("LEADER_HEARTBEAT_INTERVAL", "5")),  # in seconds
+        }
+
+        # Sharded poller: devices are spread over worker processes by
+        # consistent hashing of their hostname
+        self.SHARDING: Dict[str, Any] = {
+            "workers": int(os.getenv("POLLER_SHARDS", "1")),  # 1 = poll in-process
+            "heartbeat_interval": int(os.getenv("POLLER_SHARD_HEARTBEAT_INTERVAL", "5")),  # in seconds
+            "member_ttl": int(os.getenv("POLLER_SHARD_TTL", "15")),  # in seconds
+            "virtual_nodes": int(os.getenv("POLLER_SHARD_VIRTUAL_NODES", "128")),
+        }
+
+        # Poll scheduler: each metric class is polled on its own interval,
+        # which a device can override when it is added
+        self.SCHEDULER: Dict[str, Any] = {
+            "intervals": {
+                "traffic_logs": int(os.getenv("POLL_TRAFFIC_LOGS_INTERVAL", "30")),  # in seconds
+                "system_info": int(os.getenv("POLL_SYSTEM_INFO_INTERVAL", "300")),  # in seconds
+            },
+            "jitter": float(os.getenv("POLL_JITTER", "0.1")),  # fraction of the interval
+            "workers": int(os.getenv("POLL_WORKERS", "8")),
+            "lag_samples": int(os.getenv("POLL_LAG_SAMPLES", "1024")),
+        }
+
+        # Vendor API calls: per-device deadlines, circuit breaker and hedging.
+        # Devices can override the timeouts and hedging in their extra_params.
+        self.DEVICE_HTTP: Dict[str, Any] = {
+            "connect_timeout": float(os.getenv("DEVICE_CONNECT_TIMEOUT", "3")),  # in seconds
+            "read_timeout": float(os.getenv("DEVICE_READ_TIMEOUT", "10")),  # in seconds
+            "failure_threshold": int(os.getenv("DEVICE_BREAKER_FAILURES", "3")),  # consecutive failures
+            "backoff_initial": float(os.getenv("DEVICE_BREAKER_BACKOFF", "5")),  # in seconds
+            "backoff_max": float(os.getenv("DEVICE_BREAKER_BACKOFF_MAX", "300")),  # in seconds
+            "hedge": os.getenv("DEVICE_HEDGE_ENABLED", "false").lower() == "true",
+            "hedge_delay": float(os.getenv("DEVICE_HEDGE_DELAY", "2")),  # in seconds
+            "hedge_workers": int(os.getenv("DEVICE_HEDGE_WORKERS", "32")),
+        }
+
+        # Vendor API rate shaping: one token bucket per device, shared by the
+        # poller, the info endpoints and every worker process on the host
+        self.DEVICE_RATE_LIMIT: Dict[str, Any] = {
+            "enabled": os.getenv("DEVICE_RATE_LIMIT_ENABLED", "true").lower() == "true",
+            # Requests per second and burst per device, by vendor; devices can
+            # override them with extra_params["rate_limit"]
+            "vendors": {
+                "palo_alto": {
+                    "rate": float(os.getenv("PALO_ALTO_RATE_LIMIT", "5")),
+                    "burst": float(os.getenv("PALO_ALTO_RATE_BURST", "10")),
+                },
+                "fortigate": {
+                    "rate": float(os.getenv("FORTIGATE_RATE_LIMIT", "10")),
+                    "burst": float(os.getenv("FORTIGATE_RATE_BURST", "20")),
+                },
+                "unifi": {
+                    "rate": float(os.getenv("UNIFI_RATE_LIMIT", "5")),
+                    "burst": float(os.getenv("UNIFI_RATE_BURST", "10")),
+                },
+            },
+            # Share of each bucket background polling may not use, so
+            # interactive requests skip ahead
+            "interactive_reserve": float(os.getenv("DEVICE_RATE_INTERACTIVE_RESERVE", "0.3")),
+            "max_wait": {
+                "interactive": float(os.getenv("DEVICE_RATE_MAX_WAIT_INTERACTIVE", "5")),  # in seconds
+                "background": float(os.getenv("DEVICE_RATE_MAX_WAIT_BACKGROUND", "30")),  # in seconds
+            },
+            "storage_path": os.getenv(
+                "DEVICE_RATE_LIMIT_STORAGE_PATH",
+                "/dev/shm/fms-device-ratelimit" if os.path.isdir("/dev/shm") else "data/device-ratelimit.shm"
+            ),
+            "slots": int(os.getenv("DEVICE_RATE_LIMIT_SLOTS", "16384")),
+            "shards": int(os.getenv("DEVICE_RATE_LIMIT_SHARDS", "64")),
+        }
+
+        # Device inventory: pollers apply inventory changes every
+        # sync_interval, reading at most sync_batch_size devices per query
+        self.INVENTORY: Dict[str, Any] = {
+            "enabled": os.getenv("INVENTORY_ENABLED", "true").lower() == "true",
+            "sync_interval": float(os.getenv("INVENTORY_SYNC_INTERVAL", "5")),  # in seconds
+            "sync_batch_size": int(os.getenv("INVENTORY_SYNC_BATCH_SIZE", "5000")),
+            "max_page_size": int(os.getenv("INVENTORY_MAX_PAGE_SIZE", "1000")),
+            "write_attempts": int(os.getenv("INVENTORY_WRITE_ATTEMPTS", "5")),
+        }
+
+        # Info endpoints: device info is cached per (vendor, device, params)
+        # and served stale while one background fetch refreshes it
+        self.INFO_CACHE: Dict[str, Any] = {
+            "enabled": os.getenv("INFO_CACHE_ENABLED", "true").lower() == "true",
+            "ttl": float(os.getenv("INFO_CACHE_TTL", "30")),  # in seconds
+            "stale_ttl": float(os.getenv("INFO_CACHE_STALE_TTL", "300")),  # in seconds past ttl
+            "max_entries": int(os.getenv("INFO_CACHE_MAX_ENTRIES", "4096")),
+            "refresh_workers": int(os.getenv("INFO_CACHE_REFRESH_WORKERS", "4")),
+        }
+
+        # Info endpoints: device calls run on a bounded thread pool, within
+        # the deadline the client asks for (capped at max_deadline)
+        self.INFO_REQUESTS: Dict[str, Any] = {
+            "workers": int(os.getenv("INFO_REQUEST_WORKERS", "32")),
+            "default_deadline": float(os.getenv("INFO_REQUEST_DEADLINE", "15")),  # in seconds
+            "max_deadline": float(os.getenv("INFO_REQUEST_MAX_DEADLINE", "60")),  # in seconds
+            # Bulk requests: most devices fetched at once, and listed, per request
+            "bulk_concurrency": int(os.getenv("INFO_BULK_CONCURRENCY", "16")),
+            "bulk_max_devices": int(os.getenv("INFO_BULK_MAX_DEVICES", "1000")),
+        }
+
+# Create a singleton instance
+polling_settings = PollingSettings()
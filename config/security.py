@@ -36,7 +36,14 @@ class SecuritySettings:
         self.RATE_LIMIT: Dict[str, Any] = {
             "enabled": os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
             "requests": int(os.getenv("RATE_LIMIT_REQUESTS", "100")),
-            "window": int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # in seconds
+            "window": int(os.getenv("RATE_LIMIT_WINDOW", "60")),  # in seconds
+            # Host-wide counters shared by all worker processes
+            "storage_path": os.getenv(
+                "RATE_LIMIT_STORAGE_PATH",
+                "/dev/shm/fms-ratelimit" if os.path.isdir("/dev/shm") else "data/ratelimit.shm"
+            ),
+            "slots": int(os.getenv("RATE_LIMIT_SLOTS", "65536")),
+            "shards": int(os.getenv("RATE_LIMIT_SHARDS", "64"))
         }
         
         # Session Configuration
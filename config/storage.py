@@ -0,0 +1,59 @@
+import os
+from typing import Dict, Any
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class StorageSettings:
+    def __init__(self):
+        # Database Configuration
+        self.DATABASE: Dict[str, Any] = {
+            "path": os.getenv("DATABASE_PATH", "data/firewall_manager.db"),
+            # "wal" enables write-ahead logging with a single writer connection
+            # and a pool of read-only connections; "rollback" keeps SQLite's
+            # default journal and one shared engine
+            "mode": os.getenv("DATABASE_MODE", "wal").lower(),
+            "busy_timeout": int(os.getenv("DATABASE_BUSY_TIMEOUT", "5000")),  # in milliseconds
+            "writer_timeout": int(os.getenv("DATABASE_WRITER_TIMEOUT", "30")),  # in seconds
+        }
+
+        # SQLite PRAGMA tuning applied to every connection in WAL mode
+        self.SQLITE_PRAGMAS: Dict[str, Any] = {
+            "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+            "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),  # in bytes
+            "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative = KiB
+            "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+        }
+
+        # Read-only connection pool used by API queries
+        self.READER_POOL: Dict[str, Any] = {
+            "size": int(os.getenv("DATABASE_READER_POOL_SIZE", "8")),
+            "max_overflow": int(os.getenv("DATABASE_READER_MAX_OVERFLOW", "8")),
+            "timeout": int(os.getenv("DATABASE_READER_POOL_TIMEOUT", "30")),  # in seconds
+        }
+
+        # Cold-tier archive of history tables to Parquet
+        self.ARCHIVE: Dict[str, Any] = {
+            "enabled": os.getenv("ARCHIVE_ENABLED", "true").lower() == "true",
+            "path": os.getenv("ARCHIVE_PATH", "data/archive"),
+            "hot_days": int(os.getenv("ARCHIVE_HOT_DAYS", "7")),  # rows older than this move to the archive
+            "retention_days": int(os.getenv("ARCHIVE_RETENTION_DAYS", "395")),  # ~13 months
+            "interval": int(os.getenv("ARCHIVE_INTERVAL", "3600")),  # in seconds
+            "batch_size": int(os.getenv("ARCHIVE_BATCH_SIZE", "50000")),  # rows per Parquet file
+            "compression": os.getenv("ARCHIVE_COMPRESSION", "zstd"),
+        }
+
+        # In-memory ring buffer serving recent metrics windows. Each series
+        # (source, metric_type) holds a fixed number of points, 24 bytes each.
+        # The buffer is per process and only sees what that process ingests,
+        # so it is off by default: enable it only when one process does all
+        # the ingesting and serves the API (one worker, POLLER_SHARDS=1).
+        self.METRICS_BUFFER: Dict[str, Any] = {
+            "enabled": os.getenv("METRICS_BUFFER_ENABLED", "false").lower() == "true",
+            "window_minutes": int(os.getenv("METRICS_BUFFER_WINDOW_MINUTES", "60")),
+            "capacity": int(os.getenv("METRICS_BUFFER_CAPACITY", "720")),  # points per series
+        }
+
+# Create a singleton instance
+storage_settings = StorageSettings()
@@ -1,31 +1,52 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Match
 from starlette.middleware.sessions import SessionMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from pydantic import BaseModel
+import secrets
 import threading
+import time
 import os
 import logging
 from datetime import timedelta
 from typing import Optional
 import socket
 
-from services.palo_alto_service import get_palo_alto_info
-from services.fortigate_service import get_fortigate_info
-from services.unifi_service import get_unifi_info
+from services.device_info import get_device_info
 from services.monitoring_service import MonitoringService
+from services.shared_rate_limit import SharedTokenBuckets
+from services.leader_election import LeaderElection
+from services.sharding import ShardedPoller
+from services import metrics
+from services.request_timing import (
+    RequestTimingMiddleware, TimedGZipMiddleware, TimedJSONResponse, instrument_engines
+)
 from services.auth_service import (
-    User, authenticate_user, create_access_token, 
+    User, authenticate_user_async, create_access_token, 
     get_current_active_user, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from routes.firewall_rules import router as firewall_rules_router
 from routes.view_preferences import router as view_preferences_router
+from routes.pollers import router as pollers_router
+from routes.admin import router as admin_router
+from routes.device_info import router as device_info_router
+from routes.inventory import router as inventory_router
+from backend.routers.network_monitoring import router as network_monitoring_router
+from backend.routes.alerts import router as alerts_router
+from backend.services.archive_service import history_archiver
+from backend.services.alert_grouping import alert_grouper
+from backend.services.email_service import email_service
+from backend.services.notification_dispatcher import notification_dispatcher
 from models import init_db
+from models.database import engine, writer_engine, read_engine, async_engine, async_read_engine
 from config.security import security_settings
+from config.polling import polling_settings
+from config.observability import observability_settings
 
 # Configure logging
 logging.basicConfig(
@@ -54,7 +75,8 @@ def get_ip_addresses():
 app = FastAPI(
     title="Firewall Management System",
     description="API for monitoring Fortigate, Palo Alto, and UniFi firewalls",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TimedJSONResponse
 )
 
 # Configure CORS
@@ -81,13 +103,60 @@ app.add_middleware(
 )
 
 # Add GZip compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(TimedGZipMiddleware, minimum_size=1000)
 
 # Configure rate limiting
 limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Enforce RATE_LIMIT per client across all workers on this host
+rate_limit_buckets = SharedTokenBuckets(
+    security_settings.RATE_LIMIT["storage_path"],
+    slots=security_settings.RATE_LIMIT["slots"],
+    shards=security_settings.RATE_LIMIT["shards"]
+)
+
+@app.middleware("http")
+async def enforce_rate_limit(request, call_next):
+    rate_limit = security_settings.RATE_LIMIT
+    if not rate_limit["enabled"]:
+        return await call_next(request)
+    allowed, retry_after = rate_limit_buckets.acquire(
+        get_remote_address(request),
+        rate=rate_limit["requests"] / rate_limit["window"],
+        capacity=rate_limit["requests"]
+    )
+    if not allowed:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": f"Rate limit exceeded: {rate_limit['requests']} per {rate_limit['window']} second"},
+            headers={"Retry-After": str(int(retry_after) + 1)}
+        )
+    return await call_next(request)
+
+# Per-route request latency
+http_request_seconds = metrics.registry.histogram(
+    "fms_http_request_seconds", "API request latency", ["method", "route", "status"]
+)
+
+def _route_template(request) -> str:
+    # Label by route template, not raw path, to keep the series count bounded
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_latency(request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    http_request_seconds.labels(
+        request.method, _route_template(request), response.status_code
+    ).observe(time.perf_counter() - started)
+    return response
+
 # Add session middleware
 app.add_middleware(
     SessionMiddleware,
@@ -99,9 +168,20 @@ app.add_middleware(
     samesite=security_settings.SESSION_CONFIG["samesite"]
 )
 
+# Report db, serialize and compress time per request in Server-Timing; added
+# last so it wraps every other middleware
+instrument_engines(engine, writer_engine, read_engine, async_engine, async_read_engine)
+app.add_middleware(RequestTimingMiddleware)
+
 # Include routers
 app.include_router(firewall_rules_router)
 app.include_router(view_preferences_router)
+app.include_router(pollers_router)
+app.include_router(admin_router)
+app.include_router(device_info_router)
+app.include_router(inventory_router)
+app.include_router(network_monitoring_router, prefix="/api", dependencies=[Depends(get_current_active_user)])
+app.include_router(alerts_router)
 
 # Initialize database
 init_db()
@@ -125,7 +205,7 @@ class UserInDB(User):
 # Authentication endpoints
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: dict):
-    user = authenticate_user(form_data["username"], form_data["password"])
+    user = await authenticate_user_async(form_data["username"], form_data["password"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -138,6 +218,16 @@ async def login_for_access_token(form_data: dict):
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    config = observability_settings.METRICS
+    # Without a scrape token the endpoint stays hidden rather than open
+    if not config["enabled"] or not config["token"]:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {config['token']}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Protected routes
 @app.get("/")
 async def index(current_user: User = Depends(get_current_active_user)):
@@ -148,15 +238,35 @@ async def index(current_user: User = Depends(get_current_active_user)):
         "user": current_user.username
     }
 
+async def _device_info(vendor: str, config: FirewallConfigRequest, max_age: Optional[float],
+                       deadline: Optional[float], response: Response):
+    """Fetch device info within the client's deadline and describe the outcome in headers"""
+    info = await get_device_info(
+        vendor, config.hostname, config.token, config.extra_params, max_age=max_age, timeout=deadline
+    )
+    if info["timed_out"] and info["data"] is None:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                            detail=f"No answer from {config.hostname} within the deadline")
+    response.headers["X-Cache"] = info["cache"].upper()
+    response.headers["Age"] = str(int(info["age"]))
+    if info["timed_out"]:
+        response.headers["X-Timed-Out"] = "true"
+    return info["data"]
+
 @app.post("/paloalto/info")
 async def palo_alto_info(
     config: FirewallConfigRequest,
+    response: Response,
+    max_age: Optional[float] = Query(None, ge=0, description="Oldest cached info to accept, in seconds"),
+    deadline: Optional[float] = Query(None, gt=0, description="Seconds to wait for the device"),
     current_user: User = Depends(get_current_active_user)
 ):
     try:
         logger.info(f"Retrieving Palo Alto info from {config.hostname}")
-        data = get_palo_alto_info(config.hostname, config.token, config.extra_params)
+        data = await _device_info("palo_alto", config, max_age, deadline, response)
         return {"palo_alto_data": data}
+    except HTTPException:
+        raise
     except Exception as exc:
         logger.error(f"Error retrieving Palo Alto info: {str(exc)}")
         raise HTTPException(status_code=500, detail=str(exc))
@@ -164,12 +274,17 @@ async def palo_alto_info(
 @app.post("/fortigate/info")
 async def fortigate_info(
     config: FirewallConfigRequest,
+    response: Response,
+    max_age: Optional[float] = Query(None, ge=0, description="Oldest cached info to accept, in seconds"),
+    deadline: Optional[float] = Query(None, gt=0, description="Seconds to wait for the device"),
     current_user: User = Depends(get_current_active_user)
 ):
     try:
         logger.info(f"Retrieving Fortigate info from {config.hostname}")
-        data = get_fortigate_info(config.hostname, config.token, config.extra_params)
+        data = await _device_info("fortigate", config, max_age, deadline, response)
         return {"fortigate_data": data}
+    except HTTPException:
+        raise
     except Exception as exc:
         logger.error(f"Error retrieving Fortigate info: {str(exc)}")
         raise HTTPException(status_code=500, detail=str(exc))
@@ -177,25 +292,93 @@ async def fortigate_info(
 @app.post("/unifi/info")
 async def unifi_info(
     config: FirewallConfigRequest,
+    response: Response,
+    max_age: Optional[float] = Query(None, ge=0, description="Oldest cached info to accept, in seconds"),
+    deadline: Optional[float] = Query(None, gt=0, description="Seconds to wait for the device"),
     current_user: User = Depends(get_current_active_user)
 ):
     try:
         logger.info(f"Retrieving UniFi info from {config.hostname}")
-        data = get_unifi_info(config.hostname, config.token, config.extra_params)
+        data = await _device_info("unifi", config, max_age, deadline, response)
         return {"unifi_data": data}
+    except HTTPException:
+        raise
     except Exception as exc:
         logger.error(f"Error retrieving UniFi info: {str(exc)}")
         raise HTTPException(status_code=500, detail=str(exc))
 
 # Initialize our monitoring service
-monitoring_service = MonitoringService(interval=60)  # 60s interval
+monitoring_service = MonitoringService()  # Intervals per metric class from POLL_*_INTERVAL
+app.state.monitoring_service = monitoring_service
+
+# With POLLER_SHARDS > 1 the devices are polled by that many worker processes
+sharded_poller = ShardedPoller(monitoring_service)
+
+# Poller and archiver threads, running only in the elected leader process
+background_threads = {}
+
+def start_background_jobs():
+    logger.info("Starting monitoring service")
+    if polling_settings.SHARDING["workers"] > 1:
+        jobs = {"monitoring": sharded_poller}
+    else:
+        jobs = {"monitoring": monitoring_service}
+    # Move history past the hot window to the Parquet archive
+    if history_archiver.config["enabled"]:
+        jobs["archiver"] = history_archiver
+
+    for name, service in jobs.items():
+        service.running = True
+        # A thread stopped on a lost lease may still be sleeping; it resumes
+        # on its own, so only start one if it has exited
+        thread = background_threads.get(name)
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=service.run, daemon=True)
+            thread.start()
+            background_threads[name] = thread
+
+def stop_background_jobs():
+    monitoring_service.stop()
+    sharded_poller.stop()
+    history_archiver.stop()
+
+# Only one process per host polls the firewalls, however many workers run
+poller_election = LeaderElection(
+    "poller", on_elected=start_background_jobs, on_revoked=stop_background_jobs
+)
+
+def notify_alert_event(event: str, alert: dict):
+    """Email the admin once per distinct alert the rule engine raises or resolves"""
+    if event == "resolved":
+        alert = {**alert, "message": f"Resolved: {alert['message']}"}
+    email_service.send_admin_notification(alert)
+
+if email_service.admin_email:
+    alert_grouper.add_listener(notify_alert_event)
 
 @app.on_event("startup")
 async def start_monitoring():
-    logger.info("Starting monitoring service")
-    # Start monitoring in a separate thread
-    monitoring_thread = threading.Thread(target=monitoring_service.run, daemon=True)
-    monitoring_thread.start()
+    metrics.start_publisher()
+    if observability_settings.METRICS["enabled"] and not observability_settings.METRICS["token"]:
+        logger.warning("METRICS_TOKEN is not set; /metrics will not be served")
+    # Deliver the notifications left in the outbox by the last run
+    notification_dispatcher.start()
+    if not polling_settings.LEADER_ELECTION["enabled"]:
+        start_background_jobs()
+        return
+    election_thread = threading.Thread(target=poller_election.run, daemon=True)
+    election_thread.start()
+
+@app.on_event("shutdown")
+async def stop_monitoring():
+    if polling_settings.LEADER_ELECTION["enabled"]:
+        poller_election.stop()
+    else:
+        stop_background_jobs()
+    # Write the alert counts and resolutions still waiting for a flush
+    alert_grouper.flush(force=True)
+    email_service.stop()
+    notification_dispatcher.stop()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,6 +1,10 @@
 from .database import Base, engine
 from .user import User
+from .view_preference import ViewPreference
 from .firewall_rule import FirewallRule
+from .leader_lease import LeaderLease
+from .poller_shard import PollerShard
+from .device import Device, DeviceTag
 
 # Create all tables
 def init_db():
@@ -1,21 +1,108 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean
+from sqlalchemy import create_engine, event, Column, Integer, String, Boolean
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
+from config.storage import storage_settings
+
+DATABASE_PATH = storage_settings.DATABASE["path"]
+WAL_MODE = storage_settings.DATABASE["mode"] == "wal"
+
 # Create database directory if it doesn't exist
-os.makedirs("data", exist_ok=True)
+os.makedirs(os.path.dirname(DATABASE_PATH) or ".", exist_ok=True)
 
 # SQLite database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///data/firewall_manager.db"
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+
+# Async SQLite database URL (same file, served through aiosqlite)
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
+
+# Read-only URLs used by the reader pool in WAL mode
+READ_ONLY_DATABASE_URL = f"sqlite:///file:{DATABASE_PATH}?mode=ro&uri=true"
+ASYNC_READ_ONLY_DATABASE_URL = f"sqlite+aiosqlite:///file:{DATABASE_PATH}?mode=ro&uri=true"
+
+def _configure_connection(dbapi_connection, connection_record):
+    """Apply busy timeout and, in WAL mode, the tuned PRAGMAs to a new connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={storage_settings.DATABASE['busy_timeout']}")
+    if WAL_MODE:
+        for name, value in storage_settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def _enable_wal(dbapi_connection, connection_record):
+    """Switch the database file to write-ahead logging (persists in the file)"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+def _create_engine(url: str, writable: bool = True, **kwargs):
+    new_engine = create_engine(url, connect_args={"check_same_thread": False}, **kwargs)
+    event.listen(new_engine, "connect", _configure_connection)
+    if WAL_MODE and writable:
+        event.listen(new_engine, "connect", _enable_wal)
+    return new_engine
+
+def _create_async_engine(url: str, writable: bool = True, **kwargs):
+    new_engine = create_async_engine(url, **kwargs)
+    event.listen(new_engine.sync_engine, "connect", _configure_connection)
+    if WAL_MODE and writable:
+        event.listen(new_engine.sync_engine, "connect", _enable_wal)
+    return new_engine
 
 # Create engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+
+# Create async engine
+async_engine = _create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+
+if WAL_MODE:
+    # Ingestion goes through exactly one connection so writers never contend
+    # for the database lock; callers queue on the pool instead
+    writer_engine = _create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=storage_settings.DATABASE["writer_timeout"]
+    )
+
+    # API queries read from a pool of read-only connections, which WAL lets
+    # run concurrently with the writer
+    reader_pool = storage_settings.READER_POOL
+    read_engine = _create_engine(
+        READ_ONLY_DATABASE_URL,
+        writable=False,
+        pool_size=reader_pool["size"],
+        max_overflow=reader_pool["max_overflow"],
+        pool_timeout=reader_pool["timeout"]
+    )
+    async_read_engine = _create_async_engine(
+        ASYNC_READ_ONLY_DATABASE_URL,
+        writable=False,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=reader_pool["size"],
+        max_overflow=reader_pool["max_overflow"],
+        pool_timeout=reader_pool["timeout"]
+    )
+else:
+    writer_engine = engine
+    read_engine = engine
+    async_read_engine = async_engine
 
-# Create session factory
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WriterSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Create async session factories
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Create base class for models
 Base = declarative_base()
@@ -26,4 +113,22 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Dependency to get a read-only DB session
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency to get async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency to get a read-only async DB session
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
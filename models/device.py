@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Boolean, Float, JSON, ForeignKey
+from sqlalchemy.orm import relationship
+from .database import Base
+
+class Device(Base):
+    __tablename__ = "devices"
+
+    id = Column(Integer, primary_key=True, index=True)
+    hostname = Column(String, unique=True, index=True, nullable=False)
+    firewall_type = Column(String, index=True, nullable=False)  # 'palo_alto', 'fortigate' or 'unifi'
+    site = Column(String, index=True)
+    token = Column(String, nullable=False)
+    extra_params = Column(JSON)
+    intervals = Column(JSON)  # Poll interval overrides by metric class
+    enabled = Column(Boolean, default=True)
+    # Deleted devices are kept as tombstones so pollers see the deletion
+    deleted = Column(Boolean, default=False, index=True)
+    # Inventory-wide change counter; pollers fetch rows above the last one seen
+    revision = Column(Integer, unique=True, index=True, nullable=False)
+    created_at = Column(Float)  # Epoch seconds
+    updated_at = Column(Float)  # Epoch seconds
+
+    tags = relationship("DeviceTag", back_populates="device", cascade="all, delete-orphan", lazy="selectin")
+
+class DeviceTag(Base):
+    __tablename__ = "device_tags"
+
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String, primary_key=True, index=True)
+
+    device = relationship("Device", back_populates="tags")
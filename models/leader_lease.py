@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, Float
+from .database import Base
+
+class LeaderLease(Base):
+    __tablename__ = "leader_leases"
+
+    name = Column(String, primary_key=True)  # Role being led, e.g. 'poller'
+    holder = Column(String, nullable=False)  # hostname:pid:nonce of the leader
+    expires_at = Column(Float, nullable=False)  # Epoch seconds
+    heartbeat_at = Column(Float)  # Epoch seconds of the last renewal
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Float, JSON
+from .database import Base
+
+class PollerShard(Base):
+    __tablename__ = "poller_shards"
+
+    shard_id = Column(String, primary_key=True)  # Stable id, e.g. hostname-0
+    host = Column(String, nullable=False)
+    pid = Column(Integer)
+    started_at = Column(Float)  # Epoch seconds
+    heartbeat_at = Column(Float, index=True)  # Epoch seconds
+    device_count = Column(Integer, default=0)
+    devices = Column(JSON)  # Hostnames assigned at the last heartbeat
+    schedule_stats = Column(JSON)  # Poll scheduler lag and counters
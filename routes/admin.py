@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from services.auth_service import User, get_current_admin_user
+from services.profiler import sampling_profiler, ProfilerBusy
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"]
+)
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile_process(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(None, gt=0),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Sample this worker process for ``seconds`` and return collapsed stacks,
+    ready for flamegraph.pl or speedscope.
+    """
+    try:
+        stacks = await run_in_threadpool(
+            sampling_profiler.profile, seconds, interval_ms / 1000 if interval_ms else None
+        )
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    return PlainTextResponse(
+        stacks, headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'}
+    )
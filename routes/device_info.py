@@ -0,0 +1,96 @@
+import asyncio
+import json
+import time
+import logging
+from typing import List, Optional, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from services.auth_service import User, get_current_active_user
+from services.device_info import get_device_info
+from config.polling import polling_settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/devices",
+    tags=["devices"]
+)
+
+class DeviceInfoTarget(BaseModel):
+    type: Literal["palo_alto", "fortigate", "unifi"]
+    hostname: str
+    token: str
+    extra_params: dict = {}
+
+class BulkInfoRequest(BaseModel):
+    devices: List[DeviceInfoTarget]
+    concurrency: Optional[int] = Field(None, gt=0)
+    deadline: Optional[float] = Field(None, gt=0)  # in seconds, per device
+    max_age: Optional[float] = Field(None, ge=0)  # in seconds
+
+async def _fetch(index: int, device: DeviceInfoTarget, request: BulkInfoRequest,
+                 semaphore: asyncio.Semaphore) -> dict:
+    async with semaphore:
+        started = time.perf_counter()
+        result = {"index": index, "type": device.type, "hostname": device.hostname}
+        try:
+            info = await get_device_info(
+                device.type, device.hostname, device.token, device.extra_params,
+                max_age=request.max_age, timeout=request.deadline
+            )
+            result.update(
+                ok=info["data"] is not None,
+                data=info["data"],
+                cache=info["cache"],
+                age=info["age"],
+                timed_out=info["timed_out"]
+            )
+        except Exception as exc:
+            logger.error(f"Error retrieving {device.type} info from {device.hostname}: {str(exc)}")
+            result.update(ok=False, error=str(exc))
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+@router.post("/info/bulk")
+async def bulk_device_info(
+    request: BulkInfoRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Fetch info from many devices at once, streamed as NDJSON.
+
+    Devices are fetched concurrently (at most ``concurrency`` at a time) and
+    each result is written as one JSON line as soon as it is ready, so lines
+    arrive in completion order; ``index`` refers back to the request.
+    """
+    config = polling_settings.INFO_REQUESTS
+    if len(request.devices) > config["bulk_max_devices"]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {config['bulk_max_devices']} devices per request"
+        )
+    concurrency = min(request.concurrency or config["bulk_concurrency"], config["bulk_concurrency"])
+    semaphore = asyncio.Semaphore(concurrency)
+    logger.info(f"Retrieving info from {len(request.devices)} devices, {concurrency} at a time")
+
+    async def results():
+        tasks = [
+            asyncio.create_task(_fetch(index, device, request, semaphore))
+            for index, device in enumerate(request.devices)
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield json.dumps(await task, default=str) + "\n"
+        finally:
+            # Client went away: stop fetching for it
+            for task in tasks:
+                task.cancel()
+
+    # Identity encoding keeps the gzip middleware from holding lines back
+    # until it has a compressible block
+    return StreamingResponse(
+        results(), media_type="application/x-ndjson", headers={"Content-Encoding": "identity"}
+    )
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime
 
-from models.database import get_db
+from models.database import get_async_db
 from models.user import User
 from models.firewall_rule import FirewallRule
 from schemas.firewall_rule import FirewallRuleCreate, FirewallRuleUpdate, FirewallRule
@@ -15,9 +16,9 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=FirewallRule)
-def create_firewall_rule(
+async def create_firewall_rule(
     rule: FirewallRuleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     db_rule = FirewallRule(
@@ -27,39 +28,40 @@ def create_firewall_rule(
         updated_at=datetime.utcnow().isoformat()
     )
     db.add(db_rule)
-    db.commit()
-    db.refresh(db_rule)
+    await db.commit()
+    await db.refresh(db_rule)
     return db_rule
 
 @router.get("/", response_model=List[FirewallRule])
-def get_firewall_rules(
+async def get_firewall_rules(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    rules = db.query(FirewallRule).offset(skip).limit(limit).all()
+    result = await db.execute(select(FirewallRule).offset(skip).limit(limit))
+    rules = result.scalars().all()
     return rules
 
 @router.get("/{rule_id}", response_model=FirewallRule)
-def get_firewall_rule(
+async def get_firewall_rule(
     rule_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    rule = db.query(FirewallRule).filter(FirewallRule.id == rule_id).first()
+    rule = await db.get(FirewallRule, rule_id)
     if rule is None:
         raise HTTPException(status_code=404, detail="Firewall rule not found")
     return rule
 
 @router.put("/{rule_id}", response_model=FirewallRule)
-def update_firewall_rule(
+async def update_firewall_rule(
     rule_id: int,
     rule_update: FirewallRuleUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_rule = db.query(FirewallRule).filter(FirewallRule.id == rule_id).first()
+    db_rule = await db.get(FirewallRule, rule_id)
     if db_rule is None:
         raise HTTPException(status_code=404, detail="Firewall rule not found")
     
@@ -75,17 +77,17 @@ def update_firewall_rule(
         setattr(db_rule, field, value)
     
     db_rule.updated_at = datetime.utcnow().isoformat()
-    db.commit()
-    db.refresh(db_rule)
+    await db.commit()
+    await db.refresh(db_rule)
     return db_rule
 
 @router.delete("/{rule_id}")
-def delete_firewall_rule(
+async def delete_firewall_rule(
     rule_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_rule = db.query(FirewallRule).filter(FirewallRule.id == rule_id).first()
+    db_rule = await db.get(FirewallRule, rule_id)
     if db_rule is None:
         raise HTTPException(status_code=404, detail="Firewall rule not found")
     
@@ -96,6 +98,6 @@ def delete_firewall_rule(
             detail="Not enough permissions"
         )
     
-    db.delete(db_rule)
-    db.commit()
+    await db.delete(db_rule)
+    await db.commit()
     return {"message": "Firewall rule deleted successfully"} 
\ No newline at end of file
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+
+from services.auth_service import User, get_current_active_user, get_current_admin_user
+from services.device_inventory import device_inventory, DeviceExists, DeviceNotFound
+from schemas.device import DeviceCreate, DeviceUpdate, Device
+
+router = APIRouter(
+    prefix="/devices",
+    tags=["devices"]
+)
+
+@router.post("/", response_model=Device, status_code=status.HTTP_201_CREATED)
+async def create_device(
+    device: DeviceCreate,
+    current_user: User = Depends(get_current_admin_user)
+):
+    try:
+        return await run_in_threadpool(device_inventory.create, device.model_dump())
+    except DeviceExists as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+@router.get("/", response_model=List[Device])
+async def list_devices(
+    firewall_type: Optional[str] = None,
+    site: Optional[str] = None,
+    tag: Optional[str] = None,
+    limit: int = Query(100, gt=0),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_user)
+):
+    return await run_in_threadpool(device_inventory.list, firewall_type, site, tag, limit, offset)
+
+@router.get("/{hostname}", response_model=Device)
+async def get_device(
+    hostname: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    try:
+        return await run_in_threadpool(device_inventory.get, hostname)
+    except DeviceNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+@router.put("/{hostname}", response_model=Device)
+async def update_device(
+    hostname: str,
+    device_update: DeviceUpdate,
+    current_user: User = Depends(get_current_admin_user)
+):
+    try:
+        return await run_in_threadpool(
+            device_inventory.update, hostname, device_update.model_dump(exclude_unset=True)
+        )
+    except DeviceNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+@router.delete("/{hostname}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_device(
+    hostname: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Remove a device; pollers stop polling it at their next inventory sync"""
+    try:
+        await run_in_threadpool(device_inventory.delete, hostname)
+    except DeviceNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+
+from services.auth_service import User, get_current_active_user
+from services.sharding import get_shard_status
+from config.polling import polling_settings
+
+router = APIRouter(
+    prefix="/pollers",
+    tags=["pollers"]
+)
+
+@router.get("/shards")
+async def list_poller_shards(
+    include_devices: bool = False,
+    current_user: User = Depends(get_current_active_user)
+):
+    shards = await run_in_threadpool(get_shard_status, include_devices)
+    return {
+        "shards": shards,
+        "healthy": sum(1 for shard in shards if shard["healthy"]),
+        "devices": sum(shard["device_count"] or 0 for shard in shards if shard["healthy"])
+    }
+
+@router.get("/schedule")
+async def get_poll_schedule(
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Schedule lag per metric class, from each shard when polling is sharded"""
+    if polling_settings.SHARDING["workers"] > 1:
+        shards = await run_in_threadpool(get_shard_status)
+        return {"shards": {shard["shard_id"]: shard["schedule"] for shard in shards if shard["healthy"]}}
+    return request.app.state.monitoring_service.schedule_stats()
+
+@router.get("/devices")
+async def get_device_states(
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Circuit breaker state per device, from each shard when polling is sharded"""
+    if polling_settings.SHARDING["workers"] > 1:
+        shards = await run_in_threadpool(get_shard_status)
+        devices = {}
+        for shard in shards:
+            if shard["healthy"] and shard["schedule"]:
+                devices.update(shard["schedule"].get("devices", {}))
+        return {"devices": devices}
+    return {"devices": request.app.state.monitoring_service.device_states()}
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+
+class DeviceBase(BaseModel):
+    firewall_type: Literal["palo_alto", "fortigate", "unifi"]
+    site: Optional[str] = None
+    tags: List[str] = []
+    extra_params: dict = {}
+    intervals: Dict[str, int] = {}  # Poll interval overrides by metric class, 0 disables
+    enabled: bool = True
+
+class DeviceCreate(DeviceBase):
+    hostname: str
+    token: str
+
+class DeviceUpdate(DeviceBase):
+    firewall_type: Optional[Literal["palo_alto", "fortigate", "unifi"]] = None
+    token: Optional[str] = None
+    tags: Optional[List[str]] = None
+    extra_params: Optional[dict] = None
+    intervals: Optional[Dict[str, int]] = None
+    enabled: Optional[bool] = None
+
+class Device(DeviceBase):
+    # The API token is write-only and credentials in extra_params are
+    # returned as "********"; sending that value back keeps them unchanged
+    id: int
+    hostname: str
+    revision: int
+    created_at: float
+    updated_at: float
@@ -1,23 +1,42 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel, EmailStr
 import os
+import time
+import asyncio
+import hashlib
+import threading
 import logging
 
+from .metrics import registry
+
 logger = logging.getLogger(__name__)
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")  # Change this in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # decoded tokens kept in memory
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop while bounding how many cores logins can take
+password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+# Password verifications in flight, by username: (credentials digest, future)
+_inflight_logins: Dict[str, tuple] = {}
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -40,6 +59,98 @@ class UserUpdate(BaseModel):
 class User(UserBase):
     pass
 
+class TokenCache:
+    """
+    Bounded LRU cache of verified access tokens, keyed by the token's SHA-256.
+    Entries hold the decoded claims and the resolved user until the token's
+    ``exp`` and are dropped whenever that user changes.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._keys_by_user: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional["User"]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["exp"] <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["user"]
+
+    def put(self, token: str, claims: Dict[str, Any], user: "User"):
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = {"exp": claims.get("exp", 0), "claims": claims, "user": user}
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user.username, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, username: str):
+        """Drop every cached token belonging to ``username``"""
+        with self._lock:
+            for key in self._keys_by_user.pop(username, set()):
+                self._entries.pop(key, None)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        keys = self._keys_by_user.get(entry["user"].username)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry["user"].username]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+# Cache of verified access tokens
+token_cache = TokenCache()
+
+def _collect_token_cache():
+    stats = token_cache.stats()
+    return [
+        {
+            "name": "fms_token_cache_lookups_total",
+            "kind": "counter",
+            "documentation": "Access token cache lookups",
+            "samples": [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]
+        },
+        {
+            "name": "fms_token_cache_entries",
+            "kind": "gauge",
+            "documentation": "Access tokens held in the cache",
+            "samples": [({}, stats["size"])]
+        }
+    ]
+
+registry.register_collector(_collect_token_cache)
+
 # In-memory user database (replace with real database in production)
 users_db = {
     "admin": {
@@ -57,6 +168,10 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
 def get_user(username: str) -> Optional[User]:
     if username in users_db:
         user_dict = users_db[username]
@@ -112,6 +227,7 @@ def update_user(username: str, user_update: UserUpdate) -> User:
         del update_data["password"]
     
     users_db[username].update(update_data)
+    token_cache.invalidate_user(username)
     logger.info(f"Updated user: {username}")
     
     return get_user(username)
@@ -130,6 +246,7 @@ def delete_user(username: str):
         )
     
     del users_db[username]
+    token_cache.invalidate_user(username)
     logger.info(f"Deleted user: {username}")
 
 def authenticate_user(username: str, password: str) -> Optional[User]:
@@ -140,6 +257,49 @@ def authenticate_user(username: str, password: str) -> Optional[User]:
         return None
     return user
 
+async def authenticate_user_async(username: str, password: str) -> Optional[User]:
+    """
+    Non-blocking variant of ``authenticate_user``. bcrypt runs on
+    ``password_executor`` and at most one verification per username is in
+    flight: identical concurrent attempts share its result, other attempts
+    for the same username wait for it to finish.
+    """
+    user = get_user(username)
+    if not user:
+        return None
+
+    digest = hashlib.sha256(password.encode()).digest()
+    while username in _inflight_logins:
+        inflight_digest, inflight = _inflight_logins[username]
+        if inflight_digest == digest:
+            # The user may have been deleted while the check ran
+            return get_user(username) if await asyncio.shield(inflight) else None
+        if inflight.done():
+            # Finished but its owner has not resumed yet to clear the entry
+            del _inflight_logins[username]
+            continue
+        try:
+            await asyncio.shield(inflight)
+        except Exception:
+            pass
+
+    # The user may have been deleted or changed while we waited
+    user = get_user(username)
+    if not user:
+        return None
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(
+        password_executor, verify_password, password, users_db[username]["hashed_password"]
+    )
+    _inflight_logins[username] = (digest, future)
+    try:
+        verified = await asyncio.shield(future)
+    finally:
+        if _inflight_logins.get(username, (None, None))[1] is future:
+            del _inflight_logins[username]
+    return user if verified else None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -151,6 +311,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -166,6 +330,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     user = get_user(username=username)
     if user is None:
         raise credentials_exception
+    token_cache.put(token, payload, user)
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -175,4 +340,10 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
 
 # Check if user is admin
 def is_admin(username: str) -> bool:
-    return username == "admin" 
\ No newline at end of file
+    return username == "admin" 
+
+# Dependency for admin-only routes
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    if not is_admin(current_user.username):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
@@ -0,0 +1,288 @@
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, Optional
+
+import requests
+
+from .device_rate_limit import device_rate_limiter
+from .metrics import registry
+from config.polling import polling_settings
+
+logger = logging.getLogger(__name__)
+
+vendor_request_seconds = registry.histogram(
+    "fms_vendor_request_seconds", "Vendor API request latency", ["vendor", "outcome"]
+)
+circuit_rejections = registry.counter(
+    "fms_device_circuit_rejections_total", "Vendor calls refused by an open circuit breaker", ["device"]
+)
+
+# Monotonic time by which the current code path needs its vendor calls
+# answered, e.g. a client-specified deadline on an API request
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Bound vendor calls in this block to ``seconds`` from now (None: no bound)"""
+    token = request_deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        request_deadline.reset(token)
+
+class DeviceUnavailable(Exception):
+    """Raised without contacting a device whose circuit breaker is open"""
+
+class DeadlineExceeded(TimeoutError):
+    """Raised without contacting a device once the caller's deadline has passed"""
+
+class CircuitBreaker:
+    """
+    Per-device circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls fail immediately. Once the backoff has passed a single probe call is
+    let through (half-open); success closes the breaker, failure reopens it
+    with the backoff doubled, up to ``backoff_max``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, backoff_initial: float, backoff_max: float):
+        self.failure_threshold = failure_threshold
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.state = self.CLOSED
+        self.failures = 0
+        self.backoff = backoff_initial
+        self.opened_at = 0.0
+        self.retry_at = 0.0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the device now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() >= self.retry_at:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and time.time() < self.retry_at
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit closed after successful probe")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.backoff = self.backoff_initial
+
+    def release(self):
+        """End a call that says nothing about the device's health"""
+        with self._lock:
+            # An abandoned probe leaves the breaker open with the retry time
+            # already passed, so the next call probes again
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state == self.HALF_OPEN:
+                self.backoff = min(self.backoff * 2, self.backoff_max)
+            elif self.failures < self.failure_threshold:
+                return
+            self.state = self.OPEN
+            self.opened_at = time.time()
+            # Jitter keeps probes of devices that failed together apart
+            self.retry_at = self.opened_at + self.backoff * random.uniform(0.8, 1.2)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "backoff": self.backoff,
+            "retry_in": max(0.0, self.retry_at - time.time()) if self.state == self.OPEN else 0.0,
+            "last_error": self.last_error
+        }
+
+class DeviceBreakers:
+    """Circuit breakers keyed by device hostname"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or polling_settings.DEVICE_HTTP
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, hostname: str) -> CircuitBreaker:
+        breaker = self._breakers.get(hostname)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(hostname, CircuitBreaker(
+                    self.config["failure_threshold"],
+                    self.config["backoff_initial"],
+                    self.config["backoff_max"]
+                ))
+        return breaker
+
+    def is_open(self, hostname: str) -> bool:
+        breaker = self._breakers.get(hostname)
+        return breaker is not None and breaker.is_open()
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        return {hostname: breaker.snapshot() for hostname, breaker in list(self._breakers.items())}
+
+# Create singleton instances
+device_breakers = DeviceBreakers()
+
+def _collect_breakers():
+    return [{
+        "name": "fms_device_circuit_open",
+        "kind": "gauge",
+        "documentation": "Whether the device's circuit breaker is open",
+        "samples": [
+            ({"device": hostname}, 0.0 if state["state"] == CircuitBreaker.CLOSED else 1.0)
+            for hostname, state in device_breakers.states().items()
+        ]
+    }]
+
+registry.register_collector(_collect_breakers)
+hedge_executor = ThreadPoolExecutor(
+    max_workers=polling_settings.DEVICE_HTTP["hedge_workers"], thread_name_prefix="device-http"
+)
+
+def _is_failure(response: requests.Response) -> bool:
+    # Server errors and throttling mean the device is unhealthy; other
+    # client errors are the caller's problem
+    return response.status_code >= 500 or response.status_code == 429
+
+def _send(session, method: str, url: str, kwargs: Dict[str, Any]) -> requests.Response:
+    response = (session or requests).request(method, url, **kwargs)
+    if _is_failure(response):
+        raise requests.exceptions.HTTPError(
+            f"{response.status_code} from {url}: {response.text[:200]}", response=response
+        )
+    return response
+
+def _hedged_send(
+    session, method: str, url: str, kwargs: Dict[str, Any], hedge_delay: float, may_hedge: Callable[[], bool]
+) -> requests.Response:
+    """
+    Send the request, and a second copy if the first has not answered within
+    ``hedge_delay`` or failed before then. The first success wins; the other
+    attempt is left to finish in the background.
+    """
+    pending = {hedge_executor.submit(_send, session, method, url, kwargs)}
+    done, pending = wait(pending, timeout=hedge_delay)
+    for future in done:
+        if future.exception() is None:
+            return future.result()
+    # The extra attempt needs a spare token from the device's budget
+    if not may_hedge():
+        future = next(iter(done or pending))
+        return future.result()
+
+    logger.debug(f"Hedging request to {url}")
+    pending.add(hedge_executor.submit(_send, session, method, url, kwargs))
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+def device_request(
+    hostname: str,
+    method: str,
+    url: str,
+    extra_params: Dict[str, Any] = None,
+    session: Optional[requests.Session] = None,
+    vendor: Optional[str] = None,
+    **kwargs
+) -> requests.Response:
+    """
+    Make a request to a firewall within its rate budget, with deadlines and
+    its circuit breaker.
+
+    Args:
+        hostname: Device the request goes to; breaker state is kept per device
+        method: HTTP method
+        url: Request URL
+        extra_params: Device extra_params; may override connect_timeout,
+            read_timeout and hedge
+        session: Session to send the request with, e.g. for login cookies
+        vendor: Firewall type, selects the device's default rate budget
+        **kwargs: Passed on to requests
+
+    Returns:
+        The response; 5xx and 429 responses are raised as HTTPError
+
+    Raises:
+        DeviceUnavailable: The device's circuit breaker is open
+        DeviceThrottled: The device's rate budget did not free up in time
+        DeadlineExceeded: The request_deadline passed before the call was made
+    """
+    config = polling_settings.DEVICE_HTTP
+    extra_params = extra_params or {}
+    breaker = device_breakers.get(hostname)
+    if breaker.is_open():
+        circuit_rejections.labels(hostname).inc()
+        raise DeviceUnavailable(f"Circuit open for {hostname}, last error: {breaker.last_error}")
+    call_deadline = request_deadline.get()
+    device_rate_limiter.acquire(hostname, vendor, extra_params, deadline=call_deadline)
+    if call_deadline is not None and time.monotonic() >= call_deadline:
+        raise DeadlineExceeded(f"Deadline passed before calling {hostname}")
+    if not breaker.allow():
+        circuit_rejections.labels(hostname).inc()
+        raise DeviceUnavailable(f"Circuit open for {hostname}, last error: {breaker.last_error}")
+
+    timeout = (
+        float(extra_params.get("connect_timeout", config["connect_timeout"])),
+        float(extra_params.get("read_timeout", config["read_timeout"]))
+    )
+    # A timeout cut short by the caller's deadline is not the device's fault
+    cut_short = False
+    if call_deadline is not None and "timeout" not in kwargs:
+        remaining = call_deadline - time.monotonic()
+        cut_short = remaining < max(timeout)
+        timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+    kwargs.setdefault("timeout", timeout)
+    # Only idempotent reads are hedged
+    hedge = method.upper() == "GET" and extra_params.get("hedge", config["hedge"])
+
+    started = time.perf_counter()
+    try:
+        if hedge:
+            response = _hedged_send(
+                session, method, url, kwargs, config["hedge_delay"],
+                lambda: device_rate_limiter.acquire(hostname, vendor, extra_params, wait=False)
+            )
+        else:
+            response = _send(session, method, url, kwargs)
+    except Exception as e:
+        vendor_request_seconds.labels(vendor, "error").observe(time.perf_counter() - started)
+        if cut_short and isinstance(e, requests.exceptions.Timeout):
+            breaker.release()
+            raise
+        breaker.record_failure(e)
+        if breaker.state == CircuitBreaker.OPEN:
+            logger.warning(f"Circuit open for {hostname} for {breaker.backoff:.0f}s: {str(e)}")
+        raise
+
+    vendor_request_seconds.labels(vendor, "success").observe(time.perf_counter() - started)
+    breaker.record_success()
+    return response
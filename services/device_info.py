@@ -0,0 +1,96 @@
+import asyncio
+import contextvars
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+from .palo_alto_service import get_palo_alto_info
+from .fortigate_service import get_fortigate_info
+from .unifi_service import get_unifi_info
+from .device_http import deadline
+from .device_info_cache import device_info_cache, STALE
+from .metrics import registry
+from config.polling import polling_settings
+
+logger = logging.getLogger(__name__)
+
+info_timeouts = registry.counter(
+    "fms_device_info_timeouts_total", "Info requests that hit their deadline", ["vendor", "partial"]
+)
+
+INFO_FUNCTIONS = {
+    "palo_alto": get_palo_alto_info,
+    "fortigate": get_fortigate_info,
+    "unifi": get_unifi_info,
+}
+
+# The vendor clients block, so they run here rather than on the event loop;
+# the pool bounds how many device calls the API has in flight at once
+info_executor = ThreadPoolExecutor(
+    max_workers=polling_settings.INFO_REQUESTS["workers"], thread_name_prefix="device-info"
+)
+
+def _request_deadline(requested: Optional[float]) -> float:
+    config = polling_settings.INFO_REQUESTS
+    return min(requested or config["default_deadline"], config["max_deadline"])
+
+async def get_device_info(
+    vendor: str,
+    hostname: str,
+    token: str,
+    extra_params: Dict[str, Any] = None,
+    max_age: Optional[float] = None,
+    timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Fetch a device's info without blocking the event loop.
+
+    The call goes through the info cache on the info_executor pool, and the
+    deadline is passed down to the vendor client so the device call itself
+    gives up in time. When the deadline passes first, the last cached info
+    is returned, however old, if there is any.
+
+    Args:
+        vendor: Firewall type, a key of INFO_FUNCTIONS
+        hostname: Device hostname
+        token: API token
+        extra_params: Device extra_params
+        max_age: Oldest cached info to accept, in seconds
+        timeout: Seconds the caller will wait, capped at max_deadline
+
+    Returns:
+        Dict with "data" (None if timed out with nothing cached), "cache"
+        (cache result), "age" in seconds and "timed_out"
+
+    Raises:
+        Whatever the vendor client raised, if it failed within the deadline
+    """
+    extra_params = extra_params or {}
+    timeout = _request_deadline(timeout)
+    started = time.monotonic()
+    fetch_info = INFO_FUNCTIONS[vendor]
+
+    def lookup():
+        with deadline(timeout - (time.monotonic() - started)):
+            return device_info_cache.get(
+                vendor, hostname, token, extra_params,
+                lambda: fetch_info(hostname, token, extra_params),
+                max_age=max_age,
+                wait_timeout=timeout
+            )
+
+    # Carry request context (priority lane, request timings) into the pool
+    context = contextvars.copy_context()
+    future = asyncio.get_running_loop().run_in_executor(info_executor, context.run, lookup)
+    try:
+        data, result, age = await asyncio.wait_for(future, timeout)
+        return {"data": data, "cache": result, "age": age, "timed_out": False}
+    except asyncio.TimeoutError:
+        # A fetch still running finishes in the background and fills the cache
+        cached = device_info_cache.peek(vendor, hostname, token, extra_params)
+        info_timeouts.labels(vendor, str(cached is not None).lower()).inc()
+        logger.warning(f"{vendor} info from {hostname} timed out after {timeout}s")
+        if cached is None:
+            return {"data": None, "cache": None, "age": None, "timed_out": True}
+        return {"data": cached[0], "cache": STALE, "age": cached[1], "timed_out": True}
@@ -0,0 +1,161 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from .metrics import registry
+from config.polling import polling_settings
+
+logger = logging.getLogger(__name__)
+
+cache_requests = registry.counter(
+    "fms_device_info_cache_requests_total", "Info endpoint lookups by cache outcome", ["vendor", "result"]
+)
+
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+COALESCED = "coalesced"
+
+class _Entry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value: Any, fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+
+class DeviceInfoCache:
+    """
+    TTL cache in front of the vendor info calls.
+
+    Entries are keyed by vendor, hostname, token and extra_params. Within
+    ``ttl`` an entry is served as is; for ``stale_ttl`` after that it is
+    still served while one background fetch refreshes it. Concurrent misses
+    for the same key wait on a single fetch instead of each calling the
+    device, so a device sees at most one info call per ttl however many
+    operators are looking at it.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or polling_settings.INFO_CACHE
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(
+            max_workers=self.config["refresh_workers"], thread_name_prefix="info-refresh"
+        )
+
+    @staticmethod
+    def key(vendor: str, hostname: str, token: str, extra_params: Dict[str, Any] = None) -> Tuple:
+        # The token is part of the key so a caller with a wrong token never
+        # sees data fetched with someone else's; only its digest is kept
+        token_digest = hashlib.sha256(token.encode()).hexdigest()
+        params = json.dumps(extra_params or {}, sort_keys=True, default=str)
+        return (vendor, hostname, token_digest, params)
+
+    def get(
+        self,
+        vendor: str,
+        hostname: str,
+        token: str,
+        extra_params: Dict[str, Any],
+        fetch: Callable[[], Any],
+        max_age: Optional[float] = None,
+        wait_timeout: Optional[float] = None
+    ) -> Tuple[Any, str, float]:
+        """
+        Return device info from the cache or from ``fetch``.
+
+        Args:
+            vendor: Firewall type
+            hostname: Device hostname
+            token: API token the info is fetched with
+            extra_params: Device extra_params
+            fetch: Calls the device and returns its info
+            max_age: Oldest acceptable entry in seconds; overrides ttl and
+                disables serving stale entries (0 always fetches)
+            wait_timeout: Longest to wait for another caller's fetch
+
+        Returns:
+            Tuple of (info, cache result, age in seconds)
+
+        Raises:
+            concurrent.futures.TimeoutError: Another caller's fetch did not
+                finish within wait_timeout
+        """
+        if not self.config["enabled"]:
+            cache_requests.labels(vendor, MISS).inc()
+            return fetch(), MISS, 0.0
+
+        key = self.key(vendor, hostname, token, extra_params)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = now - entry.fetched_at
+                if age <= (self.config["ttl"] if max_age is None else max_age):
+                    cache_requests.labels(vendor, HIT).inc()
+                    return entry.value, HIT, age
+                if max_age is None and age <= self.config["ttl"] + self.config["stale_ttl"]:
+                    if key not in self._inflight:
+                        self._inflight[key] = future = Future()
+                        self._refresher.submit(self._fetch, key, fetch, future)
+                    cache_requests.labels(vendor, STALE).inc()
+                    return entry.value, STALE, age
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                self._inflight[key] = future = Future()
+
+        result = MISS if leader else COALESCED
+        cache_requests.labels(vendor, result).inc()
+        if leader:
+            self._fetch(key, fetch, future)
+        # Re-raises the fetch error for every waiter
+        return future.result(timeout=wait_timeout), result, 0.0
+
+    def _fetch(self, key: Tuple, fetch: Callable[[], Any], future: Future):
+        try:
+            value = fetch()
+        except Exception as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            if not future.set_running_or_notify_cancel():
+                return
+            future.set_exception(exc)
+            logger.warning(f"Fetching {key[0]} info from {key[1]} failed: {exc}")
+            return
+
+        with self._lock:
+            self._entries[key] = _Entry(value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.config["max_entries"]:
+                self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        if future.set_running_or_notify_cancel():
+            future.set_result(value)
+
+    def peek(self, vendor: str, hostname: str, token: str,
+             extra_params: Dict[str, Any] = None) -> Optional[Tuple[Any, float]]:
+        """Cached info and its age in seconds, however old, without fetching"""
+        with self._lock:
+            entry = self._entries.get(self.key(vendor, hostname, token, extra_params))
+        if entry is None:
+            return None
+        return entry.value, time.monotonic() - entry.fetched_at
+
+    def invalidate(self, vendor: Optional[str] = None, hostname: Optional[str] = None):
+        """Drop cached entries, all of them or for one vendor and/or device"""
+        with self._lock:
+            for key in [key for key in self._entries
+                        if (vendor is None or key[0] == vendor) and (hostname is None or key[1] == hostname)]:
+                del self._entries[key]
+
+# Create a singleton instance
+device_info_cache = DeviceInfoCache()
@@ -0,0 +1,224 @@
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+
+from models.database import SessionLocal, ReadSessionLocal
+from models.device import Device, DeviceTag
+from config.polling import polling_settings
+
+logger = logging.getLogger(__name__)
+
+# extra_params keys holding device credentials (e.g. the UniFi controller
+# login), which are write-only like the API token
+CREDENTIAL_KEYS = ("username", "password", "secret", "token", "key", "credential")
+REDACTED = "********"
+
+def _is_credential(name: str) -> bool:
+    return any(part in name.lower() for part in CREDENTIAL_KEYS)
+
+def _redact(extra_params: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: REDACTED if _is_credential(name) else value for name, value in extra_params.items()}
+
+class DeviceExists(Exception):
+    """Raised when creating a device whose hostname is already in the inventory"""
+
+class DeviceNotFound(Exception):
+    """Raised for a hostname that is not in the inventory"""
+
+def _to_dict(device: Device, include_token: bool = False) -> Dict[str, Any]:
+    """Device as a dict; the token and credentials are only included for pollers"""
+    data = {
+        "id": device.id,
+        "hostname": device.hostname,
+        "firewall_type": device.firewall_type,
+        "site": device.site,
+        "tags": sorted(tag.tag for tag in device.tags),
+        "extra_params": (device.extra_params or {}) if include_token else _redact(device.extra_params or {}),
+        "intervals": device.intervals or {},
+        "enabled": device.enabled,
+        "deleted": device.deleted,
+        "revision": device.revision,
+        "created_at": device.created_at,
+        "updated_at": device.updated_at,
+    }
+    if include_token:
+        data["token"] = device.token
+    return data
+
+class DeviceInventory:
+    """
+    Persistent device inventory.
+
+    Every change stamps the device with the next inventory revision, and
+    deletions leave a tombstone, so a poller keeps in step by fetching only
+    the rows above the last revision it applied (see changes_since) instead
+    of rereading the whole inventory.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or polling_settings.INVENTORY
+
+    def _write(self, change):
+        """Run ``change(db, revision)`` in a transaction with the next revision"""
+        # Concurrent writers can pick the same revision; the unique index
+        # rejects all but one and the others retry
+        for attempt in range(self.config["write_attempts"]):
+            with SessionLocal() as db:
+                revision = (db.execute(select(func.max(Device.revision))).scalar() or 0) + 1
+                result = change(db, revision)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    if attempt == self.config["write_attempts"] - 1:
+                        raise
+                    continue
+                return _to_dict(result) if result is not None else None
+
+    @staticmethod
+    def _apply(device: Device, fields: Dict[str, Any]):
+        if "site" in fields:
+            device.site = fields["site"]
+        if fields.get("extra_params") is not None:
+            # Credentials read back redacted keep their stored value
+            stored = device.extra_params or {}
+            device.extra_params = {
+                name: stored.get(name) if value == REDACTED and _is_credential(name) else value
+                for name, value in fields["extra_params"].items()
+            }
+        for name in ("firewall_type", "token", "intervals", "enabled"):
+            if fields.get(name) is not None:
+                setattr(device, name, fields[name])
+        if "tags" in fields and fields["tags"] is not None:
+            device.tags = [DeviceTag(tag=tag) for tag in sorted(set(fields["tags"]))]
+
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add a device.
+
+        Args:
+            fields: hostname, firewall_type and token, optionally site, tags,
+                extra_params, intervals and enabled
+
+        Raises:
+            DeviceExists: The hostname is already in the inventory
+        """
+        def change(db, revision):
+            device = db.execute(select(Device).where(Device.hostname == fields["hostname"])).scalar()
+            if device is not None and not device.deleted:
+                raise DeviceExists(f"Device {fields['hostname']} already exists")
+            now = time.time()
+            if device is None:
+                device = Device(hostname=fields["hostname"], created_at=now)
+                db.add(device)
+            else:
+                # Re-adding a deleted device revives its tombstone
+                device.created_at = now
+                device.site = None
+                device.extra_params = {}
+                device.intervals = {}
+                device.enabled = True
+                device.tags = []
+            device.deleted = False
+            self._apply(device, fields)
+            device.revision = revision
+            device.updated_at = now
+            return device
+        return self._write(change)
+
+    def update(self, hostname: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Change a device; only the given fields are updated.
+
+        Raises:
+            DeviceNotFound: The hostname is not in the inventory
+        """
+        def change(db, revision):
+            device = db.execute(
+                select(Device).where(Device.hostname == hostname, Device.deleted.is_(False))
+            ).scalar()
+            if device is None:
+                raise DeviceNotFound(f"Device {hostname} not found")
+            self._apply(device, fields)
+            device.revision = revision
+            device.updated_at = time.time()
+            return device
+        return self._write(change)
+
+    def delete(self, hostname: str):
+        """
+        Remove a device, leaving a tombstone for pollers to pick up.
+
+        Raises:
+            DeviceNotFound: The hostname is not in the inventory
+        """
+        def change(db, revision):
+            device = db.execute(
+                select(Device).where(Device.hostname == hostname, Device.deleted.is_(False))
+            ).scalar()
+            if device is None:
+                raise DeviceNotFound(f"Device {hostname} not found")
+            device.deleted = True
+            device.token = ""
+            device.tags = []
+            device.revision = revision
+            device.updated_at = time.time()
+            return None
+        self._write(change)
+
+    def get(self, hostname: str) -> Dict[str, Any]:
+        """
+        Raises:
+            DeviceNotFound: The hostname is not in the inventory
+        """
+        with ReadSessionLocal() as db:
+            device = db.execute(
+                select(Device).where(Device.hostname == hostname, Device.deleted.is_(False))
+            ).scalar()
+            if device is None:
+                raise DeviceNotFound(f"Device {hostname} not found")
+            return _to_dict(device)
+
+    def list(
+        self,
+        firewall_type: Optional[str] = None,
+        site: Optional[str] = None,
+        tag: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Devices matching every given filter, ordered by hostname"""
+        query = select(Device).where(Device.deleted.is_(False))
+        if firewall_type:
+            query = query.where(Device.firewall_type == firewall_type)
+        if site:
+            query = query.where(Device.site == site)
+        if tag:
+            query = query.join(DeviceTag).where(DeviceTag.tag == tag)
+        query = query.order_by(Device.hostname).offset(offset).limit(min(limit, self.config["max_page_size"]))
+        with ReadSessionLocal() as db:
+            return [_to_dict(device) for device in db.execute(query).scalars().all()]
+
+    def changes_since(self, revision: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Devices changed after ``revision``, tokens included, for pollers.
+
+        Returns:
+            Tuple of (changed devices in revision order, deletions marked
+            "deleted"; latest revision seen)
+        """
+        query = (
+            select(Device)
+            .where(Device.revision > revision)
+            .order_by(Device.revision)
+            .limit(self.config["sync_batch_size"])
+        )
+        with ReadSessionLocal() as db:
+            devices = [_to_dict(device, include_token=True) for device in db.execute(query).scalars().all()]
+        return devices, devices[-1]["revision"] if devices else revision
+
+# Create a singleton instance
+device_inventory = DeviceInventory()
@@ -0,0 +1,119 @@
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+
+from .shared_rate_limit import SharedTokenBuckets
+from .metrics import registry
+from config.polling import polling_settings
+
+logger = logging.getLogger(__name__)
+
+throttle_wait_seconds = registry.counter(
+    "fms_device_throttle_wait_seconds_total", "Time spent waiting for device request budget", ["vendor", "lane"]
+)
+throttled_requests = registry.counter(
+    "fms_device_throttled_total", "Vendor calls rejected for lack of request budget", ["vendor", "lane"]
+)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Lane of the code path making vendor calls; API requests are interactive
+# unless marked otherwise
+request_priority: ContextVar[str] = ContextVar("request_priority", default=INTERACTIVE)
+
+@contextmanager
+def priority(lane: str):
+    """Make vendor calls in this block from the given lane"""
+    token = request_priority.set(lane)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+class DeviceThrottled(Exception):
+    """Raised when a device's request budget does not free up in time"""
+
+class DeviceRateLimiter:
+    """
+    Per-device token buckets shaping the request rate to each firewall.
+
+    Buckets live in a shared memory table, so the poller (including its shard
+    processes), the info endpoints and every API worker draw from the same
+    budget per device. Background polling may not take the last
+    ``interactive_reserve`` share of a bucket, which lets interactive
+    requests through first when a device is busy.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or polling_settings.DEVICE_RATE_LIMIT
+        self._buckets: Optional[SharedTokenBuckets] = None
+
+    @property
+    def buckets(self) -> SharedTokenBuckets:
+        # Opened lazily so spawned shard processes map the table themselves
+        if self._buckets is None:
+            self._buckets = SharedTokenBuckets(
+                self.config["storage_path"], slots=self.config["slots"], shards=self.config["shards"]
+            )
+        return self._buckets
+
+    def budget(self, vendor: Optional[str], extra_params: Dict[str, Any] = None) -> Dict[str, float]:
+        budget = dict(self.config["vendors"].get(vendor) or {"rate": 5.0, "burst": 10.0})
+        budget.update((extra_params or {}).get("rate_limit") or {})
+        return budget
+
+    def acquire(
+        self,
+        hostname: str,
+        vendor: Optional[str] = None,
+        extra_params: Dict[str, Any] = None,
+        lane: Optional[str] = None,
+        wait: bool = True,
+        deadline: Optional[float] = None
+    ) -> bool:
+        """
+        Take one request from the device's budget.
+
+        Args:
+            hostname: Device the request goes to
+            vendor: Firewall type, selects the default budget
+            extra_params: Device extra_params, may override the budget
+            lane: INTERACTIVE or BACKGROUND, defaults to the current context
+            wait: Wait for a token instead of returning False
+            deadline: Monotonic time to give up waiting by, if sooner than
+                the lane's max_wait
+
+        Returns:
+            Whether a token was taken
+
+        Raises:
+            DeviceThrottled: No token became available within the lane's max_wait
+        """
+        if not self.config["enabled"]:
+            return True
+
+        lane = lane or request_priority.get()
+        budget = self.budget(vendor, extra_params)
+        reserve = budget["burst"] * self.config["interactive_reserve"] if lane == BACKGROUND else 0.0
+        lane_deadline = time.monotonic() + self.config["max_wait"].get(lane, 0.0)
+        deadline = lane_deadline if deadline is None else min(deadline, lane_deadline)
+
+        while True:
+            allowed, retry_after = self.buckets.acquire(
+                f"device:{hostname}", rate=budget["rate"], capacity=budget["burst"], reserve=reserve
+            )
+            if allowed:
+                return True
+            if not wait:
+                return False
+            if time.monotonic() + retry_after > deadline:
+                throttled_requests.labels(vendor, lane).inc()
+                raise DeviceThrottled(f"Request budget for {hostname} exhausted ({lane})")
+            throttle_wait_seconds.labels(vendor, lane).inc(retry_after)
+            time.sleep(retry_after)
+
+# Create a singleton instance
+device_rate_limiter = DeviceRateLimiter()
@@ -2,6 +2,8 @@ import requests
 import logging
 from typing import Dict, Any
 
+from .device_http import device_request
+
 logger = logging.getLogger(__name__)
 
 def get_fortigate_info(hostname: str, token: str, extra_params: Dict[str, Any]) -> Dict[str, Any]:
@@ -27,7 +29,7 @@ def get_fortigate_info(hostname: str, token: str, extra_params: Dict[str, Any])
         
         # Make the API request
         logger.info(f"Making request to Fortigate firewall at {hostname}")
-        response = requests.get(url, headers=headers, verify=False)  # In production, handle certificates properly
+        response = device_request(hostname, "GET", url, extra_params, vendor="fortigate", headers=headers, verify=False)  # In production, handle certificates properly
         
         if response.status_code != 200:
             error_msg = f"Failed to retrieve data from Fortigate: {response.text}"
@@ -73,7 +75,7 @@ def get_fortigate_traffic_logs(hostname: str, token: str, extra_params: Dict[str
             
         # Make the API request
         logger.info(f"Retrieving traffic logs from Fortigate firewall at {hostname}")
-        response = requests.get(url, headers=headers, params=params, verify=False)
+        response = device_request(hostname, "GET", url, extra_params, vendor="fortigate", headers=headers, params=params, verify=False)
         
         if response.status_code != 200:
             error_msg = f"Failed to retrieve traffic logs from Fortigate: {response.text}"
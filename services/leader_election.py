@@ -0,0 +1,127 @@
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy import update, or_
+from sqlalchemy.dialects.sqlite import insert
+
+from models.database import SessionLocal
+from models.leader_lease import LeaderLease
+from config.polling import polling_settings
+
+logger = logging.getLogger(__name__)
+
+class LeaderElection:
+    """
+    Lease-based leader election over a row in the shared SQLite database.
+
+    The leader renews its lease every heartbeat; other processes keep trying
+    to take it and succeed once it has expired. A leader that cannot renew
+    before its lease runs out steps down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        on_elected: Callable[[], None],
+        on_revoked: Callable[[], None],
+        lease_seconds: Optional[int] = None,
+        heartbeat_interval: Optional[int] = None
+    ):
+        """
+        Initialize the election.
+
+        Args:
+            name: Role being elected, one lease row per role
+            on_elected: Called when this process becomes leader
+            on_revoked: Called when this process stops being leader
+            lease_seconds: How long a lease stays valid without renewal
+            heartbeat_interval: How often (in seconds) to renew or retry
+        """
+        config = polling_settings.LEADER_ELECTION
+        self.name = name
+        self.on_elected = on_elected
+        self.on_revoked = on_revoked
+        self.lease_seconds = lease_seconds or config["lease_seconds"]
+        self.heartbeat_interval = heartbeat_interval or config["heartbeat_interval"]
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.lease_expires_at = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """
+        Election loop: renew or try to acquire the lease every heartbeat.
+        """
+        logger.info(f"Joining {self.name} leader election as {self.holder_id}")
+
+        while not self._stop_event.is_set():
+            try:
+                acquired = self._try_acquire()
+            except Exception as e:
+                logger.error(f"Error renewing {self.name} lease: {str(e)}")
+                # Keep leading only while the last successful renewal holds
+                acquired = self.is_leader and time.time() < self.lease_expires_at
+
+            if acquired and not self.is_leader:
+                self.is_leader = True
+                logger.info(f"{self.holder_id} elected {self.name} leader")
+                self.on_elected()
+            elif not acquired and self.is_leader:
+                self.is_leader = False
+                logger.warning(f"{self.holder_id} lost {self.name} leadership")
+                self.on_revoked()
+
+            self._stop_event.wait(self.heartbeat_interval)
+
+    def _try_acquire(self) -> bool:
+        """Renew our lease, or take it over if it is free or expired"""
+        now = time.time()
+        expires_at = now + self.lease_seconds
+        with SessionLocal() as db:
+            result = db.execute(
+                update(LeaderLease)
+                .where(LeaderLease.name == self.name)
+                .where(or_(LeaderLease.holder == self.holder_id, LeaderLease.expires_at < now))
+                .values(holder=self.holder_id, expires_at=expires_at, heartbeat_at=now)
+            )
+            acquired = result.rowcount == 1
+            if not acquired:
+                # First election for this role: whoever inserts the row wins
+                result = db.execute(
+                    insert(LeaderLease)
+                    .values(name=self.name, holder=self.holder_id, expires_at=expires_at, heartbeat_at=now)
+                    .on_conflict_do_nothing(index_elements=["name"])
+                )
+                acquired = result.rowcount == 1
+            db.commit()
+
+        if acquired:
+            self.lease_expires_at = expires_at
+        return acquired
+
+    def stop(self):
+        """
+        Leave the election, releasing the lease so another process can take
+        over without waiting for it to expire.
+        """
+        self._stop_event.set()
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        self.on_revoked()
+        try:
+            with SessionLocal() as db:
+                db.execute(
+                    update(LeaderLease)
+                    .where(LeaderLease.name == self.name)
+                    .where(LeaderLease.holder == self.holder_id)
+                    .values(expires_at=0)
+                )
+                db.commit()
+        except Exception as e:
+            logger.error(f"Error releasing {self.name} lease: {str(e)}")
@@ -0,0 +1,289 @@
+import bisect
+import json
+import os
+import threading
+import time
+import logging
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from config.observability import observability_settings
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow vendors
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class _Child:
+    """A metric with its label values bound"""
+
+    __slots__ = ("registry", "key", "buckets")
+
+    def __init__(self, registry: "MetricsRegistry", key: Tuple, buckets: Optional[Tuple[float, ...]] = None):
+        self.registry = registry
+        self.key = key
+        self.buckets = buckets
+
+    def inc(self, amount: float = 1.0):
+        values = self.registry._values()
+        values[self.key] = values.get(self.key, 0.0) + amount
+
+    def observe(self, value: float):
+        values = self.registry._values()
+        state = values.get(self.key)
+        if state is None:
+            # Bucket counts (the last one is +Inf), then sum and count
+            state = values[self.key] = [0] * (len(self.buckets) + 3)
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def time(self):
+        return _Timer(self)
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: _Child):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.started)
+
+class _Metric:
+    def __init__(self, registry: "MetricsRegistry", kind: str, name: str, documentation: str,
+                 labelnames: Tuple[str, ...], buckets: Optional[Tuple[float, ...]] = None):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._children: Dict[Tuple[str, ...], _Child] = {}
+        self._default = _Child(registry, (name, ()), buckets) if not labelnames else None
+
+    def labels(self, *values) -> _Child:
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, _Child(self.registry, (self.name, values), self.buckets))
+        return child
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+class MetricsRegistry:
+    """
+    Counters and histograms cheap enough for hot paths.
+
+    Every thread updates its own dictionary of values, so recording a sample
+    takes no lock; the per-thread values are only summed when /metrics is
+    scraped. Values of threads that have exited are kept, so counters never
+    go backwards. Gauges are computed at scrape time by collector callbacks.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[Dict[str, Any]]]] = []
+        self._shards: List[Dict] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _values(self) -> Dict:
+        values = getattr(self._local, "values", None)
+        if values is None:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append(values)
+        return values
+
+    def _register(self, kind: str, name: str, documentation: str, labelnames=(), buckets=None) -> _Metric:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = _Metric(self, kind, name, documentation, tuple(labelnames), buckets)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> _Metric:
+        return self._register("counter", name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> _Metric:
+        return self._register("histogram", name, documentation, labelnames, tuple(buckets))
+
+    def register_collector(self, collector: Callable[[], List[Dict[str, Any]]]):
+        """
+        Add a callback run at scrape time. It returns families as dicts with
+        name, kind ("gauge" or "counter"), documentation and samples, a list
+        of (labels dict, value) pairs.
+        """
+        self._collectors.append(collector)
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Sum the per-thread values into families keyed by metric name"""
+        families = {
+            name: {"kind": metric.kind, "documentation": metric.documentation,
+                   "labelnames": list(metric.labelnames), "buckets": list(metric.buckets or ()), "samples": {}}
+            for name, metric in list(self._metrics.items())
+        }
+        for values in list(self._shards):
+            for (name, label_values), value in list(values.items()):
+                samples = families[name]["samples"]
+                key = "\x1f".join(label_values)
+                if isinstance(value, list):
+                    total = samples.get(key)
+                    samples[key] = [a + b for a, b in zip(total, value)] if total else list(value)
+                else:
+                    samples[key] = samples.get(key, 0.0) + value
+
+        for collector in self._collectors:
+            try:
+                for family in collector():
+                    families[family["name"]] = {
+                        "kind": family["kind"],
+                        "documentation": family["documentation"],
+                        "labelnames": sorted({label for labels, _ in family["samples"] for label in labels}),
+                        "buckets": [],
+                        "samples": {}
+                    }
+                    target = families[family["name"]]
+                    for labels, value in family["samples"]:
+                        key = "\x1f".join(str(labels.get(label, "")) for label in target["labelnames"])
+                        target["samples"][key] = target["samples"].get(key, 0.0) + value
+            except Exception as e:
+                logger.error(f"Error running metrics collector: {str(e)}")
+        return families
+
+# Create a singleton instance
+registry = MetricsRegistry()
+
+def _merge(into: Dict[str, Dict[str, Any]], families: Dict[str, Dict[str, Any]]):
+    for name, family in families.items():
+        if name not in into:
+            into[name] = {**family, "samples": dict(family["samples"])}
+            continue
+        samples = into[name]["samples"]
+        for key, value in family["samples"].items():
+            total = samples.get(key)
+            if total is None:
+                samples[key] = value
+            elif isinstance(value, list):
+                samples[key] = [a + b for a, b in zip(total, value)]
+            else:
+                samples[key] = total + value
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class MetricsPublisher:
+    """
+    Periodically writes this process's metrics to the multiprocess directory
+    so that /metrics on any worker reports the sum over all live processes.
+    """
+
+    def __init__(self, directory: str, interval: int):
+        self.directory = directory
+        self.interval = interval
+        self._stop_event = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    def publish(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(registry.collect(), f)
+        os.replace(temporary, self.path)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"Error publishing metrics: {str(e)}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def gather(self) -> Dict[str, Dict[str, Any]]:
+        """This process's live metrics plus the latest snapshot of every other live process"""
+        families = registry.collect()
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            pid = int(filename[:-5])
+            if pid == os.getpid():
+                continue
+            path = os.path.join(self.directory, filename)
+            if not _pid_alive(pid):
+                # Counters of exited processes are dropped, as Prometheus
+                # handles the reset
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path) as f:
+                    _merge(families, json.load(f))
+            except (OSError, ValueError):
+                continue
+        return families
+
+_publisher: Optional[MetricsPublisher] = None
+
+def start_publisher():
+    """Start publishing this process's metrics if a multiprocess directory is set"""
+    global _publisher
+    config = observability_settings.METRICS
+    if not config["multiprocess_dir"] or _publisher is not None:
+        return
+    _publisher = MetricsPublisher(config["multiprocess_dir"], config["snapshot_interval"])
+    threading.Thread(target=_publisher.run, daemon=True).start()
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: List[str], values: List[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def render() -> str:
+    """Metrics in the Prometheus text exposition format"""
+    families = _publisher.gather() if _publisher is not None else registry.collect()
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {family['documentation']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        names = family["labelnames"]
+        for key, value in sorted(family["samples"].items()):
+            values = key.split("\x1f") if names else []
+            if family["kind"] == "histogram":
+                cumulative = 0
+                for bound, count in zip(family["buckets"] + ["+Inf"], value[:-2]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(names, values, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(names, values)} {value[-2]}")
+                lines.append(f"{name}_count{_format_labels(names, values)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_format_labels(names, values)} {value}")
+    return "\n".join(lines) + "\n"
@@ -1,110 +1,271 @@
-import time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Callable, Optional
 from datetime import datetime
 
-from .palo_alto_service import get_palo_alto_traffic_logs
-from .fortigate_service import get_fortigate_traffic_logs
-from .unifi_service import get_unifi_traffic_logs
+from .palo_alto_service import get_palo_alto_info, get_palo_alto_traffic_logs
+from .fortigate_service import get_fortigate_info, get_fortigate_traffic_logs
+from .unifi_service import get_unifi_info, get_unifi_traffic_logs
+from .poll_scheduler import PollScheduler
+from .device_http import device_breakers
+from .device_rate_limit import priority, BACKGROUND
+from .device_inventory import device_inventory
+from .metrics import registry
+from backend.services.ingest_service import ingest_service
+from config.polling import polling_settings
 
 logger = logging.getLogger(__name__)
 
+device_polls = registry.counter(
+    "fms_device_polls_total", "Device polls by outcome", ["device", "metric_class", "outcome"]
+)
+
+# Vendor field names for each flow attribute, in order of preference
+FLOW_FIELDS = {
+    "source_ip": ("source_ip", "srcip", "src", "src_ip"),
+    "destination_ip": ("destination_ip", "dstip", "dst", "dst_ip"),
+    "protocol": ("protocol", "proto"),
+    "port": ("port", "dstport", "dport", "dst_port"),
+    "bytes": ("bytes", "sentbyte", "bytes_sent"),
+    "packets": ("packets", "sentpkt", "pkts_sent"),
+    "duration": ("duration", "elapsed", "elapsed_time"),
+}
+
+def _normalize_flow(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a vendor traffic log entry onto NetFlowHistory fields"""
+    flow = {}
+    for field, aliases in FLOW_FIELDS.items():
+        flow[field] = next((entry[alias] for alias in aliases if entry.get(alias) is not None), None)
+    for field in ("port", "bytes", "packets", "duration"):
+        try:
+            flow[field] = int(flow[field]) if flow[field] is not None else None
+        except (TypeError, ValueError):
+            flow[field] = None
+    if flow["protocol"] is not None:
+        flow["protocol"] = str(flow["protocol"])
+    return flow
+
+# Vendor call for each metric class, by firewall type
+POLL_FUNCTIONS = {
+    "traffic_logs": {
+        "palo_alto": get_palo_alto_traffic_logs,
+        "fortigate": get_fortigate_traffic_logs,
+        "unifi": get_unifi_traffic_logs,
+    },
+    "system_info": {
+        "palo_alto": get_palo_alto_info,
+        "fortigate": get_fortigate_info,
+        "unifi": get_unifi_info,
+    },
+}
+
 class MonitoringService:
-    def __init__(self, interval: int = 60):
+    def __init__(
+        self,
+        interval: Optional[int] = None,
+        owns: Optional[Callable[[str], bool]] = None,
+        intervals: Optional[Dict[str, int]] = None
+    ):
         """
         Initialize the monitoring service.
         
         Args:
-            interval: How frequently (in seconds) to poll the firewalls
+            interval: How frequently (in seconds) to poll traffic logs
+            owns: Returns whether this instance polls a given hostname, used
+                when devices are sharded across several pollers
+            intervals: Default interval (in seconds) per metric class
         """
-        self.interval = interval
+        self.config = polling_settings.SCHEDULER
+        self.intervals = dict(intervals or self.config["intervals"])
+        if interval is not None:
+            self.intervals["traffic_logs"] = interval
+        self.owns = owns or (lambda hostname: True)
         self.running = True
-        self.firewalls = {
-            "palo_alto": [],
-            "fortigate": [],
-            "unifi": []
+        self.scheduler: Optional[PollScheduler] = None
+        self.device_info: Dict[str, Dict[str, Any]] = {}
+        # Devices by firewall type, then hostname
+        self.firewalls: Dict[str, Dict[str, Dict[str, Any]]] = {
+            "palo_alto": {},
+            "fortigate": {},
+            "unifi": {}
         }
+        self.inventory_config = polling_settings.INVENTORY
+        self.inventory_revision = 0
         
-    def add_firewall(self, firewall_type: str, hostname: str, token: str, extra_params: Dict[str, Any] = None):
+    def add_firewall(
+        self,
+        firewall_type: str,
+        hostname: str,
+        token: str,
+        extra_params: Dict[str, Any] = None,
+        intervals: Dict[str, int] = None
+    ):
         """
-        Add a firewall to monitor.
+        Add a firewall to monitor, or replace the one with the same hostname.
         
         Args:
             firewall_type: Type of firewall ('palo_alto', 'fortigate', or 'unifi')
             hostname: Hostname or IP address of the firewall
             token: API key or token for authentication
             extra_params: Additional parameters for the API calls
+            intervals: Per-device interval (in seconds) overrides by metric class
         """
         if firewall_type not in self.firewalls:
             raise ValueError(f"Unsupported firewall type: {firewall_type}")
             
-        self.firewalls[firewall_type].append({
+        firewall = {
             "hostname": hostname,
             "token": token,
-            "extra_params": extra_params or {}
-        })
+            "extra_params": extra_params or {},
+            "intervals": intervals or {}
+        }
+        # A device that changed type moves; its schedules are replaced below
+        for other_type, firewalls in self.firewalls.items():
+            if other_type != firewall_type:
+                firewalls.pop(hostname, None)
+        self.firewalls[firewall_type][hostname] = firewall
+        if self.scheduler is not None:
+            self._schedule_firewall(self.scheduler, firewall_type, firewall)
         logger.info(f"Added {firewall_type} firewall at {hostname} to monitoring")
+
+    def remove_firewall(self, hostname: str):
+        """
+        Stop monitoring a firewall; a poll already running finishes.
+
+        Args:
+            hostname: Hostname or IP address of the firewall
+        """
+        removed = False
+        for firewalls in self.firewalls.values():
+            removed = firewalls.pop(hostname, None) is not None or removed
+        if not removed:
+            return
+        if self.scheduler is not None:
+            for metric_class in self.intervals:
+                self.scheduler.unschedule(f"{metric_class}:{hostname}")
+        self.device_info.pop(hostname, None)
+        logger.info(f"Removed firewall at {hostname} from monitoring")
+
+    def sync_inventory(self):
+        """
+        Apply device inventory changes made since the last sync. Only the
+        changed devices are touched, so the cost is per change, not per device.
+        """
+        while True:
+            devices, revision = device_inventory.changes_since(self.inventory_revision)
+            for device in devices:
+                if device["deleted"] or not device["enabled"]:
+                    self.remove_firewall(device["hostname"])
+                else:
+                    self.add_firewall(
+                        device["firewall_type"],
+                        device["hostname"],
+                        device["token"],
+                        device["extra_params"],
+                        device["intervals"]
+                    )
+            self.inventory_revision = revision
+            if len(devices) < self.inventory_config["sync_batch_size"]:
+                return
+
+    def _sync_inventory_job(self):
+        try:
+            self.sync_inventory()
+        except Exception as e:
+            logger.error(f"Error syncing device inventory: {str(e)}")
+
+    def _schedule_firewall(self, scheduler: PollScheduler, firewall_type: str, firewall: Dict[str, Any]):
+        for metric_class, default_interval in self.intervals.items():
+            interval = firewall.get("intervals", {}).get(metric_class, default_interval)
+            if not interval:
+                scheduler.unschedule(f"{metric_class}:{firewall['hostname']}")
+                continue
+            scheduler.schedule(
+                f"{metric_class}:{firewall['hostname']}",
+                metric_class,
+                interval,
+                lambda metric_class=metric_class: self._poll_device(metric_class, firewall_type, firewall)
+            )
         
     def run(self):
         """
-        Main monitoring loop that periodically polls all configured firewalls.
+        Main monitoring loop: poll every device and metric class on its own
+        interval until stopped.
         """
         logger.info("Starting firewall monitoring service")
         
+        # Loop so that a restart requested before the last stop took
+        # effect gets a fresh scheduler
         while self.running:
-            try:
-                self._poll_firewalls()
-            except Exception as e:
-                logger.error(f"Error during firewall polling: {str(e)}")
-                
-            time.sleep(self.interval)
+            if self.inventory_config["enabled"]:
+                self._sync_inventory_job()
+            scheduler = PollScheduler(
+                workers=self.config["workers"],
+                jitter=self.config["jitter"],
+                lag_samples=self.config["lag_samples"]
+            )
+            for firewall_type, firewalls in self.firewalls.items():
+                for firewall in list(firewalls.values()):
+                    self._schedule_firewall(scheduler, firewall_type, firewall)
+            if self.inventory_config["enabled"]:
+                # Later inventory changes are applied to the running schedule
+                scheduler.schedule(
+                    "inventory:sync", "inventory", self.inventory_config["sync_interval"], self._sync_inventory_job
+                )
+            self.scheduler = scheduler
+            if not self.running:
+                break
+            scheduler.run()
+
+    def schedule_stats(self) -> Dict[str, Any]:
+        """Schedule lag and run counters of the running scheduler"""
+        if self.scheduler is None:
+            return {"jobs": 0, "classes": {}}
+        return self.scheduler.stats()
+
+    def device_states(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state of each polled device"""
+        hostnames = [hostname for firewalls in self.firewalls.values() for hostname in list(firewalls)]
+        states = device_breakers.states()
+        return {
+            hostname: states.get(hostname, {"state": "closed", "consecutive_failures": 0})
+            for hostname in hostnames
+            if self.owns(hostname)
+        }
             
-    def _poll_firewalls(self):
+    def _poll_device(self, metric_class: str, firewall_type: str, firewall: Dict[str, Any]):
         """
-        Poll all configured firewalls for traffic logs and stats.
+        Poll one metric class from one firewall.
         """
-        timestamp = datetime.now().isoformat()
-        
-        # Poll Palo Alto firewalls
-        for firewall in self.firewalls["palo_alto"]:
-            try:
-                logs = get_palo_alto_traffic_logs(
-                    firewall["hostname"],
-                    firewall["token"],
-                    firewall["extra_params"]
-                )
-                self._process_logs("palo_alto", firewall["hostname"], logs, timestamp)
-            except Exception as e:
-                logger.error(f"Error polling Palo Alto firewall {firewall['hostname']}: {str(e)}")
-                
-        # Poll Fortigate firewalls
-        for firewall in self.firewalls["fortigate"]:
-            try:
-                logs = get_fortigate_traffic_logs(
-                    firewall["hostname"],
-                    firewall["token"],
-                    firewall["extra_params"]
-                )
-                self._process_logs("fortigate", firewall["hostname"], logs, timestamp)
-            except Exception as e:
-                logger.error(f"Error polling Fortigate firewall {firewall['hostname']}: {str(e)}")
-                
-        # Poll UniFi controllers
-        for firewall in self.firewalls["unifi"]:
-            try:
-                logs = get_unifi_traffic_logs(
-                    firewall["hostname"],
+        hostname = firewall["hostname"]
+        # Devices behind an open circuit are skipped until their next probe
+        if not self.owns(hostname):
+            return
+        if device_breakers.is_open(hostname):
+            device_polls.labels(hostname, metric_class, "skipped").inc()
+            return
+        timestamp = datetime.utcnow().isoformat()
+        try:
+            # Polling yields the device's reserved budget to interactive requests
+            with priority(BACKGROUND):
+                data = POLL_FUNCTIONS[metric_class][firewall_type](
+                    hostname,
                     firewall["token"],
                     firewall["extra_params"]
                 )
-                self._process_logs("unifi", firewall["hostname"], logs, timestamp)
-            except Exception as e:
-                logger.error(f"Error polling UniFi controller {firewall['hostname']}: {str(e)}")
+        except Exception as e:
+            device_polls.labels(hostname, metric_class, "error").inc()
+            logger.error(f"Error polling {metric_class} from {firewall_type} firewall {hostname}: {str(e)}")
+            return
+        device_polls.labels(hostname, metric_class, "success").inc()
+
+        if metric_class == "traffic_logs":
+            self._process_logs(firewall_type, hostname, data, timestamp)
+        else:
+            self.device_info[hostname] = {"firewall_type": firewall_type, "retrieved_at": timestamp, "info": data}
                 
     def _process_logs(self, firewall_type: str, hostname: str, logs: Dict[str, Any], timestamp: str):
         """
-        Process and store the logs from a firewall.
-        In a production environment, this would store the logs in a database or file.
+        Normalize the logs from a firewall into flow records and store them.
         
         Args:
             firewall_type: Type of firewall
@@ -112,13 +273,26 @@ class MonitoringService:
             logs: Log data from the firewall
             timestamp: Timestamp of when the logs were retrieved
         """
-        # In a real implementation, you would store these logs in a database
-        # or process them in some way. For now, we'll just log them.
-        logger.info(f"Retrieved {len(logs.get('data', []))} logs from {firewall_type} firewall at {hostname}")
+        # UniFi and PAN-OS logs come as "data", FortiOS as "results"
+        entries = logs.get('data') or logs.get('results') or []
+        logger.info(f"Retrieved {len(entries)} logs from {firewall_type} firewall at {hostname}")
+
+        retrieved_at = datetime.fromisoformat(timestamp)
+        flows = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            flow = _normalize_flow(entry)
+            flow["timestamp"] = retrieved_at
+            flow["metadata"] = {"firewall_type": firewall_type, "hostname": hostname}
+            flows.append(flow)
+        ingest_service.ingest_flows(flows)
         
     def stop(self):
         """
         Stop the monitoring service.
         """
         logger.info("Stopping firewall monitoring service")
-        self.running = False 
\ No newline at end of file
+        self.running = False
+        if self.scheduler is not None:
+            self.scheduler.stop() 
\ No newline at end of file
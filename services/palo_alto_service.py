@@ -1,9 +1,39 @@
+import time
 import requests
 import logging
+import xml.etree.ElementTree as ET
 from typing import Dict, Any
 
+from .device_http import device_request
+
 logger = logging.getLogger(__name__)
 
+def _element_to_dict(element: ET.Element) -> Any:
+    """Convert an XML element to a dict of its children, or its text if it has none"""
+    children = list(element)
+    if not children:
+        return element.text
+    result: Dict[str, Any] = {}
+    for child in children:
+        value = _element_to_dict(child)
+        if child.tag in result:
+            if not isinstance(result[child.tag], list):
+                result[child.tag] = [result[child.tag]]
+            result[child.tag].append(value)
+        else:
+            result[child.tag] = value
+    return result
+
+def _parse_response(response) -> ET.Element:
+    """Parse a PAN-OS XML API response, raising on status="error" """
+    root = ET.fromstring(response.content)
+    if root.get("status") != "success":
+        raise Exception(f"PAN-OS API error: {ET.tostring(root, encoding='unicode')[:200]}")
+    return root
+
+def _is_xml(response) -> bool:
+    return "xml" in response.headers.get("Content-Type", "") or response.content.lstrip().startswith(b"<")
+
 def get_palo_alto_info(hostname: str, token: str, extra_params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Retrieve system information from a Palo Alto firewall.
@@ -22,13 +52,15 @@ def get_palo_alto_info(hostname: str, token: str, extra_params: Dict[str, Any])
         
         # Make the API request
         logger.info(f"Making request to Palo Alto firewall at {hostname}")
-        response = requests.get(url, verify=False)  # In production, handle certificates properly
+        response = device_request(hostname, "GET", url, extra_params, vendor="palo_alto", verify=False)  # In production, handle certificates properly
         
         if response.status_code != 200:
             error_msg = f"Failed to retrieve data from Palo Alto: {response.text}"
             logger.error(error_msg)
             raise Exception(error_msg)
             
+        if _is_xml(response):
+            return _element_to_dict(_parse_response(response).find("result")) or {}
         return response.json()
         
     except requests.exceptions.RequestException as e:
@@ -60,14 +92,29 @@ def get_palo_alto_traffic_logs(hostname: str, token: str, extra_params: Dict[str
             
         # Make the API request
         logger.info(f"Retrieving traffic logs from Palo Alto firewall at {hostname}")
-        response = requests.get(url, verify=False)
+        response = device_request(hostname, "GET", url, extra_params, vendor="palo_alto", verify=False)
         
         if response.status_code != 200:
             error_msg = f"Failed to retrieve traffic logs from Palo Alto: {response.text}"
             logger.error(error_msg)
             raise Exception(error_msg)
             
-        return response.json()
+        if not _is_xml(response):
+            return response.json()
+
+        # The log query runs as a job on the firewall; poll it until finished
+        job_id = _parse_response(response).findtext("result/job")
+        if job_id is None:
+            raise Exception("PAN-OS log query did not return a job id")
+        job_url = f"https://{hostname}/api/?type=log&action=get&job-id={job_id}&key={token}"
+        for _ in range(int(extra_params.get("log_job_attempts", 10))):
+            job_response = device_request(hostname, "GET", job_url, extra_params, vendor="palo_alto", verify=False)
+            result = _parse_response(job_response).find("result")
+            if result.findtext("job/status") == "FIN":
+                entries = result.findall("log/logs/entry")
+                return {"data": [_element_to_dict(entry) for entry in entries]}
+            time.sleep(float(extra_params.get("log_job_interval", 0.5)))
+        raise Exception(f"PAN-OS log job {job_id} did not finish")
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Network error while retrieving Palo Alto traffic logs: {str(e)}")
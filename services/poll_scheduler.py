@@ -0,0 +1,190 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+schedule_lag_seconds = registry.histogram(
+    "fms_poll_schedule_lag_seconds", "How late poll jobs are dispatched", ["job_class"]
+)
+poll_job_seconds = registry.histogram(
+    "fms_poll_job_seconds", "Poll job run time", ["job_class"]
+)
+poll_job_events = registry.counter(
+    "fms_poll_job_events_total", "Poll job runs, skipped periods, overruns and errors", ["job_class", "event"]
+)
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class PollJob:
+    def __init__(self, key: str, job_class: str, interval: float, callback: Callable[[], None]):
+        self.key = key
+        self.job_class = job_class
+        self.interval = interval
+        self.callback = callback
+        self.slot = 0.0  # Start of the current period on the job's fixed grid
+        self.running = False
+        self.cancelled = False
+
+class PollScheduler:
+    """
+    Runs periodic jobs from a heap ordered by next due time.
+
+    Each job keeps a fixed grid (phase + n * interval), so its period does not
+    drift with how long the job takes. Phases are spread randomly over the
+    first interval and every run gets a small jitter around its grid slot, so
+    devices are not all polled in the same instant. Jobs run on a thread pool;
+    a job that is still running when it is due again skips that period.
+    """
+
+    def __init__(self, workers: int = 8, jitter: float = 0.1, lag_samples: int = 1024):
+        """
+        Initialize the scheduler.
+
+        Args:
+            workers: Number of threads running due jobs
+            jitter: Maximum per-run offset, as a fraction of the job's interval
+            lag_samples: How many recent schedule lags to keep per job class
+        """
+        self.jitter = jitter
+        self.lag_samples = lag_samples
+        self.running = True
+        self._heap = []
+        self._jobs: Dict[str, PollJob] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poll")
+        self._lags: Dict[str, deque] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def schedule(self, key: str, job_class: str, interval: float, callback: Callable[[], None]):
+        """
+        Add a periodic job, replacing any job with the same key.
+
+        Args:
+            key: Unique job id, e.g. "traffic_logs:fw1.example.com"
+            job_class: Group the job's lag is reported under
+            interval: Seconds between runs
+            callback: Function to run
+        """
+        job = PollJob(key, job_class, interval, callback)
+        job.slot = time.monotonic() + random.uniform(0, interval)
+        with self._lock:
+            previous = self._jobs.get(key)
+            if previous is not None:
+                previous.cancelled = True
+            self._jobs[key] = job
+            self._lags.setdefault(job_class, deque(maxlen=self.lag_samples))
+            self._counters.setdefault(job_class, {"runs": 0, "skipped": 0, "overruns": 0, "errors": 0})
+            heapq.heappush(self._heap, (job.slot, next(self._sequence), job))
+        self._wakeup.set()
+
+    def unschedule(self, key: str):
+        """Remove a job; a run already in progress finishes"""
+        with self._lock:
+            job = self._jobs.pop(key, None)
+            if job is not None:
+                job.cancelled = True
+
+    def _next_run(self, job: PollJob) -> float:
+        return job.slot + random.uniform(-self.jitter, self.jitter) * job.interval
+
+    def run(self):
+        """
+        Scheduling loop: wait for the earliest job, dispatch it and put it
+        back on the heap at its next grid slot.
+        """
+        while self.running:
+            with self._lock:
+                # Discard cancelled jobs at the top of the heap
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                due = self._heap[0][0] if self._heap else None
+
+            now = time.monotonic()
+            if due is None or due > now:
+                self._wakeup.wait(None if due is None else due - now)
+                self._wakeup.clear()
+                continue
+
+            with self._lock:
+                due, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                counters = self._counters[job.job_class]
+                self._lags[job.job_class].append(now - due)
+                schedule_lag_seconds.labels(job.job_class).observe(now - due)
+
+                if job.running:
+                    counters["overruns"] += 1
+                    poll_job_events.labels(job.job_class, "overrun").inc()
+                else:
+                    job.running = True
+                    try:
+                        self._executor.submit(self._run_job, job)
+                    except RuntimeError:
+                        # Stopped while this job was being dispatched
+                        job.running = False
+                        break
+                    counters["runs"] += 1
+                    poll_job_events.labels(job.job_class, "run").inc()
+
+                # Advance on the grid; periods missed while behind are skipped
+                job.slot += job.interval
+                if job.slot <= now:
+                    missed = int((now - job.slot) // job.interval) + 1
+                    job.slot += missed * job.interval
+                    counters["skipped"] += missed
+                    poll_job_events.labels(job.job_class, "skipped").inc(missed)
+                heapq.heappush(self._heap, (self._next_run(job), next(self._sequence), job))
+
+    def _run_job(self, job: PollJob):
+        started = time.perf_counter()
+        try:
+            job.callback()
+        except Exception as e:
+            self._counters[job.job_class]["errors"] += 1
+            poll_job_events.labels(job.job_class, "error").inc()
+            logger.error(f"Error running poll job {job.key}: {str(e)}")
+        finally:
+            poll_job_seconds.labels(job.job_class).observe(time.perf_counter() - started)
+            job.running = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Schedule lag (seconds late at dispatch) and run counters per job class"""
+        with self._lock:
+            classes = {}
+            for job_class, lags in self._lags.items():
+                samples = list(lags)
+                classes[job_class] = {
+                    "jobs": sum(1 for job in self._jobs.values() if job.job_class == job_class),
+                    "lag_p50": _percentile(samples, 0.50),
+                    "lag_p99": _percentile(samples, 0.99),
+                    "lag_max": max(samples, default=0.0),
+                    **self._counters[job_class]
+                }
+            return {"jobs": len(self._jobs), "classes": classes}
+
+    def stop(self, wait: bool = False):
+        """
+        Stop dispatching jobs.
+
+        Args:
+            wait: Block until running jobs have finished
+        """
+        self.running = False
+        self._wakeup.set()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,75 @@
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+from typing import Optional
+
+from config.observability import observability_settings
+
+logger = logging.getLogger(__name__)
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another is running"""
+
+class SamplingProfiler:
+    """
+    Statistical profiler for the whole process.
+
+    A background thread snapshots the stack of every other thread at a fixed
+    interval. Nothing is hooked into the profiled code, so overhead is the
+    sampling thread alone and the profiler is only running while asked to.
+    Output is in the collapsed-stack format read by flamegraph.pl and
+    speedscope: one ``frame;frame;frame count`` line per distinct stack.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(self, seconds: float, interval: Optional[float] = None) -> str:
+        """
+        Sample all threads for ``seconds``.
+
+        Args:
+            seconds: How long to sample, capped at PROFILER["max_seconds"]
+            interval: Seconds between samples, default PROFILER["interval_ms"]
+
+        Returns:
+            Collapsed stacks
+
+        Raises:
+            ProfilerBusy: Another profile is in progress
+        """
+        config = observability_settings.PROFILER
+        seconds = min(seconds, config["max_seconds"])
+        interval = interval or config["interval_ms"] / 1000
+
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            logger.info(f"Profiling for {seconds}s every {interval * 1000:.1f}ms")
+            return self._sample(seconds, interval)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float) -> str:
+        stacks: Counter = Counter()
+        own_thread = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(frames))] += 1
+            time.sleep(interval)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+# Create a singleton instance
+sampling_profiler = SamplingProfiler()
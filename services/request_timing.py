@@ -0,0 +1,149 @@
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+
+from config.observability import observability_settings
+
+logger = logging.getLogger(__name__)
+
+# Phase durations (seconds) of the request being handled. The middleware sets
+# a fresh dict per request; code running for it, including in the threadpool
+# and in SQLAlchemy's async greenlets, adds to that same dict.
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+# Order of phases in the Server-Timing header
+PHASES = ("db", "serialize", "compress")
+
+def record(phase: str, seconds: float):
+    """Add ``seconds`` to a phase of the current request, if one is being timed"""
+    timings = _timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+@contextmanager
+def timed(phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    timings = _timings.get()
+    if timings is not None and started is not None:
+        timings["db"] = timings.get("db", 0.0) + time.perf_counter() - started
+        timings["queries"] = timings.get("queries", 0) + 1
+
+def instrument_engines(*engines):
+    """Count SQL execution time on these engines (sync or async) towards "db" """
+    seen = set()
+    for engine in engines:
+        engine = getattr(engine, "sync_engine", engine)
+        if id(engine) in seen:
+            continue
+        seen.add(id(engine))
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that counts rendering towards "serialize" """
+
+    def render(self, content) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+class _TimedGzipFile:
+    """Counts time spent compressing towards "compress" """
+
+    def __init__(self, gzip_file):
+        self._gzip_file = gzip_file
+
+    def write(self, data):
+        with timed("compress"):
+            return self._gzip_file.write(data)
+
+    def close(self):
+        with timed("compress"):
+            return self._gzip_file.close()
+
+class TimedGZipResponder(GZipResponder):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gzip_file = _TimedGzipFile(self.gzip_file)
+
+class TimedGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that reports compression time"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = TimedGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+class RequestTimingMiddleware:
+    """
+    Times each request by phase and reports it in a Server-Timing header.
+
+    Must be the outermost middleware so that the response start message it
+    annotates comes after the body has been compressed. Requests slower than
+    REQUEST_TIMING["slow_request_ms"] are logged with their phases.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.config = observability_settings.REQUEST_TIMING
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.config["enabled"]:
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = time.perf_counter() - started
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", self._server_timing(timings, elapsed))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            elapsed = time.perf_counter() - started
+            if elapsed * 1000 >= self.config["slow_request_ms"]:
+                phases = " ".join(f"{phase}={timings.get(phase, 0.0) * 1000:.1f}ms" for phase in PHASES)
+                logger.warning(
+                    f"Slow request {scope['method']} {scope['path']} -> {status_code}: "
+                    f"{elapsed * 1000:.1f}ms ({phases} queries={timings.get('queries', 0)})"
+                )
+
+    @staticmethod
+    def _server_timing(timings: Dict[str, float], elapsed: float) -> str:
+        entries = []
+        for phase in PHASES:
+            if phase in timings:
+                entry = f"{phase};dur={timings[phase] * 1000:.2f}"
+                if phase == "db":
+                    entry += f';desc="{timings.get("queries", 0)} queries"'
+                entries.append(entry)
+        entries.append(f"total;dur={elapsed * 1000:.2f}")
+        return ", ".join(entries)
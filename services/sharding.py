@@ -0,0 +1,231 @@
+import bisect
+import hashlib
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from models.database import SessionLocal
+from models.poller_shard import PollerShard
+from config.polling import polling_settings
+
+logger = logging.getLogger(__name__)
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes. Adding or removing one of K
+    nodes moves only about 1/K of the keys.
+    """
+
+    def __init__(self, nodes: List[str], virtual_nodes: int = 128):
+        self.nodes = sorted(nodes)
+        self._points = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in self.nodes
+            for replica in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in self._points]
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._points)
+        return self._points[index][1]
+
+class ShardMembership:
+    """
+    Registers a poller shard in the shared database, heartbeats it, and keeps
+    a hash ring of all live shards to decide which devices this shard owns.
+    """
+
+    def __init__(self, shard_id: str, config: Dict[str, Any] = None):
+        self.shard_id = shard_id
+        self.config = config or polling_settings.SHARDING
+        self.ring = HashRing([shard_id], self.config["virtual_nodes"])
+        self.started_at = time.time()
+        self._stop_event = threading.Event()
+
+    def owns(self, hostname: str) -> bool:
+        return self.ring.node_for(hostname) == self.shard_id
+
+    def heartbeat(self, devices: List[str], schedule_stats: Optional[Dict[str, Any]] = None):
+        """Refresh this shard's row and rebuild the ring from live shards"""
+        now = time.time()
+        with SessionLocal() as db:
+            db.execute(
+                insert(PollerShard)
+                .values(
+                    shard_id=self.shard_id,
+                    host=socket.gethostname(),
+                    pid=os.getpid(),
+                    started_at=self.started_at,
+                    heartbeat_at=now,
+                    device_count=len(devices),
+                    devices=devices,
+                    schedule_stats=schedule_stats
+                )
+                .on_conflict_do_update(
+                    index_elements=["shard_id"],
+                    set_={
+                        "host": socket.gethostname(),
+                        "pid": os.getpid(),
+                        "started_at": self.started_at,
+                        "heartbeat_at": now,
+                        "device_count": len(devices),
+                        "devices": devices,
+                        "schedule_stats": schedule_stats
+                    }
+                )
+            )
+            db.commit()
+            live = db.execute(
+                select(PollerShard.shard_id)
+                .where(PollerShard.heartbeat_at >= now - self.config["member_ttl"])
+            ).scalars().all()
+
+        if sorted(live) != self.ring.nodes:
+            logger.info(f"Shard {self.shard_id} sees live shards: {sorted(live)}")
+            self.ring = HashRing(live, self.config["virtual_nodes"])
+
+    def run(self, list_devices, schedule_stats=None):
+        """
+        Heartbeat loop.
+
+        Args:
+            list_devices: Returns every hostname known to the poller
+            schedule_stats: Returns the shard's poll scheduler stats
+        """
+        while not self._stop_event.is_set():
+            try:
+                owned = [hostname for hostname in list_devices() if self.owns(hostname)]
+                self.heartbeat(owned, schedule_stats() if schedule_stats else None)
+            except Exception as e:
+                logger.error(f"Error during shard {self.shard_id} heartbeat: {str(e)}")
+            self._stop_event.wait(self.config["heartbeat_interval"])
+
+    def stop(self):
+        self._stop_event.set()
+        with SessionLocal() as db:
+            db.execute(delete(PollerShard).where(PollerShard.shard_id == self.shard_id))
+            db.commit()
+
+def run_shard(shard_id: str, firewalls: Dict[str, Dict[str, Dict[str, Any]]], intervals: Dict[str, int]):
+    """
+    Entry point of a shard worker process: poll the devices the ring assigns
+    to ``shard_id``, writing through the shared ingestion path.
+    """
+    from .monitoring_service import MonitoringService
+    from .metrics import start_publisher
+
+    # Shard metrics reach /metrics through the multiprocess directory
+    start_publisher()
+    membership = ShardMembership(shard_id)
+    service = MonitoringService(owns=membership.owns, intervals=intervals)
+    service.firewalls = firewalls
+
+    def list_devices():
+        return [hostname for devices in service.firewalls.values() for hostname in list(devices)]
+
+    # Join the ring before the first sweep so ownership is settled
+    membership.heartbeat([hostname for hostname in list_devices() if membership.owns(hostname)])
+    heartbeat_thread = threading.Thread(
+        target=membership.run,
+        args=(list_devices, lambda: {**service.schedule_stats(), "devices": service.device_states()}),
+        daemon=True
+    )
+    heartbeat_thread.start()
+    logger.info(f"Poller shard {shard_id} started")
+    try:
+        service.run()
+    finally:
+        membership.stop()
+
+class ShardedPoller:
+    """
+    Runs a MonitoringService as K worker processes. Devices are assigned to
+    workers by consistent hashing of their hostname, so the poller uses K
+    cores, and shards on other hosts sharing the database join the same ring.
+    """
+
+    def __init__(self, monitoring_service, workers: Optional[int] = None):
+        """
+        Initialize the sharded poller.
+
+        Args:
+            monitoring_service: Service whose devices and intervals the shards use
+            workers: Number of shard processes on this host
+        """
+        self.monitoring_service = monitoring_service
+        self.workers = workers or polling_settings.SHARDING["workers"]
+        self.running = True
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        self._context = multiprocessing.get_context("spawn")
+
+    def _start_shard(self, shard_id: str):
+        process = self._context.Process(
+            target=run_shard,
+            args=(shard_id, self.monitoring_service.firewalls, self.monitoring_service.intervals),
+            name=f"poller-{shard_id}",
+            daemon=True
+        )
+        process.start()
+        self.processes[shard_id] = process
+
+    def run(self):
+        """
+        Start the shard processes and restart any that die.
+        """
+        logger.info(f"Starting {self.workers} poller shards")
+        host = socket.gethostname()
+        for index in range(self.workers):
+            self._start_shard(f"{host}-{index}")
+
+        while self.running:
+            for shard_id, process in list(self.processes.items()):
+                if not process.is_alive():
+                    logger.warning(f"Poller shard {shard_id} exited ({process.exitcode}), restarting")
+                    self._start_shard(shard_id)
+            time.sleep(polling_settings.SHARDING["heartbeat_interval"])
+
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join()
+        self.processes.clear()
+
+    def stop(self):
+        """
+        Stop the shard processes.
+        """
+        logger.info("Stopping poller shards")
+        self.running = False
+
+def get_shard_status(include_devices: bool = False) -> List[Dict[str, Any]]:
+    """Health and device assignment of every registered shard"""
+    now = time.time()
+    ttl = polling_settings.SHARDING["member_ttl"]
+    with SessionLocal() as db:
+        shards = db.execute(select(PollerShard).order_by(PollerShard.shard_id)).scalars().all()
+        return [
+            {
+                "shard_id": shard.shard_id,
+                "host": shard.host,
+                "pid": shard.pid,
+                "healthy": shard.heartbeat_at is not None and shard.heartbeat_at >= now - ttl,
+                "uptime": now - shard.started_at if shard.started_at else None,
+                "last_heartbeat_age": now - shard.heartbeat_at if shard.heartbeat_at else None,
+                "device_count": shard.device_count,
+                "schedule": shard.schedule_stats,
+                **({"devices": shard.devices or []} if include_devices else {})
+            }
+            for shard in shards
+        ]
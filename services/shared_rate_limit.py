@@ -0,0 +1,129 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import logging
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# Slot layout: key hash (0 = empty), available tokens, last refill time
+SLOT = struct.Struct("<Qdd")
+
+# How many neighbouring slots a lookup may probe before evicting
+MAX_PROBES = 8
+
+class SharedTokenBuckets:
+    """
+    Token buckets kept in a memory-mapped file so every worker process on the
+    host draws from the same budget.
+
+    The file is a fixed table of slots split into shards. Each shard is guarded
+    by a thread lock (within a process) and a POSIX byte-range lock on its
+    region of the file (across processes), so unrelated keys rarely contend.
+    """
+
+    def __init__(self, path: str, slots: int = 65536, shards: int = 64):
+        """
+        Initialize the shared table, creating the backing file if needed.
+
+        Args:
+            path: Backing file, ideally on tmpfs such as /dev/shm
+            slots: Total number of buckets the table can hold
+            shards: Number of independently locked regions
+        """
+        self.path = path
+        self.shards = shards
+        self.slots_per_shard = max(1, slots // shards)
+        self.size = self.shards * self.slots_per_shard * SLOT.size
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < self.size:
+            os.ftruncate(self._fd, self.size)
+        self._map = mmap.mmap(self._fd, self.size)
+        self._locks = [threading.Lock() for _ in range(self.shards)]
+        logger.info(f"Using shared rate limit table at {path} ({self.size} bytes)")
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def acquire(
+        self, key: str, rate: float, capacity: float, cost: float = 1.0, reserve: float = 0.0
+    ) -> Tuple[bool, float]:
+        """
+        Take ``cost`` tokens from the bucket for ``key``.
+
+        Args:
+            key: Client identity, e.g. its remote address
+            rate: Tokens added per second
+            capacity: Bucket size (maximum burst)
+            cost: Tokens this request consumes
+            reserve: Tokens that must be left in the bucket afterwards, kept
+                for callers with a lower reserve
+
+        Returns:
+            (allowed, seconds until enough tokens are available)
+        """
+        key_hash = self._hash(key)
+        shard = key_hash % self.shards
+        shard_offset = shard * self.slots_per_shard * SLOT.size
+        shard_length = self.slots_per_shard * SLOT.size
+        now = time.time()
+        refill_time = capacity / rate
+
+        with self._locks[shard]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, shard_length, shard_offset)
+            try:
+                offset, tokens, updated = self._find(key_hash, shard_offset, now, refill_time)
+                if updated is None:
+                    tokens = capacity
+                else:
+                    tokens = min(capacity, tokens + (now - updated) * rate)
+
+                allowed = tokens - cost >= reserve
+                if allowed:
+                    tokens -= cost
+                SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, shard_length, shard_offset)
+
+        return allowed, 0.0 if allowed else (cost + reserve - tokens) / rate
+
+    def _find(self, key_hash: int, shard_offset: int, now: float, refill_time: float):
+        """
+        Locate the slot for ``key_hash`` within its shard.
+
+        Returns:
+            (offset, tokens, updated); ``updated`` is None for a fresh slot
+        """
+        start = (key_hash // self.shards) % self.slots_per_shard
+        reusable = None
+        oldest = None
+        for probe in range(min(MAX_PROBES, self.slots_per_shard)):
+            offset = shard_offset + ((start + probe) % self.slots_per_shard) * SLOT.size
+            slot_hash, tokens, updated = SLOT.unpack_from(self._map, offset)
+            if slot_hash == key_hash:
+                return offset, tokens, updated
+            # Empty slots, and buckets that would have refilled completely, are free
+            if reusable is None and (slot_hash == 0 or now - updated >= refill_time):
+                reusable = offset
+            if oldest is None or updated < oldest[1]:
+                oldest = (offset, updated)
+        return (reusable if reusable is not None else oldest[0]), 0.0, None
+
+    def reset(self):
+        """Empty every bucket"""
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            self._map[:] = bytes(self.size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
@@ -2,6 +2,8 @@ import requests
 import logging
 from typing import Dict, Any
 
+from .device_http import device_request
+
 logger = logging.getLogger(__name__)
 
 def get_unifi_info(hostname: str, token: str, extra_params: Dict[str, Any]) -> Dict[str, Any]:
@@ -28,7 +30,7 @@ def get_unifi_info(hostname: str, token: str, extra_params: Dict[str, Any]) -> D
         }
         
         logger.info(f"Logging into UniFi controller at {hostname}")
-        login_response = session.post(login_url, json=login_payload, verify=False)
+        login_response = device_request(hostname, "POST", login_url, extra_params, vendor="unifi", session=session, json=login_payload, verify=False)
         
         if login_response.status_code != 200:
             error_msg = f"Failed to login to UniFi controller: {login_response.text}"
@@ -38,7 +40,7 @@ def get_unifi_info(hostname: str, token: str, extra_params: Dict[str, Any]) -> D
         # Get system information
         info_url = f"https://{hostname}/api/s/default/stat/device"
         logger.info(f"Retrieving system info from UniFi controller at {hostname}")
-        info_response = session.get(info_url, verify=False)
+        info_response = device_request(hostname, "GET", info_url, extra_params, vendor="unifi", session=session, verify=False)
         
         if info_response.status_code != 200:
             error_msg = f"Failed to retrieve system info from UniFi: {info_response.text}"
@@ -78,7 +80,7 @@ def get_unifi_traffic_logs(hostname: str, token: str, extra_params: Dict[str, An
         }
         
         logger.info(f"Logging into UniFi controller at {hostname}")
-        login_response = session.post(login_url, json=login_payload, verify=False)
+        login_response = device_request(hostname, "POST", login_url, extra_params, vendor="unifi", session=session, json=login_payload, verify=False)
         
         if login_response.status_code != 200:
             error_msg = f"Failed to login to UniFi controller: {login_response.text}"
@@ -93,7 +95,7 @@ def get_unifi_traffic_logs(hostname: str, token: str, extra_params: Dict[str, An
         }
         
         logger.info(f"Retrieving traffic logs from UniFi controller at {hostname}")
-        logs_response = session.get(logs_url, params=params, verify=False)
+        logs_response = device_request(hostname, "GET", logs_url, extra_params, vendor="unifi", session=session, params=params, verify=False)
         
         if logs_response.status_code != 200:
             error_msg = f"Failed to retrieve traffic logs from UniFi: {logs_response.text}"
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from backend.services.notification_dispatcher import NotificationDispatcher
+from config.alerting import alerting_settings
+from services.shared_rate_limit import SharedTokenBuckets
+
+WEBHOOK = "https://hooks.example.com/services/T000/B000/XXXX"
+
+class _Response:
+    status_code = 200
+    text = ""
+    headers = {}
+
+class _Session:
+    """Records requests instead of sending them"""
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, method, url, json=None, headers=None, timeout=None, allow_redirects=True):
+        self.requests.append((method, url, json))
+        return _Response()
+
+class NotificationBatchingTest(unittest.TestCase):
+    def setUp(self):
+        self.scratch = tempfile.mkdtemp()
+        config = dict(
+            alerting_settings.NOTIFICATIONS,
+            outbox_path=os.path.join(self.scratch, "outbox.db"),
+            allowed_hosts=["hooks.example.com"]
+        )
+        self.dispatcher = NotificationDispatcher(config)
+        self.dispatcher._init_outbox()
+        self.dispatcher._session = self.session = _Session()
+        self.dispatcher._buckets = SharedTokenBuckets(os.path.join(self.scratch, "ratelimit.shm"), slots=64, shards=1)
+        # Deliver from the test rather than from background workers
+        self.dispatcher.start = lambda: None
+
+    def tearDown(self):
+        shutil.rmtree(self.scratch)
+
+    def _deliver_all(self, channel: str):
+        settings = self.dispatcher.config["channels"][channel]
+        while True:
+            rows = self.dispatcher._claim(channel, settings["batch_size"])
+            if not rows:
+                return
+            self.dispatcher._deliver(channel, settings, rows)
+
+    def _slack(self, message: str, slack_channel: str):
+        self.dispatcher.enqueue("slack", {
+            "alert": {"type": "cpu", "severity": "warning", "message": message},
+            "config": {"webhook": WEBHOOK, "channel": slack_channel},
+        })
+
+    def test_slack_channel_overrides_are_sent_separately(self):
+        self._slack("netops alert", "#netops")
+        self._slack("security alert", "#security")
+        self._deliver_all("slack")
+
+        self.assertEqual(len(self.session.requests), 2)
+        sent = {body["channel"]: body["attachments"][0]["text"] for _, _, body in self.session.requests}
+        self.assertEqual(sent, {"#netops": "netops alert", "#security": "security alert"})
+
+    def test_slack_same_channel_is_batched(self):
+        self._slack("first", "#netops")
+        self._slack("second", "#netops")
+        self._deliver_all("slack")
+
+        self.assertEqual(len(self.session.requests), 1)
+        self.assertEqual(len(self.session.requests[0][2]["attachments"]), 2)
+
+if __name__ == "__main__":
+    unittest.main()